@@ -1,13 +1,45 @@
 import os
 import json
-from google import genai
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, wait, FIRST_COMPLETED
 from google.genai import types
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
-from tavily import TavilyClient
+from cache import cached_search, cached_generate, cached_generate_stream
+import clients
+from compaction import compact_candidates, source_domain
+import telemetry
+import deadline
+from categories import CATEGORIES
+from streaming import ItemStreamParser, read_until
 
 load_dotenv()
 
+# Sentiment enrichment fan-out: how many items are looked up at once, and how long
+# a single item (Tavily social search + flash summary) may take before we give up on it.
+SENTIMENT_CONCURRENCY = int(os.getenv("SENTIMENT_CONCURRENCY", "5"))
+SENTIMENT_ITEM_TIMEOUT = float(os.getenv("SENTIMENT_ITEM_TIMEOUT", "45"))
+
+# Summarize a category's sentiments in one flash request instead of one request per item
+SENTIMENT_BATCH = os.getenv("SENTIMENT_BATCH", "1").lower() in ("1", "true", "yes")
+
+# Stream the Pro selection and start enriching items as they arrive (0 = wait for the full answer)
+SELECTION_STREAMING = os.getenv("SELECTION_STREAMING", "1").lower() in ("1", "true", "yes")
+
+# Sentiment of an item whose lookup was cancelled because the enrich budget ran out
+SENTIMENT_SKIPPED = "時間不足，未查詢社群討論"
+
+# Raw sentiment values that are passed through as-is instead of being summarized
+SENTIMENT_PLACEHOLDERS = ["目前無顯著社群討論", "無法取得社群討論", "無法獲取 API Key", SENTIMENT_SKIPPED]
+
+# Sentiment values that mean the lookup failed and is worth retrying on --resume
+SENTIMENT_FAILURES = ["無法取得社群討論", "無法獲取 API Key", "社群情緒總結失敗", SENTIMENT_SKIPPED]
+
+# Prompt-facing category names, their selection criteria and the report_data keys the PDF template reads
+CATEGORY_NAMES = {key: spec["name"] for key, spec in CATEGORIES.items()}
+CATEGORY_CRITERIA = {spec["name"]: spec["criteria"] for spec in CATEGORIES.values()}
+REPORT_KEYS = {key: spec["report_key"] for key, spec in CATEGORIES.items()}
+
 # Define the Pydantic schema for structured output
 class NewsItem(BaseModel):
     title: str = Field(description="新聞標題 (Title)")
@@ -20,6 +52,13 @@ class NewsItem(BaseModel):
 class CategoryReport(BaseModel):
     items: list[NewsItem] = Field(description="List of exactly 10 most critical news items")
 
+class SentimentSummary(BaseModel):
+    id: int = Field(description="新聞編號 (Item ID)")
+    social_sentiment: str = Field(description="社群情緒總結 (Social Sentiment)：一句話總結網民的整體情緒反應與主要爭議點")
+
+class SentimentBatch(BaseModel):
+    items: list[SentimentSummary] = Field(description="One sentiment summary per news item ID")
+
 class DailyReport(BaseModel):
     financial_news: CategoryReport
     ai_news: CategoryReport
@@ -28,17 +67,17 @@ def get_social_sentiment(article_title: str) -> str:
     """
     Fetch social media sentiments for a specific news title using Tavily.
     """
-    api_key = os.getenv("TAVILY_API_KEY")
-    if not api_key:
+    client = clients.get_tavily_client()
+    if client is None:
         return "無法獲取 API Key"
         
-    client = TavilyClient(api_key=api_key)
     query = f"Reddit AND Twitter (X) AND Hacker News reaction and comments to: {article_title}"
     sentiment_sources = ["reddit.com", "twitter.com", "x.com", "news.ycombinator.com"]
     
     try:
         # Search specifically in social media domains
-        response = client.search(
+        response = cached_search(
+            client,
             query=query,
             search_depth="advanced",
             include_domains=sentiment_sources,
@@ -55,43 +94,81 @@ def get_social_sentiment(article_title: str) -> str:
         print(f"Error fetching sentiment for {article_title}: {e}")
         return "無法取得社群討論"
 
-def analyze_and_format_news(finance_raw: list, ai_raw: list) -> dict:
+def get_gemini_client():
     """
-    Uses Gemini 3.1 Pro to select the top 10 news, summarize them, and fetch social sentiments.
+    Returns the shared genai client, or None when GEMINI_API_KEY is missing.
     """
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
+    client = clients.get_gemini_client()
+    if client is None:
         print("GEMINI_API_KEY not found!")
+    return client
+
+def analyze_and_format_news(raw_news: dict) -> dict:
+    """
+    Uses Gemini 3.1 Pro to select the top 10 news, summarize them, and fetch social sentiments.
+    `raw_news` maps category keys to their raw search results.
+    """
+    client = get_gemini_client()
+    if client is None:
         return {}
-        
-    client = genai.Client(api_key=api_key)
     
     # We will process each category separately to maintain manageable context and schema
     reports = {}
-    
-    print("Analyzing Financial News with Gemini...")
-    finance_report = process_category(client, "全球重要財經新聞", finance_raw)
-    
-    print("Analyzing AI News with Gemini...")
-    ai_report = process_category(client, "全球重要AI相關新聞", ai_raw)
-    
-    return {
-        "global_financial_news": finance_report,
-        "global_ai_news": ai_report
-    }
+    for key, spec in CATEGORIES.items():
+        print(f"Analyzing {spec['label']} with Gemini...")
+        reports[REPORT_KEYS[key]] = process_category(client, CATEGORY_NAMES[key], raw_news.get(key, []))
+    return reports
 
-def process_category(client, category_name: str, raw_items: list) -> list:
+def _is_json(text: str) -> bool:
+    try:
+        json.loads(text)
+        return True
+    except ValueError:
+        return False
+
+def select_items(client, category_name: str, raw_items: list, count: int = 10, report_date: str = None) -> list:
+    """
+    Asks Gemini Pro to pick and translate the top `count` (10) items of a category (sentiment still "待補").
+    For a past `report_date` (a backfill) the items must be from that day instead of the last 24 hours.
+    """
+    with telemetry.span("stage.select", category=category_name, candidates=len(raw_items)) as attrs:
+        items = _select_items(client, category_name, raw_items, attrs, count, report_date)
+        attrs["selected"] = len(items)
+    return items
+
+def fallback_items(raw_items: list, count: int = 10) -> list:
+    """
+    The top `count` candidates by local rank as report items, untranslated: what a category
+    ships when its Gemini selection does not finish within the select budget.
+    """
+    return [{
+        "title": item.get("title", ""),
+        "date_time": item.get("published_date", ""),
+        "source": source_domain(item.get("url", "")),
+        "summary": item.get("content", "")[:200],
+        "social_sentiment": "待補",
+        "url": item.get("url", ""),
+    } for item in raw_items[:count]]
+
+def _selection_request(category_name: str, raw_items: list, attrs: dict, count: int = 10, report_date: str = None) -> tuple:
+    """
+    Builds the (prompt, config) of the Pro selection call.
+    """
     # First, let's ask Gemini to pick the top 10 and format the basic info (without sentiment)
-    # We pass the raw Tavily results to Gemini
-    context_str = json.dumps(raw_items, indent=2, ensure_ascii=False)
+    # We pass the raw Tavily results to Gemini, compacted to the fields and sentences it needs
+    context_str, tokens_before, tokens_after = compact_candidates(raw_items)
+    print(f"Prompt compaction for {category_name}: ~{tokens_before} -> ~{tokens_after} tokens")
+    attrs["estimated_tokens_before"] = tokens_before
+    attrs["estimated_tokens_after"] = tokens_after
+    # The same window the candidates were searched in
+    window = f" {report_date} 當日" if report_date else "過去 24 小時內"
     
     prompt = f"""
-    你是一位華爾街頂級的分析師。請從以下提供的 Tavily 搜尋結果中，挑選出最重要、最具全球市場/產業影響力的 10 則【{category_name}】。
+    你是一位華爾街頂級的分析師。請從以下提供的 Tavily 搜尋結果中，挑選出最重要、最具全球市場/產業影響力的 {count} 則【{category_name}】。
     
     篩選標準：
-    - 財經新聞：只關注宏觀經濟、大盤、重大地緣政治、重量級巨頭動態。排除農場預測、中小型股。
-    - AI 新聞：關注模型突破、算力基礎建設、重大併購、實質應用落地。排除小工具更新、農場教學文。
-    - 必須是過去 24 小時內發生的時效性事件。
+    - {CATEGORY_CRITERIA.get(category_name, "只關注具全球影響力的重大事件。排除農場文與無實質內容的消息。")}
+    - 必須是{window}發生的時效性事件。
     - 嚴格遵守提供的 JSON Schema 輸出。
     - 【極度重要】：所有欄位內容 (title, source, summary) 請務必翻譯並使用「繁體中文 (zh-TW)」輸出！
     - 對於 social_sentiment 欄位，請先一律填入「待補」。
@@ -100,37 +177,354 @@ def process_category(client, category_name: str, raw_items: list) -> list:
     {context_str}
     """
     
-    response = client.models.generate_content(
-        model='gemini-2.5-pro',
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema=CategoryReport,
-            temperature=0.2, # Low temp for factual picking
-        ),
+    config = types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=CategoryReport,
+        temperature=0.2, # Low temp for factual picking
     )
+    return prompt, config
+
+def _select_items(client, category_name: str, raw_items: list, attrs: dict, count: int = 10, report_date: str = None) -> list:
+    prompt, config = _selection_request(category_name, raw_items, attrs, count, report_date)
+    response_text = cached_generate(client, model='gemini-2.5-pro', contents=prompt, config=config, validate=_is_json)
     
     try:
-        report_data = json.loads(response.text)
-        items = report_data.get("items", [])
-        
-        # Now we enhance each item with social sentiment
+        report_data = json.loads(response_text)
+        return report_data.get("items", [])[:count]
+    except Exception as e:
+        print(f"Error parsing Gemini response: {e}")
+        return []
+
+def select_within_budget(client, category_name: str, raw_items: list, count: int = 10, report_date: str = None) -> list:
+    """
+    select_items, but if it has not answered when the select budget ends, the category
+    goes on with its top local-ranked candidates instead.
+    """
+    if deadline.expired("select"):
+        return _fallback_selection(category_name, raw_items, count)
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="select")
+    future = executor.submit(select_items, client, category_name, raw_items, count, report_date)
+    try:
+        return future.result(timeout=deadline.remaining("select"))
+    except TimeoutError:
+        return _fallback_selection(category_name, raw_items, count)
+    finally:
+        executor.shutdown(wait=False)
+
+def _fallback_selection(category_name: str, raw_items: list, count: int) -> list:
+    deadline.degrade("select", category_name, "no selection in time; using the top local-ranked stories untranslated",
+                     cause="fallback")
+    return fallback_items(raw_items, count)
+
+def select_and_enrich_streaming(client, category_name: str, raw_items: list, max_workers: int = None, item_timeout: float = None,
+                                count: int = 10, known: dict = None, report_date: str = None) -> list:
+    """
+    Streams the Pro selection answer and starts each item's social search the moment its
+    JSON object is complete, so enrichment overlaps generation instead of waiting for it.
+    Summaries then go out batched (or per item) as in enrich_items. The stream is read
+    under the select budget: when it runs out, the items that streamed in so far are kept.
+    If the stream fails, falls back to select_within_budget + enrich_items.
+    Items whose URL is in `known` (sentiments a resumed run already has) take that
+    sentiment instead of being looked up again. `report_date` is as in select_items.
+    """
+    known = known or {}
+    if SENTIMENT_BATCH:
+        lookups = _FanOut(_search_sentiment, "無法取得社群討論", max_workers, item_timeout)
+    else:
+        lookups = _FanOut(
+            lambda title: summarize_sentiment(client, title, _search_sentiment(title)),
+            "無法取得社群討論", max_workers, item_timeout
+        )
+    
+    items, looked_up = [], []
+    end = deadline.stage_end("select")
+    try:
+        with telemetry.span("stage.select", category=category_name, candidates=len(raw_items), stream=True) as attrs:
+            prompt, config = _selection_request(category_name, raw_items, attrs, count, report_date)
+            parser = ItemStreamParser()
+            start = time.perf_counter()
+            chunks = read_until(
+                cached_generate_stream(client, model='gemini-2.5-pro', contents=prompt, config=config, validate=_is_json, until=end),
+                end
+            )
+            try:
+                for chunk in chunks:
+                    for item in parser.feed(chunk)[:count - len(items)]:
+                        if not items:
+                            attrs["first_item_seconds"] = round(time.perf_counter() - start, 3)
+                        items.append(item)
+                        if item.get("url") in known:
+                            item["social_sentiment"] = known[item["url"]]
+                        else:
+                            looked_up.append(item)
+                            lookups.submit(item.get("title", ""))
+                    if len(items) >= count:
+                        break
+            except TimeoutError:
+                if not items:
+                    raise
+                # Out of time: keep the items that streamed in (the most important come first)
+                attrs["cut"] = True
+                deadline.degrade("select", category_name, f"selection cut off after {len(items)} item(s)", cause="cut")
+            finally:
+                chunks.close()
+            attrs["selected"] = len(items)
+    except Exception as e:
+        lookups.executor.shutdown(wait=False, cancel_futures=True)
+        if isinstance(e, TimeoutError):
+            print(f"Streaming selection of {category_name} produced no item within the select budget.")
+        else:
+            print(f"Streaming selection failed ({e}); retrying without streaming...")
+            telemetry.count("stream.fallbacks")
+        # With the budget used up this goes straight to the local-ranked fallback
+        items = select_within_budget(client, category_name, raw_items, count, report_date)
         for item in items:
-            title = item.get("title", "")
-            print(f"Fetching sentiment for: {title}")
-            raw_sentiment = get_social_sentiment(title)
-            
-            # Use Gemini flash (cheaper/faster) to summarize the raw sentiment
-            sentiment_summary = summarize_sentiment(client, title, raw_sentiment)
-            item["social_sentiment"] = sentiment_summary
-            
+            if item.get("url") in known:
+                item["social_sentiment"] = known[item["url"]]
+        enrich_items(client, [item for item in items if item.get("url") not in known], max_workers, item_timeout)
+        return items
+    
+    if not looked_up:
+        lookups.executor.shutdown(wait=False)
+        return items
+    with telemetry.span("stage.enrich", items=len(looked_up), batch=SENTIMENT_BATCH, stream=True):
+        results = lookups.results()
+        if SENTIMENT_BATCH:
+            titles = [item.get("title", "") for item in looked_up]
+            results = _summarize_batch(client, titles, results, max_workers, item_timeout)
+        for item, summary in zip(looked_up, results):
+            item["social_sentiment"] = summary
+    return items
+
+def process_category(client, category_name: str, raw_items: list) -> list:
+    if SELECTION_STREAMING:
+        return select_and_enrich_streaming(client, category_name, raw_items)
+    items = select_items(client, category_name, raw_items)
+    try:
+        # Now we enhance each item with social sentiment
+        enrich_items(client, items)
         return items
     except Exception as e:
-        print(f"Error parsing Gemini response or fetching sentiment: {e}")
+        print(f"Error fetching sentiment: {e}")
+        return []
+
+class _FanOut:
+    """
+    Runs fn(arg) on a bounded thread pool for args submitted one at a time (e.g. as a stream
+    delivers them), and returns the results in submission order. A call that raises or runs
+    longer than item_timeout (counted from when a worker picks it up, not when it is queued)
+    yields `fallback`, so one slow call cannot hold up the rest. When the run's enrich budget
+    runs out, every call still pending yields SENTIMENT_SKIPPED; args are submitted in rank
+    order and run first-in first-out, so those are the lowest-ranked items.
+    """
+
+    def __init__(self, fn, fallback, max_workers: int = None, item_timeout: float = None):
+        self.fn = fn
+        self.fallback = fallback
+        self.item_timeout = item_timeout or SENTIMENT_ITEM_TIMEOUT
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or SENTIMENT_CONCURRENCY, thread_name_prefix="sentiment")
+        self.args = []
+        self.futures = {}
+        self.started = {}
+
+    def _run(self, index, arg):
+        self.started[index] = time.monotonic()
+        return self.fn(arg)
+
+    def submit(self, arg):
+        index = len(self.args)
+        self.args.append(arg)
+        self.futures[self.executor.submit(self._run, index, arg)] = index
+
+    def results(self) -> list:
+        results = [self.fallback] * len(self.args)
+        pending = set(self.futures)
+        end = deadline.stage_end("enrich")
+        try:
+            while pending:
+                if end is not None and time.monotonic() >= end:
+                    for future in pending:
+                        results[self.futures[future]] = SENTIMENT_SKIPPED
+                    telemetry.count("enrich.cancelled", len(pending))
+                    print(f"Enrich budget used up; cancelled {len(pending)} sentiment lookup(s).")
+                    break
+                timeout = 0.5 if end is None else max(0.0, min(0.5, end - time.monotonic()))
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = self.futures[future]
+                    try:
+                        results[i] = future.result()
+                    except Exception as e:
+                        print(f"Error enriching {self.args[i]}: {e}")
+                        telemetry.count("enrich.errors")
+                        
+                now = time.monotonic()
+                for future in list(pending):
+                    i = self.futures[future]
+                    if i in self.started and now - self.started[i] > self.item_timeout:
+                        print(f"Sentiment lookup timed out after {self.item_timeout:.0f}s: {self.args[i]}")
+                        telemetry.count("enrich.timeouts")
+                        pending.discard(future)
+        finally:
+            # Don't block the report on timed-out calls; queued ones are dropped
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        return results
+
+def _fan_out(fn, args: list, fallback, max_workers: int = None, item_timeout: float = None) -> list:
+    """
+    _FanOut over a list that is known up front.
+    """
+    if not args:
         return []
+    fan_out = _FanOut(fn, fallback, max_workers, item_timeout)
+    for arg in args:
+        fan_out.submit(arg)
+    return fan_out.results()
+
+def _search_sentiment(title: str) -> str:
+    print(f"Fetching sentiment for: {title}")
+    return get_social_sentiment(title)
+
+def enrich_items(client, items: list, max_workers: int = None, item_timeout: float = None) -> list:
+    """
+    Fills in social_sentiment for every item, keeping the original item order.
+    The Tavily social searches fan out concurrently; the flash summaries then go out as
+    one batched request (SENTIMENT_BATCH=1), with per-item calls only for the items the
+    batch answer leaves out. Items that error or time out get "無法取得社群討論".
+    """
+    if not items:
+        return items
+    with telemetry.span("stage.enrich", items=len(items), batch=SENTIMENT_BATCH):
+        return _enrich_items(client, items, max_workers, item_timeout)
+
+def _enrich_items(client, items: list, max_workers: int, item_timeout: float) -> list:
+    titles = [item.get("title", "") for item in items]
+    
+    if not SENTIMENT_BATCH:
+        # Use Gemini flash (cheaper/faster) to summarize the raw sentiment, one call per item
+        summaries = _fan_out(
+            lambda title: summarize_sentiment(client, title, _search_sentiment(title)),
+            titles, "無法取得社群討論", max_workers, item_timeout
+        )
+    else:
+        raw_sentiments = _fan_out(_search_sentiment, titles, "無法取得社群討論", max_workers, item_timeout)
+        summaries = _summarize_batch(client, titles, raw_sentiments, max_workers, item_timeout)
+    
+    for item, summary in zip(items, summaries):
+        item["social_sentiment"] = summary
+    return items
+
+def _summarize_batch(client, titles: list, raw_sentiments: list, max_workers: int = None, item_timeout: float = None) -> list:
+    """
+    One batched flash call for all items, then per-item calls for whatever it left out.
+    """
+    summaries = _batch_within_budget(client, titles, raw_sentiments)
+    missing = [i for i, summary in enumerate(summaries) if summary is None]
+    if missing and deadline.expired("enrich"):
+        # No time for per-item calls
+        for i in missing:
+            summaries[i] = SENTIMENT_SKIPPED
+    elif missing:
+        telemetry.count("enrich.batch_fallbacks", len(missing))
+        print(f"Batch summary left out {len(missing)} item(s); summarizing them one by one...")
+        fallback = _fan_out(
+            lambda i: summarize_sentiment(client, titles[i], raw_sentiments[i]),
+            missing, "社群情緒總結失敗", max_workers, item_timeout
+        )
+        for i, summary in zip(missing, fallback):
+            summaries[i] = summary
+    return summaries
+
+def _batch_within_budget(client, titles: list, raw_sentiments: list) -> list:
+    """
+    summarize_sentiments_batch, but if it has not answered when the enrich budget ends,
+    the items it was summarizing get SENTIMENT_SKIPPED (which the pipeline records as a
+    degradation) instead of holding up the report.
+    """
+    end = deadline.stage_end("enrich")
+    if end is None:
+        return summarize_sentiments_batch(client, titles, raw_sentiments)
+    skipped = [raw if raw in SENTIMENT_PLACEHOLDERS else SENTIMENT_SKIPPED for raw in raw_sentiments]
+    cancelled = sum(raw not in SENTIMENT_PLACEHOLDERS for raw in raw_sentiments)
+    if time.monotonic() >= end:
+        telemetry.count("enrich.cancelled", cancelled)
+        return skipped
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarize")
+    future = executor.submit(summarize_sentiments_batch, client, titles, raw_sentiments, end)
+    try:
+        return future.result(timeout=max(0.0, end - time.monotonic()))
+    except TimeoutError:
+        telemetry.count("enrich.cancelled", cancelled)
+        print(f"Enrich budget used up; dropped the batched summary of {cancelled} item(s).")
+        return skipped
+    finally:
+        executor.shutdown(wait=False)
+
+def summarize_sentiments_batch(client, titles: list, raw_sentiments: list, until: float = None) -> list:
+    """
+    Summarizes the social sentiment of a whole category in one structured flash call.
+    Returns one summary per title; entries the response leaves out or gets wrong are None
+    so the caller can fall back to summarize_sentiment for just those items. No retry
+    starts after `until` (a time.monotonic()).
+    """
+    summaries = [None] * len(titles)
+    batch = []
+    for i, (title, raw_sentiment) in enumerate(zip(titles, raw_sentiments)):
+        if raw_sentiment in SENTIMENT_PLACEHOLDERS:
+            summaries[i] = raw_sentiment
+        else:
+            batch.append(i)
+    if not batch:
+        return summaries
+    
+    blocks = "\n".join(
+        f"[ID {i}] 新聞事件：「{titles[i]}」\n原始網民討論片段：\n{raw_sentiments[i]}\n"
+        for i in batch
+    )
+    prompt = f"""
+    以下是多則新聞事件，以及從 X (Twitter)、Reddit、Hacker News 爬取到的原始網民討論片段，每則以 [ID n] 標示：
+    {blocks}
+    
+    任務指令：
+    請針對每一則新聞，閱讀其社群評論，並用一句話 (繁體中文，約 30 字內) 總結社群的整體情緒反應與主要爭議點 (例如看多、看空、或某個特定擔憂)。
+    如果某則提供的評論內容完全無關、雜亂無章或沒有實質評論，該則請直接填入：「目前無顯著社群討論」即可，不要硬把新聞標題或公司名稱當作結論。
+    - 每一個 ID 都必須回傳一筆，id 欄位請填入對應的數字。
+    - 嚴格遵守提供的 JSON Schema 輸出。
+    """
+    
+    try:
+        response_text = cached_generate(
+            client,
+            model='gemini-2.5-flash',
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=SentimentBatch,
+                temperature=0.3,
+            ),
+            validate=_is_json,
+            until=until
+        )
+        answers = json.loads(response_text).get("items", [])
+    except Exception as e:
+        print(f"Error in batched sentiment summary: {e}")
+        return summaries
+    
+    wanted = set(batch)
+    for answer in answers:
+        if not isinstance(answer, dict):
+            continue
+        i = answer.get("id")
+        text = answer.get("social_sentiment")
+        # Skip malformed entries: unknown/duplicate IDs or empty text
+        if i not in wanted or not isinstance(text, str) or not text.strip():
+            continue
+        summaries[i] = text.strip()
+        wanted.discard(i)
+    return summaries
 
 def summarize_sentiment(client, title: str, raw_sentiment: str) -> str:
-    if raw_sentiment in ["目前無顯著社群討論", "無法取得社群討論", "無法獲取 API Key"]:
+    if raw_sentiment in SENTIMENT_PLACEHOLDERS:
          return raw_sentiment
          
     prompt = f"""
@@ -144,14 +538,15 @@ def summarize_sentiment(client, title: str, raw_sentiment: str) -> str:
     """
     
     try:
-        response = client.models.generate_content(
+        response_text = cached_generate(
+            client,
             model='gemini-2.5-flash', # Use flash for quick sentiment summary
             contents=prompt,
             config=types.GenerateContentConfig(
                 temperature=0.3,
             ),
         )
-        return response.text.strip()
+        return response_text.strip()
     except Exception as e:
         print(f"Error in sentiment summary: {e}")
         return "社群情緒總結失敗"
@@ -0,0 +1,399 @@
+import os
+import sys
+import glob
+import json
+import mmap
+import shutil
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from dotenv import load_dotenv
+
+import numpy as np
+
+from categories import CATEGORIES
+
+load_dotenv()
+
+# Columnar archive of every reported item: one directory of column files per month
+# (data/archive/YYYY-MM/). It is generated data and not committed; rebuild it from the
+# markdown reports (and any run checkpoints) with: python archive.py --backfill
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join("data", "archive"))
+
+# Fixed-width columns (.npy, memory-mapped on read) and text columns (UTF-8 blob + offsets)
+FIXED_COLUMNS = {
+    "report_date": "datetime64[D]",
+    "published": "datetime64[s]",
+    "category": np.uint16,
+    "source": np.uint32,
+    "sentiment": np.float32,
+}
+# date_time keeps the item's date as reported (often free text such as "2026年3月20日 14:00"),
+# which `published` only holds when it parses as a timestamp
+TEXT_COLUMNS = ("title", "date_time", "summary", "social_sentiment", "url", "search")
+
+# Words that tilt a social comment positive or negative, for a rough per-item score in
+# [-1, 1]. The comment text itself is archived too, so a better scorer can re-derive it.
+POSITIVE_TERMS = ("看好", "樂觀", "正面", "上漲", "利多", "期待", "興奮", "歡迎", "支持", "強勁", "突破",
+                  "bullish", "optimis", "positive", "rally", "upbeat", "welcome")
+NEGATIVE_TERMS = ("擔憂", "憂慮", "疑慮", "風險", "悲觀", "負面", "下跌", "利空", "恐慌", "質疑", "批評", "衰退",
+                  "bearish", "pessimis", "negative", "selloff", "concern", "fear", "risk")
+
+_SECTION_KEYS = {spec["report_key"]: key for key, spec in CATEGORIES.items()}
+
+_lock = threading.Lock()
+_months = {}
+_dictionary = None
+
+def sentiment_score(text: str) -> float:
+    text = (text or "").lower()
+    positive = sum(text.count(term) for term in POSITIVE_TERMS)
+    negative = sum(text.count(term) for term in NEGATIVE_TERMS)
+    return (positive - negative) / (positive + negative) if positive + negative else 0.0
+
+def _published(value: str):
+    """
+    The item's publish time (RFC 2822 as Tavily returns it, or ISO 8601) in UTC, else NaT.
+    """
+    value = (value or "").strip()
+    parsed = None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            pass
+    if parsed is None:
+        return np.datetime64("NaT", "s")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(parsed, "s")
+
+# --- Dictionary encoding ---
+
+def _dictionary_path() -> str:
+    return os.path.join(ARCHIVE_DIR, "dictionary.json")
+
+def _load_dictionary() -> dict:
+    """
+    Value lists for the encoded columns; a value's code is its position. Values are only
+    ever appended, so codes stay valid across every month.
+    """
+    global _dictionary
+    path = _dictionary_path()
+    version = os.stat(path).st_mtime_ns if os.path.exists(path) else None
+    if _dictionary is None or _dictionary["version"] != version or _dictionary["path"] != path:
+        values = {"source": [], "category": []}
+        if version is not None:
+            with open(path, encoding="utf-8") as f:
+                values.update(json.load(f))
+        _dictionary = {"path": path, "version": version, "values": values,
+                       "codes": {column: {v: i for i, v in enumerate(vs)} for column, vs in values.items()}}
+    return _dictionary
+
+def _encode(column: str, values: list) -> np.ndarray:
+    dictionary = _load_dictionary()
+    codes = dictionary["codes"][column]
+    for value in values:
+        if value not in codes:
+            codes[value] = len(dictionary["values"][column])
+            dictionary["values"][column].append(value)
+    return np.array([codes[value] for value in values], dtype=FIXED_COLUMNS[column])
+
+def _save_dictionary():
+    path = _dictionary_path()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(_dictionary["values"], f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+    _dictionary["version"] = os.stat(path).st_mtime_ns
+
+def _decode(column: str, code: int) -> str:
+    return _load_dictionary()["values"][column][code]
+
+def _code(column: str, value: str):
+    return _load_dictionary()["codes"][column].get(value)
+
+# --- Month files ---
+
+def month_dir(month: str) -> str:
+    return os.path.join(ARCHIVE_DIR, month)
+
+def months(since: str = None, until: str = None) -> list:
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    found = sorted(
+        name for name in os.listdir(ARCHIVE_DIR)
+        if len(name) == 7 and os.path.isfile(os.path.join(ARCHIVE_DIR, name, "report_date.npy"))
+    )
+    return [m for m in found if (not since or m >= since[:7]) and (not until or m <= until[:7])]
+
+class _Month:
+    """
+    Read-only view of one month. Columns are memory-mapped when first used, so a query
+    touches only the columns (and pages) it needs.
+    """
+
+    def __init__(self, month: str):
+        self.path = month_dir(month)
+        self.version = _version(month)
+        self._columns = {}
+        self._blobs = {}
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self._columns:
+            self._columns[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        return self._columns[name]
+
+    def blob(self, name: str):
+        if name not in self._blobs:
+            with open(os.path.join(self.path, f"{name}.utf8"), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                self._blobs[name] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        return self._blobs[name]
+
+    def text(self, name: str, row: int) -> str:
+        if not os.path.exists(os.path.join(self.path, f"{name}.utf8")):
+            # A month archived before the column was added
+            return ""
+        offsets = self.column(f"{name}.offsets")
+        return self.blob(name)[offsets[row]:offsets[row + 1]].decode("utf-8")
+
+    def rows_containing(self, needle: bytes) -> np.ndarray:
+        """
+        Rows whose `search` text contains `needle`, found by scanning the mapped blob.
+        """
+        blob, offsets = self.blob("search"), self.column("search.offsets")
+        rows = []
+        pos = blob.find(needle) if needle else -1
+        while pos != -1:
+            row = int(np.searchsorted(offsets, pos, side="right")) - 1
+            if pos + len(needle) > offsets[row + 1]:
+                # The match runs into the next row's text
+                pos = blob.find(needle, pos + 1)
+                continue
+            rows.append(row)
+            # One hit per row is enough: continue from the next row's text
+            pos = blob.find(needle, int(offsets[row + 1]))
+        return np.array(rows, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.column("report_date"))
+
+def _version(month: str):
+    stat = os.stat(os.path.join(month_dir(month), "report_date.npy"))
+    return (stat.st_ino, stat.st_mtime_ns)
+
+def _open(month: str) -> _Month:
+    # Reopen a month only when it was rewritten since it was mapped
+    current = _months.get(month)
+    if current is None or current.version != _version(month):
+        current = _months[month] = _Month(month)
+    return current
+
+def _read_month(month: str) -> dict:
+    view = _Month(month)
+    columns = {name: np.array(view.column(name)) for name in FIXED_COLUMNS}
+    for name in TEXT_COLUMNS:
+        columns[name] = [view.text(name, row) for row in range(len(view))]
+    return columns
+
+def _write_month(month: str, columns: dict):
+    """
+    Writes a month into a fresh directory and swaps it in, so readers never see half a month.
+    """
+    path = month_dir(month)
+    tmp_path, old_path = f"{path}.tmp", f"{path}.old"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name in FIXED_COLUMNS:
+        np.save(os.path.join(tmp_path, f"{name}.npy"), columns[name])
+    for name in TEXT_COLUMNS:
+        encoded = [value.encode("utf-8") for value in columns[name]]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        with open(os.path.join(tmp_path, f"{name}.utf8"), "wb") as f:
+            f.write(b"".join(encoded))
+        np.save(os.path.join(tmp_path, f"{name}.offsets.npy"), offsets)
+    if os.path.isdir(path):
+        shutil.rmtree(old_path, ignore_errors=True)
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+def _rows(report_data: dict, report_date: str) -> dict:
+    items = [
+        (_SECTION_KEYS.get(section, section), item)
+        for section, section_items in report_data.items() if isinstance(section_items, list)
+        for item in section_items if isinstance(item, dict)
+    ]
+    return {
+        "report_date": np.full(len(items), np.datetime64(report_date, "D")),
+        "published": np.array([_published(item.get("date_time", "")) for _, item in items], dtype="datetime64[s]"),
+        "category": _encode("category", [category for category, _ in items]),
+        "source": _encode("source", [item.get("source") or "" for _, item in items]),
+        "sentiment": np.array([sentiment_score(item.get("social_sentiment")) for _, item in items], dtype=np.float32),
+        "title": [item.get("title") or "" for _, item in items],
+        "date_time": [item.get("date_time") or "" for _, item in items],
+        "summary": [item.get("summary") or "" for _, item in items],
+        "social_sentiment": [item.get("social_sentiment") or "" for _, item in items],
+        "url": [item.get("url") or "" for _, item in items],
+        "search": [f"{item.get('title') or ''}\n{item.get('summary') or ''}".lower() for _, item in items],
+    }
+
+def append_report(report_data: dict, report_date: str) -> int:
+    """
+    Archives a day's report_data ({section: [items]}). The day's earlier rows are replaced,
+    so re-archiving after an intraday update never duplicates items. Returns the row count.
+    """
+    month = report_date[:7]
+    with _lock:
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        new = _rows(report_data, report_date)
+        if months(month, month):
+            old = _read_month(month)
+            keep = old["report_date"] != np.datetime64(report_date, "D")
+            merged = {}
+            for name in FIXED_COLUMNS:
+                merged[name] = np.concatenate([old[name][keep], new[name]])
+            for name in TEXT_COLUMNS:
+                merged[name] = [value for value, kept in zip(old[name], keep) if kept] + new[name]
+        else:
+            merged = new
+        # Keep each month in report-date order (a stable sort keeps each day's item order)
+        order = np.argsort(merged["report_date"], kind="stable")
+        for name in FIXED_COLUMNS:
+            merged[name] = merged[name][order]
+        for name in TEXT_COLUMNS:
+            merged[name] = [merged[name][i] for i in order]
+        _save_dictionary()
+        _write_month(month, merged)
+    print(f"Archive: {len(new['title'])} item(s) for {report_date} in {month_dir(month)}.")
+    return len(new["title"])
+
+# --- Queries ---
+
+def _selected(since: str = None, until: str = None, category: str = None, source: str = None):
+    """
+    Yields (month view, boolean row mask) for every archived month in range.
+    """
+    codes = {}
+    for column, value in (("category", category), ("source", source)):
+        if value:
+            codes[column] = _code(column, value)
+            if codes[column] is None:
+                return
+    for month in months(since, until):
+        view = _open(month)
+        dates = view.column("report_date")
+        mask = np.ones(len(dates), dtype=bool)
+        if since:
+            mask &= dates >= np.datetime64(since, "D")
+        if until:
+            mask &= dates <= np.datetime64(until, "D")
+        for column, code in codes.items():
+            mask &= view.column(column) == code
+        yield view, mask
+
+def _period(dates: np.ndarray, by: str) -> np.ndarray:
+    units = {"day": "D", "month": "M", "year": "Y"}
+    if by not in units:
+        raise ValueError(f"Unknown period {by!r}; use day, month or year")
+    return dates.astype(f"datetime64[{units[by]}]").astype(str)
+
+def _counts(column: str, since=None, until=None, category=None, source=None) -> list:
+    totals = np.zeros(len(_load_dictionary()["values"][column]), dtype=np.int64)
+    for view, mask in _selected(since, until, category, source):
+        totals += np.bincount(view.column(column)[mask], minlength=len(totals))[:len(totals)]
+    return [(_decode(column, code), int(totals[code])) for code in np.argsort(-totals, kind="stable") if totals[code]]
+
+def count_by_source(since: str = None, until: str = None, category: str = None) -> list:
+    """
+    [(source, items)] over the range, most frequent first.
+    """
+    return _counts("source", since, until, category)
+
+def count_by_category(since: str = None, until: str = None, source: str = None) -> list:
+    return _counts("category", since, until, source=source)
+
+def topic_frequency(term: str, since: str = None, until: str = None, by: str = "month", category: str = None) -> dict:
+    """
+    {period: items whose title or summary mentions `term`} (case-insensitive).
+    """
+    needle = (term or "").lower().encode("utf-8")
+    frequency = {}
+    for view, mask in _selected(since, until, category):
+        rows = view.rows_containing(needle)
+        rows = rows[mask[rows]] if len(rows) else rows
+        periods, counts = np.unique(_period(view.column("report_date")[rows], by), return_counts=True)
+        for period, count in zip(periods, counts):
+            frequency[str(period)] = frequency.get(str(period), 0) + int(count)
+    return frequency
+
+def sentiment_trend(since: str = None, until: str = None, by: str = "month", category: str = None, source: str = None) -> dict:
+    """
+    {period: {"items": n, "mean": average sentiment_score}}, in period order.
+    """
+    sums, counts = {}, {}
+    for view, mask in _selected(since, until, category, source):
+        periods = _period(view.column("report_date")[mask], by)
+        scores = np.asarray(view.column("sentiment")[mask], dtype=np.float64)
+        keys, inverse = np.unique(periods, return_inverse=True)
+        for key, total, count in zip(keys, np.bincount(inverse, weights=scores, minlength=len(keys)), np.bincount(inverse, minlength=len(keys))):
+            sums[str(key)] = sums.get(str(key), 0.0) + total
+            counts[str(key)] = counts.get(str(key), 0) + int(count)
+    return {key: {"items": counts[key], "mean": round(float(sums[key] / counts[key]), 3)} for key in sorted(counts)}
+
+def items(since: str = None, until: str = None, category: str = None, source: str = None, limit: int = None) -> list:
+    """
+    The archived items in range as dicts, oldest first. Only the selected rows are decoded.
+    """
+    found = []
+    for view, mask in _selected(since, until, category, source):
+        for row in np.flatnonzero(mask):
+            published = view.column("published")[row]
+            found.append({
+                "report_date": str(view.column("report_date")[row]),
+                "category": _decode("category", int(view.column("category")[row])),
+                "source": _decode("source", int(view.column("source")[row])),
+                "published": None if np.isnat(published) else str(published),
+                "sentiment": float(view.column("sentiment")[row]),
+                **{name: view.text(name, row) for name in TEXT_COLUMNS if name != "search"},
+            })
+            if limit and len(found) >= limit:
+                return found
+    return found
+
+def stats() -> dict:
+    all_months = months()
+    size = sum(os.path.getsize(path) for month in all_months for path in glob.glob(os.path.join(month_dir(month), "*")))
+    return {"months": len(all_months), "items": sum(len(_open(month)) for month in all_months), "bytes": size}
+
+def backfill(markdown_pattern: str = "daily_reports/*.md",
+             checkpoint_pattern: str = os.path.join(os.getenv("RUNS_DIR", "runs"), "*", "report.json")) -> int:
+    """
+    Archives reports written before the archive existed. A day with a run checkpoint is
+    taken from it (it has every field); otherwise from its markdown.
+    """
+    from storage import parse_markdown
+    reports = {}
+    for path in sorted(glob.glob(markdown_pattern)):
+        with open(path, encoding="utf-8") as f:
+            reports[os.path.splitext(os.path.basename(path))[0]] = parse_markdown(f.read())
+    for path in sorted(glob.glob(checkpoint_pattern)):
+        with open(path, encoding="utf-8") as f:
+            reports[os.path.basename(os.path.dirname(path))] = json.load(f)
+    return sum(append_report(report_data, date) for date, report_data in sorted(reports.items()))
+
+if __name__ == "__main__":
+    # python archive.py --backfill | python archive.py [since] [until]
+    if "--backfill" in sys.argv:
+        print(f"Archived {backfill()} item(s).")
+    else:
+        since, until = (sys.argv[1:] + [None, None])[:2]
+        print(stats())
+        for source, count in count_by_source(since, until)[:10]:
+            print(f"{count:>6}  {source}")
+        for period, trend in sentiment_trend(since, until).items():
+            print(f"{period}  {trend['items']:>5} items  sentiment {trend['mean']:+.2f}")
@@ -0,0 +1,137 @@
+import os
+import json
+import time
+from datetime import date as Date, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+
+import manifest
+from categories import CATEGORIES
+from checkpoint import RUNS_DIR
+
+load_dotenv()
+
+# Render processes; WeasyPrint layout is CPU-bound and single-threaded, so one per core
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "0")) or os.cpu_count() or 1
+
+def date_range(since: str, until: str) -> list:
+    start, end = Date.fromisoformat(since), Date.fromisoformat(until)
+    return [(start + timedelta(days=n)).isoformat() for n in range((end - start).days + 1)]
+
+def pdf_path(report_date: str, output_dir: str = "reports") -> str:
+    return os.path.join(output_dir, f"daily_report_{report_date}.pdf")
+
+def _from_checkpoint(report_date: str) -> dict:
+    path = os.path.join(RUNS_DIR, report_date, "report.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def _from_archive(report_date: str) -> dict:
+    import archive
+    report_keys = {key: spec["report_key"] for key, spec in CATEGORIES.items()}
+    report_data = {}
+    for row in archive.items(since=report_date, until=report_date):
+        report_data.setdefault(report_keys.get(row["category"], row["category"]), []).append({
+            "title": row["title"],
+            # The date as reported; months archived before it was kept only have the parsed time
+            "date_time": row["date_time"] or (row["published"] or "").replace("T", " "),
+            "source": row["source"],
+            "summary": row["summary"],
+            "social_sentiment": row["social_sentiment"],
+            "url": row["url"],
+        })
+    return report_data or None
+
+def _from_markdown(report_date: str) -> dict:
+    from storage import parse_markdown
+    path = os.path.join("daily_reports", f"{report_date}.md")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return parse_markdown(f.read()) or None
+
+def stored_report(report_date: str) -> tuple:
+    """
+    The saved report_data of a date and where it came from: the run checkpoint (every
+    field), else the columnar archive, else the markdown report. (None, None) if none has it.
+    """
+    for source, load in (("checkpoint", _from_checkpoint), ("archive", _from_archive), ("markdown", _from_markdown)):
+        report_data = load(report_date)
+        if report_data:
+            return report_data, source
+    return None, None
+
+def _render(task: tuple) -> tuple:
+    """
+    Renders one date in a worker process. Each worker compiles the template and loads the
+    fonts once, then reuses them for every date it gets.
+    """
+    from pdf_generator import generate_pdf_report
+    report_date, report_data, path = task
+    start = time.perf_counter()
+    result = generate_pdf_report(report_data, path, record_manifest=False, report_date=report_date)
+    return report_date, result, time.perf_counter() - start
+
+def render_all(reports: dict, output_dir: str = "reports", workers: int = None) -> dict:
+    """
+    Renders {date: report_data} to PDFs on a process pool, and records each written PDF in
+    the manifest (from this process, the manifest's only writer). Returns {date: path or None}.
+    """
+    workers = max(1, min(workers or BACKFILL_WORKERS, len(reports)))
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(report_date, report_data, pdf_path(report_date, output_dir)) for report_date, report_data in sorted(reports.items())]
+    results = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for report_date, path, seconds in executor.map(_render, tasks):
+            results[report_date] = path
+            if path:
+                manifest.record("pdf", report_date, path, reports[report_date])
+                print(f"[backfill] {report_date}: rendered in {seconds:.1f}s")
+            else:
+                print(f"[backfill] {report_date}: render failed")
+    elapsed = time.perf_counter() - start
+    done = sum(1 for path in results.values() if path)
+    print(f"[backfill] Rendered {done}/{len(tasks)} PDF(s) in {elapsed:.1f}s on {workers} process(es) "
+          f"({done / elapsed if elapsed else 0:.2f} per second)")
+    return results
+
+def backfill(since: str, until: str, fetch: bool = True, skip_existing: bool = False,
+             output_dir: str = "reports", workers: int = None) -> dict:
+    """
+    Re-renders every date in [since, until] from its stored report data. Dates with none
+    are fetched, analyzed and persisted first (one date at a time; each runs its categories
+    concurrently) unless `fetch` is False. With `skip_existing`, dates that already have a
+    PDF are left alone. Returns {date: PDF path or None}.
+    """
+    reports, missing = {}, []
+    for report_date in date_range(since, until):
+        if skip_existing and os.path.exists(pdf_path(report_date, output_dir)):
+            continue
+        report_data, source = stored_report(report_date)
+        if report_data:
+            print(f"[backfill] {report_date}: using the stored {source} data")
+            reports[report_date] = report_data
+        else:
+            missing.append(report_date)
+
+    if missing and fetch:
+        import pipeline
+        from storage import write_markdown
+        for report_date in missing:
+            print(f"[backfill] {report_date}: no stored data; running the pipeline for it")
+            report_data = pipeline.build_report(report_date)
+            if report_data:
+                write_markdown(report_data, report_date)
+                reports[report_date] = report_data
+            else:
+                print(f"[backfill] {report_date}: nothing fetched")
+    elif missing:
+        print(f"[backfill] No stored data for {', '.join(missing)}; skipped (fetching is off).")
+
+    if not reports:
+        print("[backfill] Nothing to render.")
+        return {}
+    return render_all(reports, output_dir, workers)
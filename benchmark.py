@@ -0,0 +1,170 @@
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+import platform
+import tempfile
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Offline latency benchmark of the report pipeline. Tavily and Gemini are replaced by the
+# local stand-ins in fakes.py, and every stage (fetch, select, enrich, render, persist) is
+# timed across item counts and enrichment concurrency levels. Results are JSON lines:
+#
+#   python benchmark.py --items 10 20 --concurrency 1 5 10 --output bench.jsonl
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the Finance-AI-Scout pipeline")
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 20], help="selected items per category")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 5, 10], help="enrichment workers")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per configuration")
+    parser.add_argument("--tavily-latency", type=float, default=0.8, help="seconds per Tavily search")
+    parser.add_argument("--pro-latency", type=float, default=6.0, help="seconds per Gemini Pro call")
+    parser.add_argument("--flash-latency", type=float, default=1.0, help="seconds per Gemini flash call")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplies every latency above")
+    parser.add_argument("--jitter", type=float, default=0.2, help="+/- fraction of random latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls failing with a 429")
+    parser.add_argument("--recordings", help="JSON file of recorded responses to replay (see fakes.load_recordings)")
+    parser.add_argument("--stream", action="store_true", help="stream the selection and enrich items as they arrive")
+    parser.add_argument("--rate-limits", action="store_true", help="keep the production rate limits (default: lifted)")
+    parser.add_argument("--skip-render", action="store_true", help="skip the WeasyPrint stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="append JSON lines here instead of printing them")
+    return parser.parse_args(argv)
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, round(time.perf_counter() - start, 4)
+
+def _per_category(fn, keys: list) -> dict:
+    # Categories run side by side in main.run_pipelines, so they do here too
+    with ThreadPoolExecutor(max_workers=len(keys)) as executor:
+        futures = {key: executor.submit(fn, key) for key in keys}
+        return {key: future.result() for key, future in futures.items()}
+
+def run_once(args, item_count: int, concurrency: int, workdir: str, run: int) -> dict:
+    import fakes
+    import clients
+    import scraper
+    import analyzer
+    import ranker
+    import seen_index
+    import telemetry
+    from checkpoint import RunCheckpoint
+
+    recordings = fakes.load_recordings(args.recordings) if args.recordings else None
+    scale = args.latency_scale
+    tavily = fakes.FakeTavilyClient(
+        latency=args.tavily_latency * scale, jitter=args.jitter, error_rate=args.error_rate,
+        result_count=item_count + 5, recordings=recordings, seed=args.seed + run
+    )
+    gemini = fakes.FakeGenaiClient(
+        pro_latency=args.pro_latency * scale, flash_latency=args.flash_latency * scale, jitter=args.jitter,
+        error_rate=args.error_rate, select_count=item_count, recordings=recordings, seed=args.seed + run
+    )
+    clients.set_tavily_client(tavily)
+    clients.set_gemini_client(gemini)
+
+    telemetry.start_run(f"bench-{item_count}-{concurrency}-{run}", path=os.path.join(workdir, "trace.jsonl"))
+    keys = list(scraper.CATEGORIES)
+    stages = {}
+    raw_news, stages["fetch"] = _timed(_per_category, scraper.fetch_news_for, keys)
+    # Keep at least item_count candidates so the fake selection still returns item_count items
+    top_k = max(ranker.SELECTION_TOP_K, item_count)
+    raw_news, stages["rank"] = _timed(_per_category, lambda key: ranker.rank_candidates(
+        raw_news[key], scraper.CATEGORIES[key]["query"], scraper.CATEGORIES[key]["include_domains"], top_k=top_k
+    ), keys)
+    if args.stream:
+        # Selection and enrichment overlap, so they are timed as one stage
+        selected, stages["select_enrich"] = _timed(
+            _per_category,
+            lambda key: analyzer.select_and_enrich_streaming(gemini, analyzer.CATEGORY_NAMES[key], raw_news[key], max_workers=concurrency),
+            keys
+        )
+    else:
+        selected, stages["select"] = _timed(
+            _per_category, lambda key: analyzer.select_items(gemini, analyzer.CATEGORY_NAMES[key], raw_news[key]), keys
+        )
+        _, stages["enrich"] = _timed(
+            _per_category, lambda key: analyzer.enrich_items(gemini, selected[key], max_workers=concurrency), keys
+        )
+    report_data = {analyzer.REPORT_KEYS[key]: selected[key] for key in keys}
+
+    if args.skip_render:
+        stages["render"] = None
+    else:
+        from pdf_generator import generate_pdf_report
+        pdf_path = os.path.join(workdir, f"bench_{item_count}_{concurrency}_{run}.pdf")
+        _, stages["render"] = _timed(generate_pdf_report, report_data, pdf_path)
+
+    def persist():
+        today = datetime.now().strftime("%Y-%m-%d")
+        RunCheckpoint(today).save("report", report_data)
+        for key in keys:
+            seen_index.record_reported(selected[key], raw_news[key], today, key)
+    _, stages["persist"] = _timed(persist)
+    counters = telemetry.summary()["counters"]
+    telemetry.end_run()
+
+    return {
+        "items": item_count,
+        "concurrency": concurrency,
+        "stream": args.stream,
+        "run": run,
+        "stages": stages,
+        "total": round(sum(v for v in stages.values() if v is not None), 4),
+        "selected": sum(len(items) for items in selected.values()),
+        "calls": {"tavily": tavily.calls, "gemini": gemini.calls},
+        "counters": counters,
+    }
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="scout-bench-")
+    # Keep caches, checkpoints, the seen-story index and the manifest out of the real tree, and make
+    # every run do the full amount of work. These are read at import time.
+    os.environ.update({
+        "CACHE_DIR": os.path.join(workdir, "cache"),
+        "CACHE_BYPASS": "1",
+        "RUNS_DIR": os.path.join(workdir, "runs"),
+        "SEEN_INDEX_PATH": os.path.join(workdir, "seen_index.sqlite3"),
+        "SEEN_FILTER": "0",
+        "MANIFEST_PATH": os.path.join(workdir, "manifest.jsonl"),
+    })
+    if not args.rate_limits:
+        # Otherwise the token buckets (e.g. 100 Tavily requests a minute) set the pace, and the
+        # concurrency sweep measures the limiter instead of the pipeline
+        for provider in ("TAVILY", "GEMINI_PRO", "GEMINI_FLASH"):
+            os.environ[f"RATE_LIMIT_{provider}_RPM"] = "1000000"
+            os.environ[f"RATE_LIMIT_{provider}_CONCURRENCY"] = "1000"
+
+    meta = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "latency": {
+            "tavily": args.tavily_latency, "pro": args.pro_latency, "flash": args.flash_latency,
+            "scale": args.latency_scale, "jitter": args.jitter, "error_rate": args.error_rate,
+        },
+        "rate_limits": args.rate_limits,
+    }
+    out = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for item_count in args.items:
+            for concurrency in args.concurrency:
+                for run in range(args.repeat):
+                    # Pipeline progress prints go to stderr so stdout stays machine-readable
+                    with contextlib.redirect_stdout(sys.stderr):
+                        result = run_once(args, item_count, concurrency, workdir, run)
+                    out.write(json.dumps(dict(meta, **result), ensure_ascii=False) + "\n")
+                    out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import pytz
+
+import telemetry
+import ratelimit
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+
+# Set CACHE_BYPASS=1 (or pass --no-cache to `main.py run`) to always go to the network.
+CACHE_BYPASS = os.getenv("CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+
+TAVILY_CACHE_TTL = int(os.getenv("TAVILY_CACHE_TTL", str(24 * 3600)))
+TAVILY_CACHE_MAX_MB = float(os.getenv("TAVILY_CACHE_MAX_MB", "64"))
+
+# Gemini answers are keyed on content, not date, so they can live longer
+GEMINI_CACHE_TTL = int(os.getenv("GEMINI_CACHE_TTL", str(7 * 24 * 3600)))
+GEMINI_CACHE_MAX_MB = float(os.getenv("GEMINI_CACHE_MAX_MB", "32"))
+
+class ResponseCache:
+    """
+    A small on-disk key/value store (SQLite) for API responses.
+    Entries expire after `ttl` seconds, and once the stored values exceed `max_bytes`
+    the least recently used ones are evicted. Values must be JSON-serialisable.
+    """
+
+    def __init__(self, name: str, path: str, ttl: int, max_bytes: int, bypass: bool = False):
+        self.name = name
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str):
+        if self.bypass:
+            return None
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    conn.commit()
+                self.misses += 1
+                return None
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value):
+        if self.bypass:
+            return
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, size, now, now)
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Walk from least recently used until we are back under the size limit
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connect()
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"name": self.name, "hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+tavily_cache = ResponseCache(
+    "tavily",
+    os.path.join(CACHE_DIR, "tavily.sqlite3"),
+    ttl=TAVILY_CACHE_TTL,
+    max_bytes=int(TAVILY_CACHE_MAX_MB * 1024 * 1024),
+    bypass=CACHE_BYPASS
+)
+
+gemini_cache = ResponseCache(
+    "gemini",
+    os.path.join(CACHE_DIR, "gemini.sqlite3"),
+    ttl=GEMINI_CACHE_TTL,
+    max_bytes=int(GEMINI_CACHE_MAX_MB * 1024 * 1024),
+    bypass=CACHE_BYPASS
+)
+
+def all_caches() -> list:
+    return [tavily_cache, gemini_cache]
+
+def set_bypass(bypass: bool = True):
+    for c in all_caches():
+        c.bypass = bypass
+
+def print_cache_stats():
+    for c in all_caches():
+        s = c.stats()
+        print(f"[cache] {s['name']}: {s['hits']} hits, {s['misses']} misses, {s['entries']} entries ({s['bytes'] / 1024:.0f} KB)")
+
+# Searches are cached per day; the daemon narrows that to its poll interval so each poll sees fresh results
+_search_window_minutes = None
+
+def set_search_window(minutes: int = None):
+    global _search_window_minutes
+    _search_window_minutes = minutes
+
+def today_key() -> str:
+    now = datetime.now(pytz.timezone('Asia/Taipei'))
+    if not _search_window_minutes:
+        return now.strftime('%Y-%m-%d')
+    return f"{now.strftime('%Y-%m-%d')}#{(now.hour * 60 + now.minute) // _search_window_minutes}"
+
+def cached_search(client, **params) -> dict:
+    """
+    client.search(**params) through the Tavily cache. The key covers every search
+    parameter (query, include_domains, search_depth, max_results, ...) plus today's
+    date (and poll window, see set_search_window), so a rerun on the same day never hits the network.
+    """
+    key = tavily_cache.make_key("search", today_key(), params)
+    cached = tavily_cache.get(key)
+    if cached is not None:
+        telemetry.count("cache.tavily.hit")
+        return cached
+    telemetry.count("cache.tavily.miss")
+
+    def search():
+        # The span times each request, not the rate limiter's waits and backoffs around it
+        with telemetry.span("tavily.search", depth=params.get("search_depth"), max_results=params.get("max_results")) as attrs:
+            telemetry.count("requests.tavily")
+            response = client.search(**params)
+            attrs["results"] = len(response.get("results", []))
+        return response
+
+    response = ratelimit.call("tavily", search)
+    tavily_cache.set(key, response)
+    return response
+
+def _schema_fingerprint(schema):
+    if schema is None:
+        return None
+    if hasattr(schema, "model_json_schema"):
+        return schema.model_json_schema()
+    return repr(schema)
+
+def _config_fingerprint(config):
+    if config is None:
+        return None
+    if hasattr(config, "model_dump"):
+        return config.model_dump(mode="json", exclude={"response_schema"}, exclude_none=True)
+    return repr(config)
+
+def gemini_key(model: str, contents, config) -> str:
+    """
+    Content address of a generate_content call: model, prompt, response schema and
+    the rest of the generation config. Byte-identical requests share a key.
+    """
+    schema = getattr(config, "response_schema", None)
+    return gemini_cache.make_key("generate_content", model, contents, _schema_fingerprint(schema), _config_fingerprint(config))
+
+def cached_generate(client, model: str, contents, config=None, validate=None, until: float = None) -> str:
+    """
+    client.models.generate_content(...).text, memoized on gemini_key(). Only answers
+    that pass `validate` (non-empty by default) are stored, so a malformed response
+    is retried on the next run instead of being replayed. No retry of the request
+    starts after `until` (a time.monotonic()).
+    """
+    key = gemini_key(model, contents, config)
+    cached = gemini_cache.get(key)
+    if cached is not None:
+        telemetry.count("cache.gemini.hit")
+        return cached
+    telemetry.count("cache.gemini.miss")
+
+    def generate():
+        with telemetry.span(f"gemini.{model}", model=model) as attrs:
+            telemetry.count(f"requests.{model}")
+            response = client.models.generate_content(model=model, contents=contents, config=config)
+            telemetry.record_usage(attrs, response, model)
+        return response
+
+    response = ratelimit.call_until(ratelimit.provider_for_model(model), until, generate)
+    text = response.text
+    _store_answer(key, text, validate)
+    return text
+
+def cached_generate_stream(client, model: str, contents, config=None, validate=None, until: float = None):
+    """
+    Streaming counterpart of cached_generate: yields text chunks from
+    client.models.generate_content_stream as they arrive, and stores the full answer
+    (if it passes `validate`) once the stream ends, even when the caller stops reading
+    early. A memoized answer is yielded whole.
+    No retry of the request starts after `until` (a time.monotonic()).
+    """
+    key = gemini_key(model, contents, config)
+    cached = gemini_cache.get(key)
+    if cached is not None:
+        telemetry.count("cache.gemini.hit")
+        yield cached
+        return
+    telemetry.count("cache.gemini.miss")
+
+    attempt = {}
+
+    def open_stream():
+        # The SDK sends the request lazily, so pull the first chunk here: that way the
+        # connection and time-to-first-token are covered by the rate limiter and retries.
+        # A failure after the first chunk propagates to the caller.
+        telemetry.count(f"requests.{model}")
+        attempt["start"] = time.perf_counter()
+        stream = iter(client.models.generate_content_stream(model=model, contents=contents, config=config))
+        return next(stream, None), stream
+
+    start = time.perf_counter()
+    first, stream = ratelimit.call_until(ratelimit.provider_for_model(model), until, open_stream)
+    # The span starts with the request that succeeded, leaving out limiter waits and failed attempts
+    with telemetry.span(f"gemini.{model}", model=model, stream=True, started=attempt["start"]) as attrs:
+        attrs["first_chunk_seconds"] = round(time.perf_counter() - attempt["start"], 3)
+        attrs["wait_seconds"] = round(attempt["start"] - start, 3)
+        parts = []
+        last = None
+        try:
+            for chunk in _chain(first, stream):
+                last = chunk
+                text = chunk.text or ""
+                if text:
+                    parts.append(text)
+                    yield text
+        except GeneratorExit:
+            # The caller has what it needs (or ran out of time): read the rest of the answer
+            # in the background so it is still memoized and its token usage still counted
+            threading.Thread(target=_finish_stream, args=(stream, parts, last, model, key, validate),
+                             name="stream-finish", daemon=True).start()
+            raise
+        if last is not None:
+            telemetry.record_usage(attrs, last, model)
+    _store_answer(key, "".join(parts), validate)
+
+def _finish_stream(stream, parts: list, last, model: str, key: str, validate):
+    try:
+        for chunk in stream:
+            last = chunk
+            if chunk.text:
+                parts.append(chunk.text)
+    except Exception as e:
+        print(f"Could not finish the {model} stream for the cache: {e}")
+        return
+    if last is not None:
+        telemetry.record_usage({}, last, model)
+    _store_answer(key, "".join(parts), validate)
+
+def _store_answer(key: str, text: str, validate):
+    if text and (validate is None or validate(text)):
+        gemini_cache.set(key, text)
+
+def _chain(first, rest):
+    if first is not None:
+        yield first
+    yield from rest
@@ -0,0 +1,69 @@
+import os
+import json
+from dotenv import load_dotenv
+
+from compaction import normalize_url
+import seen_index
+
+load_dotenv()
+
+# The report's topics, in section order. Each entry needs every field in REQUIRED_FIELDS;
+# set "enabled": false to keep a category in the file without running it.
+# The default is found next to this module, so importing it works from any directory.
+CATEGORIES_CONFIG = os.getenv("CATEGORIES_CONFIG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "categories.json"))
+
+REQUIRED_FIELDS = ("key", "label", "name", "report_key", "criteria", "query", "include_domains")
+
+def load_categories(path: str = None) -> dict:
+    """
+    Reads the category registry: {key: spec}, in the order of the config file.
+    """
+    path = path or CATEGORIES_CONFIG
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+
+    registry = {}
+    for entry in entries:
+        missing = [field for field in REQUIRED_FIELDS if not entry.get(field)]
+        if missing:
+            raise ValueError(f"{path}: category {entry.get('key', '?')} is missing {', '.join(missing)}")
+        if entry["key"] in registry:
+            raise ValueError(f"{path}: duplicate category key {entry['key']}")
+        if entry.get("enabled", True):
+            registry[entry["key"]] = entry
+    return registry
+
+CATEGORIES = load_categories()
+
+def dedup_across(raw_news: dict, keep: list = ()) -> dict:
+    """
+    Gives a story that several categories fetched (same URL, or a near-duplicate headline)
+    to just one of them: the category where it ranked highest, the earlier one on a tie.
+    Categories in `keep` (already checkpointed) are never trimmed.
+    """
+    order = {key: i for i, key in enumerate(raw_news)}
+    entries = []
+    for key, items in raw_news.items():
+        for item in items:
+            entries.append((key not in keep, -item.get("local_score", 0), order[key], key, item))
+    entries.sort(key=lambda entry: entry[:3])
+
+    claimed = []
+    kept = set()
+    dropped = 0
+    for _, _, _, key, item in entries:
+        url_key = normalize_url(item.get("url", ""))
+        fp = seen_index.fingerprint(item.get("title", ""), item.get("content", ""))
+        duplicate = any(
+            other != key and (other_url == url_key or seen_index.distance(other_fp, fp) <= seen_index.SIMHASH_DISTANCE)
+            for other, other_url, other_fp in claimed
+        )
+        if duplicate and key not in keep:
+            dropped += 1
+            continue
+        claimed.append((key, url_key, fp))
+        kept.add(id(item))
+
+    if dropped:
+        print(f"Dropped {dropped} story(ies) already picked up by another category.")
+    return {key: [item for item in items if id(item) in kept] for key, items in raw_news.items()}
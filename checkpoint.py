@@ -0,0 +1,53 @@
+import os
+import json
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RUNS_DIR = os.getenv("RUNS_DIR", "runs")
+
+class RunCheckpoint:
+    """
+    Stage results for one report date, kept as JSON files under runs/<date>/.
+    Every run writes its stages; only a resumed run reads them back, so a normal
+    run always starts fresh while `--resume` skips whatever already completed.
+    """
+
+    def __init__(self, date: str, resume: bool = False):
+        self.date = date
+        self.resume = resume
+        self.dir = os.path.join(RUNS_DIR, date)
+        self._lock = threading.Lock()
+
+    def _path(self, stage: str, key: str = None) -> str:
+        name = f"{stage}_{key}.json" if key else f"{stage}.json"
+        return os.path.join(self.dir, name)
+
+    def load(self, stage: str, key: str = None):
+        """
+        Returns the saved stage data when resuming, else None.
+        """
+        if not self.resume:
+            return None
+        path = self._path(stage, key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable checkpoint {path}: {e}")
+            return None
+        print(f"Resuming from checkpoint {path}")
+        return data
+
+    def save(self, stage: str, data, key: str = None):
+        path = self._path(stage, key)
+        with self._lock:
+            os.makedirs(self.dir, exist_ok=True)
+            # Write-then-rename so a crash mid-write never leaves a truncated checkpoint
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
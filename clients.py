@@ -0,0 +1,119 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from tavily import TavilyClient
+from google import genai
+from google.genai import types
+from dotenv import load_dotenv
+
+from categories import CATEGORIES
+
+load_dotenv()
+
+# Keep-alive pool size per host. Every category pipeline runs its own enrichment fan-out
+# of SENTIMENT_CONCURRENCY workers, and the categories run side by side.
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", str(len(CATEGORIES) * int(os.getenv("SENTIMENT_CONCURRENCY", "5")))))
+
+_lock = threading.Lock()
+_tavily_client = None
+_tavily_adapter = None
+_gemini_client = None
+_gemini_httpx_client = None
+_gemini_requests = 0
+
+def get_tavily_client():
+    """
+    Returns the process-wide Tavily client, or None when TAVILY_API_KEY is missing.
+    It sends its requests through a shared keep-alive session of up to HTTP_POOL_SIZE
+    connections, so repeated searches skip the TLS handshake.
+    """
+    global _tavily_client, _tavily_adapter
+    if _tavily_client is not None:
+        return _tavily_client
+    api_key = os.getenv("TAVILY_API_KEY")
+    if not api_key:
+        return None
+    with _lock:
+        if _tavily_client is None:
+            # A burst past the pool opens an extra connection rather than queueing for one
+            session = requests.Session()
+            _tavily_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, pool_block=False)
+            session.mount("https://", _tavily_adapter)
+            try:
+                _tavily_client = TavilyClient(api_key=api_key, session=session)
+            except TypeError as e:
+                # Older tavily-python releases don't accept a session; fall back to the SDK defaults
+                print(f"Pooled Tavily client unavailable ({e}); using default client.")
+                _tavily_client, _tavily_adapter = TavilyClient(api_key=api_key), None
+    return _tavily_client
+
+def _count_gemini_request(request):
+    global _gemini_requests
+    _gemini_requests += 1
+
+def get_gemini_client():
+    """
+    Returns the process-wide genai client, or None when GEMINI_API_KEY is missing.
+    Its httpx client keeps up to HTTP_POOL_SIZE connections alive.
+    """
+    global _gemini_client, _gemini_httpx_client
+    if _gemini_client is not None:
+        return _gemini_client
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        return None
+    with _lock:
+        if _gemini_client is None:
+            try:
+                import httpx
+                client_args = {
+                    "limits": httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+                    "event_hooks": {"request": [_count_gemini_request]},
+                }
+                _gemini_client = genai.Client(api_key=api_key, http_options=types.HttpOptions(client_args=client_args))
+                _gemini_httpx_client = getattr(_gemini_client._api_client, "_httpx_client", None)
+            except Exception as e:
+                # Older google-genai releases don't accept client_args; fall back to the SDK defaults
+                print(f"Pooled genai client unavailable ({e}); using default client.")
+                _gemini_client = genai.Client(api_key=api_key)
+    return _gemini_client
+
+def set_tavily_client(client):
+    """
+    Replaces the process-wide Tavily client, e.g. with a local stand-in from fakes.py.
+    """
+    global _tavily_client
+    _tavily_client = client
+
+def set_gemini_client(client):
+    """
+    Replaces the process-wide genai client, e.g. with a local stand-in from fakes.py.
+    """
+    global _gemini_client
+    _gemini_client = client
+
+def connection_stats() -> dict:
+    """
+    Requests sent vs. connections opened per provider. A requests/connections ratio
+    well above 1 means keep-alive is amortizing the handshakes.
+    """
+    stats = {}
+    if _tavily_adapter is not None:
+        pools = _tavily_adapter.poolmanager.pools
+        stats["tavily"] = {
+            "requests": sum(pools[key].num_requests for key in list(pools.keys())),
+            "connections": sum(pools[key].num_connections for key in list(pools.keys())),
+        }
+    if _gemini_client is not None:
+        # httpx does not count opened connections publicly; read the pool size when we can
+        pool = getattr(getattr(_gemini_httpx_client, "_transport", None), "_pool", None)
+        stats["gemini"] = {
+            "requests": _gemini_requests,
+            "connections": len(getattr(pool, "connections", [])) if pool is not None else None,
+        }
+    return stats
+
+def print_connection_stats():
+    for provider, s in connection_stats().items():
+        print(f"[http] {provider}: {s['requests']} requests over {s['connections']} connection(s)")
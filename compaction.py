@@ -0,0 +1,92 @@
+import os
+import re
+import json
+from urllib.parse import urlsplit, urlunsplit
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Upper bound on the (estimated) tokens of candidate data sent to the selection model
+SELECTION_TOKEN_BUDGET = int(os.getenv("SELECTION_TOKEN_BUDGET", "6000"))
+
+# Longest body excerpt kept per candidate before the budget is even considered
+COMPACT_CONTENT_CHARS = int(os.getenv("COMPACT_CONTENT_CHARS", "480"))
+
+# Only the fields the model needs to pick, translate and cite a story
+KEEP_FIELDS = ("title", "url", "published_date", "content")
+
+_CJK = re.compile(r"[　-ヿ㐀-䶿一-鿿豈-﫿＀-￯]")
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？])\s+")
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough local token count: one token per CJK character, one per ~4 other characters.
+    Good enough to compare prompt sizes without calling the model's tokenizer.
+    """
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+def key_sentences(text: str, max_chars: int) -> str:
+    """
+    Leading sentences of `text` that fit in max_chars; news bodies front-load the facts.
+    """
+    text = " ".join((text or "").split())
+    if len(text) <= max_chars:
+        return text
+    kept = ""
+    for sentence in _SENTENCE_END.split(text):
+        if len(kept) + len(sentence) + 1 > max_chars:
+            break
+        kept = f"{kept} {sentence}" if kept else sentence
+    return kept or text[:max_chars].rstrip() + "…"
+
+def source_domain(url: str) -> str:
+    netloc = urlsplit(url or "").netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form used to spot the same story under tracking params or a trailing slash.
+    """
+    parts = urlsplit(url or "")
+    return urlunsplit(("https", source_domain(url), parts.path.rstrip("/"), "", ""))
+
+def _dumps(items: list) -> str:
+    return json.dumps(items, ensure_ascii=False, separators=(",", ":"))
+
+def compact_candidates(raw_items: list, budget: int = None) -> tuple:
+    """
+    Shrinks raw Tavily results into the smallest prompt payload the selection step needs:
+    drops duplicate URLs and unused fields, cuts bodies down to their key sentences, and
+    then tightens the excerpts (and finally drops trailing candidates) until the payload
+    fits the token budget. Returns (context_str, tokens_before, tokens_after).
+    """
+    budget = budget or SELECTION_TOKEN_BUDGET
+    tokens_before = estimate_tokens(json.dumps(raw_items, indent=2, ensure_ascii=False))
+
+    seen = set()
+    candidates = []
+    for raw in raw_items:
+        key = normalize_url(raw.get("url", ""))
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        item = {field: raw[field] for field in KEEP_FIELDS if raw.get(field)}
+        item["source"] = source_domain(raw.get("url", ""))
+        item["content"] = key_sentences(raw.get("content", ""), COMPACT_CONTENT_CHARS)
+        candidates.append(item)
+
+    max_chars = COMPACT_CONTENT_CHARS
+    context_str = _dumps(candidates)
+    while estimate_tokens(context_str) > budget and max_chars > 80:
+        max_chars //= 2
+        for item in candidates:
+            item["content"] = key_sentences(item["content"], max_chars)
+        context_str = _dumps(candidates)
+
+    # Tavily returns results by relevance, so the tail is the cheapest to lose
+    while estimate_tokens(context_str) > budget and len(candidates) > 1:
+        candidates.pop()
+        context_str = _dumps(candidates)
+
+    return context_str, tokens_before, estimate_tokens(context_str)
@@ -0,0 +1,101 @@
+import os
+import time
+import threading
+from dotenv import load_dotenv
+
+import telemetry
+
+load_dotenv()
+
+# The report's SLO: seconds from the start of a run until the PDF is written (0 = no limit)
+RUN_DEADLINE_SECONDS = float(os.getenv("RUN_DEADLINE_SECONDS", "1200"))
+
+# Each stage's share of the run, in pipeline order. A stage must finish by the end of its
+# cumulative share, so time a stage leaves unused rolls over to the next one.
+STAGE_BUDGETS = dict(
+    (name, float(value))
+    for name, value in (part.split("=") for part in os.getenv(
+        "STAGE_BUDGETS", "fetch=0.2,select=0.35,enrich=0.3,render=0.15"
+    ).split(","))
+)
+
+_lock = threading.Lock()
+_run = None
+
+def start_run(seconds: float = None) -> dict:
+    """
+    Starts the clock for a run. With a limit of 0 no stage has a deadline.
+    """
+    global _run
+    seconds = RUN_DEADLINE_SECONDS if seconds is None else seconds
+    start = time.monotonic()
+    total = sum(STAGE_BUDGETS.values()) or 1
+    ends, elapsed = {}, 0.0
+    for stage, share in STAGE_BUDGETS.items():
+        elapsed += share / total
+        ends[stage] = start + seconds * elapsed
+    with _lock:
+        _run = {"start": start, "seconds": seconds, "ends": ends if seconds > 0 else {}, "degraded": []}
+    return _run
+
+def end_run() -> list:
+    """
+    Stops the clock and returns the run's degradations.
+    """
+    global _run
+    with _lock:
+        degraded, _run = (_run or {}).get("degraded", []), None
+    return degraded
+
+def stage_end(stage: str) -> float:
+    """
+    The time.monotonic() by which `stage` must finish, or None without a deadline.
+    """
+    with _lock:
+        return _run["ends"].get(stage) if _run else None
+
+def remaining(stage: str) -> float:
+    """
+    Seconds left in `stage`'s budget (never negative), or None without a deadline.
+    """
+    end = stage_end(stage)
+    return None if end is None else max(0.0, end - time.monotonic())
+
+def expired(stage: str) -> bool:
+    end = stage_end(stage)
+    return end is not None and time.monotonic() >= end
+
+def degrade(stage: str, subject: str, detail: str, cause: str = None):
+    """
+    Records that `subject` (a category, usually) shipped with less than the full work of
+    `stage`, e.g. sentiment lookups cancelled when the enrich budget ran out. `cause` tells
+    apart the ways a stage can be cut short (for select: "cut" or "fallback").
+    """
+    print(f"[deadline] {stage} / {subject}: {detail}")
+    telemetry.count(f"degraded.{stage}")
+    entry = {"stage": stage, "subject": subject, "detail": detail}
+    if cause:
+        entry["cause"] = cause
+    with _lock:
+        if _run is not None:
+            _run["degraded"].append(entry)
+
+def degradations() -> list:
+    with _lock:
+        return list(_run["degraded"]) if _run else []
+
+def is_degraded(stage: str, subject: str) -> bool:
+    return any(entry["stage"] == stage and entry["subject"] == subject for entry in degradations())
+
+def elapsed() -> float:
+    with _lock:
+        return time.monotonic() - _run["start"] if _run else 0.0
+
+def overrun() -> float:
+    """
+    Seconds the run is past its overall deadline (0 while within it, or without one).
+    """
+    with _lock:
+        if not _run or _run["seconds"] <= 0:
+            return 0.0
+        return max(0.0, time.monotonic() - _run["start"] - _run["seconds"])
@@ -0,0 +1,120 @@
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+import ratelimit
+import telemetry
+
+load_dotenv()
+
+# LINE accepts up to 500 user IDs per multicast call
+MULTICAST_LIMIT = 500
+
+# Batches in flight at once (the "line" provider in ratelimit also caps the request rate)
+DELIVERY_CONCURRENCY = int(os.getenv("DELIVERY_CONCURRENCY", "8"))
+
+# Delivery passes: each pass after the first resends only the batches that failed,
+# after DELIVERY_ROUND_DELAY seconds
+DELIVERY_ROUNDS = int(os.getenv("DELIVERY_ROUNDS", "3"))
+DELIVERY_ROUND_DELAY = float(os.getenv("DELIVERY_ROUND_DELAY", "10"))
+
+def make_batches(audiences: list, size: int = MULTICAST_LIMIT) -> list:
+    """
+    Splits [(message, [user IDs])] into multicast batches of at most `size` recipients.
+    Each batch gets its own retry key, which LINE uses to drop a resend it already accepted.
+    """
+    batches = []
+    for message, user_ids in audiences:
+        for start in range(0, len(user_ids), size):
+            batches.append({"message": message, "to": user_ids[start:start + size], "retry_key": str(uuid.uuid4())})
+    return batches
+
+def _send(client, batch: dict):
+    """
+    One multicast call under the "line" provider's limits. Returns None on success, else the
+    error. Not retried here: the delivery rounds are the only retry layer.
+    """
+    def multicast():
+        with telemetry.span("line.multicast", recipients=len(batch["to"])):
+            client.multicast(batch["to"], batch["message"], retry_key=batch["retry_key"])
+
+    try:
+        ratelimit.call_once("line", multicast)
+    except Exception as e:
+        if getattr(e, "status_code", None) == 409:
+            # A request with this retry key was already accepted: the batch went out
+            return None
+        return e
+    return None
+
+def deliver(client, audiences: list, rounds: int = None, round_delay: float = None) -> dict:
+    """
+    Sends each (message, [user IDs]) audience with multicast: batches run concurrently,
+    and each later round resends only the batches whose error is retryable. Returns
+    {"recipients", "batches", "rounds", "failed": [(batch, error)], "seconds"}.
+    """
+    rounds = rounds or DELIVERY_ROUNDS
+    round_delay = DELIVERY_ROUND_DELAY if round_delay is None else round_delay
+    batches = make_batches(audiences)
+    pending, failed, used = batches, [], 0
+    start = time.perf_counter()
+    for attempt in range(1, rounds + 1):
+        if not pending:
+            break
+        used = attempt
+        if attempt > 1:
+            print(f"Delivery round {attempt}/{rounds}: resending {len(pending)} failed batch(es) in {round_delay:.0f}s...")
+            time.sleep(round_delay)
+        with ThreadPoolExecutor(max_workers=max(1, min(DELIVERY_CONCURRENCY, len(pending))), thread_name_prefix="line") as executor:
+            errors = list(executor.map(lambda batch: _send(client, batch), pending))
+        retry = []
+        for batch, error in zip(pending, errors):
+            if error is None:
+                continue
+            if attempt < rounds and ratelimit.is_retryable(error):
+                retry.append(batch)
+            else:
+                failed.append((batch, error))
+        pending = retry
+
+    recipients = sum(len(batch["to"]) for batch in batches)
+    lost = sum(len(batch["to"]) for batch, _ in failed)
+    print(f"Delivered to {recipients - lost}/{recipients} recipient(s) in {len(batches)} batch(es), "
+          f"{used} round(s), {time.perf_counter() - start:.2f}s.")
+    for batch, error in failed:
+        print(f"[ERROR] Batch of {len(batch['to'])} not delivered: {error}")
+    return {"recipients": recipients, "batches": len(batches), "rounds": used, "failed": failed,
+            "seconds": round(time.perf_counter() - start, 4)}
+
+def benchmark_delivery(recipients: int = 5000, groups: int = 4, latency: float = 0.3, error_rate: float = 0.1):
+    """
+    Multicast batches vs. one push per recipient, against fakes.FakeLineClient.
+    """
+    import fakes
+    user_ids = [f"U{i:032x}" for i in range(recipients)]
+    audiences = [(f"message {g}", user_ids[g::groups]) for g in range(groups)]
+
+    client = fakes.FakeLineClient(latency=latency, error_rate=error_rate)
+    result = deliver(client, audiences, round_delay=0)
+    print(f"multicast: {result['seconds']:.2f}s, {client.calls} API call(s), "
+          f"{client.recipients()} of {recipients} recipients reached")
+
+    # The per-recipient pushes are estimated from a sample rather than waited out
+    client = fakes.FakeLineClient(latency=latency, error_rate=error_rate)
+    sample = min(20, recipients)
+    start = time.perf_counter()
+    for uid in user_ids[:sample]:
+        try:
+            ratelimit.call("line", client.push_message, uid, "message")
+        except Exception:
+            pass
+    per_push = (time.perf_counter() - start) / sample
+    print(f"push per recipient: ~{per_push * recipients:.0f}s for {recipients} recipients ({per_push:.2f}s each, serialized)")
+
+if __name__ == "__main__":
+    # python delivery.py [recipients] [error_rate]
+    benchmark_delivery(int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+                       error_rate=float(sys.argv[2]) if len(sys.argv) > 2 else 0.1)
@@ -0,0 +1,218 @@
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+
+# Local stand-ins for the Tavily, genai and LINE clients, for benchmarking offline.
+# Install them with clients.set_tavily_client() / clients.set_gemini_client() /
+# notifier.set_line_client().
+
+class FakeAPIError(Exception):
+    """
+    Raised for an injected failure; looks like a throttled API call (HTTP 429).
+    """
+
+    def __init__(self, message: str = "429 RESOURCE_EXHAUSTED (injected)", status_code: int = 429):
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = status_code
+
+class _Latency:
+    def __init__(self, seconds: float, jitter: float, error_rate: float, seed: int):
+        self.seconds = seconds
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self, seconds: float = None):
+        base = self.seconds if seconds is None else seconds
+        with self._lock:
+            delay = base * (1 + self._random.uniform(-self.jitter, self.jitter))
+            fail = self._random.random() < self.error_rate
+        time.sleep(max(delay, 0))
+        if fail:
+            raise FakeAPIError()
+
+def load_recordings(path: str) -> dict:
+    """
+    Recorded responses: {"tavily": {query: response}, "gemini": {prompt_key(model, prompt): text}}.
+    """
+    with open(path, encoding="utf-8") as f:
+        recordings = json.load(f)
+    recordings.setdefault("tavily", {})
+    recordings.setdefault("gemini", {})
+    return recordings
+
+def prompt_key(model: str, contents) -> str:
+    return hashlib.sha256(f"{model}\n{contents}".encode("utf-8")).hexdigest()
+
+class FakeTavilyClient:
+    """
+    Answers search() from recordings when the query was recorded, else with synthetic
+    news (or, for social-media domains, synthetic comment snippets).
+    """
+
+    def __init__(self, latency: float = 0.8, jitter: float = 0.2, error_rate: float = 0.0,
+                 result_count: int = 15, recordings: dict = None, seed: int = 0):
+        self.latency = _Latency(latency, jitter, error_rate, seed)
+        self.result_count = result_count
+        self.recordings = (recordings or {}).get("tavily", {})
+        self.calls = 0
+
+    def search(self, query: str, **params) -> dict:
+        self.calls += 1
+        self.latency.wait()
+        if query in self.recordings:
+            return self.recordings[query]
+        domains = params.get("include_domains") or ["example.com"]
+        if "reddit.com" in domains:
+            return {"query": query, "results": [
+                {"title": f"Thread {i}", "url": f"https://reddit.com/r/stocks/comments/{i}",
+                 "content": f"Comment {i}: mixed reaction, some bullish on the news, others worried about valuations.",
+                 "score": 0.5}
+                for i in range(min(params.get("max_results", 3), 3))
+            ]}
+        words = re.findall(r"[A-Za-z]{4,}", query)
+        results = []
+        for i in range(max(params.get("max_results", 0), self.result_count)):
+            domain = domains[i % len(domains)]
+            topic = " ".join(words[(i * 3) % max(len(words), 1):][:3]) or "markets"
+            results.append({
+                "title": f"{topic.title()} update {i}",
+                "url": f"https://www.{domain}/news/{hashlib.md5(f'{query}{i}'.encode()).hexdigest()[:10]}",
+                "content": f"Story {i} on {topic}. " * 12,
+                "score": round(1 - i / 100, 3),
+                "published_date": "Mon, 16 Mar 2026 12:00:00 GMT",
+            })
+        return {"query": query, "results": results}
+
+class _FakeUsage:
+    def __init__(self, prompt: str, text: str):
+        self.prompt_token_count = len(prompt) // 4
+        self.candidates_token_count = len(text) // 4
+
+class FakeResponse:
+    def __init__(self, prompt: str, text: str):
+        self.text = text
+        self.usage_metadata = _FakeUsage(prompt, text)
+
+class _FakeModels:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def generate_content(self, model: str, contents, config=None) -> FakeResponse:
+        return self.owner._generate(model, contents, config)
+
+    def generate_content_stream(self, model: str, contents, config=None):
+        return self.owner._generate_stream(model, contents, config)
+
+class FakeGenaiClient:
+    """
+    Mimics client.models.generate_content (and _stream). Replays recorded answers by (model, prompt);
+    otherwise selects `select_count` candidates for the selection prompt, answers every
+    [ID n] of a batched sentiment prompt, and returns a one-liner for single summaries.
+    Latency is per model family (pro vs. flash).
+    """
+
+    def __init__(self, pro_latency: float = 6.0, flash_latency: float = 1.0, jitter: float = 0.2,
+                 error_rate: float = 0.0, select_count: int = 10, recordings: dict = None, seed: int = 0):
+        self.pro = _Latency(pro_latency, jitter, error_rate, seed)
+        self.flash = _Latency(flash_latency, jitter, error_rate, seed + 1)
+        self.select_count = select_count
+        self.recordings = (recordings or {}).get("gemini", {})
+        self.models = _FakeModels(self)
+        self.calls = 0
+
+    def _generate(self, model: str, contents, config) -> FakeResponse:
+        self.calls += 1
+        (self.pro if "pro" in model else self.flash).wait()
+        return FakeResponse(contents, self._answer(model, contents, config))
+
+    def _generate_stream(self, model: str, contents, config, chunk_chars: int = 200):
+        # Time to first chunk is a fifth of the model latency; the rest is spread over the chunks
+        self.calls += 1
+        latency = self.pro if "pro" in model else self.flash
+        text = self._answer(model, contents, config)
+        chunks = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)] or [""]
+        latency.wait(latency.seconds * 0.2)
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(latency.seconds * 0.8 / max(len(chunks) - 1, 1))
+            yield FakeResponse(contents if i == len(chunks) - 1 else "", chunk)
+
+    def _answer(self, model: str, contents, config) -> str:
+        recorded = self.recordings.get(prompt_key(model, contents))
+        if recorded is not None:
+            return recorded
+        schema = getattr(getattr(config, "response_schema", None), "__name__", None)
+        if schema == "CategoryReport":
+            return json.dumps({"items": self._select(contents)}, ensure_ascii=False)
+        if schema == "SentimentBatch":
+            ids = [int(i) for i in re.findall(r"\[ID (\d+)\]", contents)]
+            return json.dumps({"items": [{"id": i, "social_sentiment": f"社群看法分歧 ({i})"} for i in ids]}, ensure_ascii=False)
+        return "社群看法分歧，多空並陳。"
+
+    def _select(self, prompt: str) -> list:
+        # The candidates are the JSON array at the end of the selection prompt
+        start, end = prompt.find("[", prompt.find("原始新聞資料")), prompt.rfind("]")
+        try:
+            candidates = json.loads(prompt[start:end + 1])
+        except ValueError:
+            candidates = []
+        return [{
+            "title": f"（譯）{c.get('title', '')}",
+            "date_time": c.get("published_date", ""),
+            "source": c.get("source", ""),
+            "summary": c.get("content", "")[:120],
+            "social_sentiment": "待補",
+            "url": c.get("url", ""),
+        } for c in candidates[:self.select_count]]
+
+class FakeLineClient:
+    """
+    Mimics LineBotApi's push_message, multicast and broadcast, and records what every
+    user received. Like LINE, it rejects a multicast over `multicast_limit` recipients
+    (400) and answers a retry key it already accepted with 409.
+    """
+
+    def __init__(self, latency: float = 0.3, jitter: float = 0.2, error_rate: float = 0.0,
+                 multicast_limit: int = 500, seed: int = 0):
+        self.latency = _Latency(latency, jitter, error_rate, seed)
+        self.multicast_limit = multicast_limit
+        self.received = {}
+        self.broadcasts = []
+        self.calls = 0
+        self._retry_keys = set()
+        self._lock = threading.Lock()
+
+    def _deliver(self, user_ids: list, messages, retry_key: str = None):
+        with self._lock:
+            self.calls += 1
+        self.latency.wait()
+        texts = [getattr(message, "text", message) for message in (messages if isinstance(messages, list) else [messages])]
+        with self._lock:
+            if retry_key in self._retry_keys:
+                raise FakeAPIError("409 Conflict: the retry key was already accepted", status_code=409)
+            if retry_key:
+                self._retry_keys.add(retry_key)
+            for uid in user_ids:
+                self.received.setdefault(uid, []).extend(texts)
+
+    def push_message(self, to: str, messages, retry_key: str = None, **kwargs):
+        self._deliver([to], messages, retry_key)
+
+    def multicast(self, to: list, messages, retry_key: str = None, **kwargs):
+        if len(to) > self.multicast_limit:
+            raise FakeAPIError(f"400 Bad Request: more than {self.multicast_limit} recipients", status_code=400)
+        self._deliver(to, messages, retry_key)
+
+    def broadcast(self, messages, retry_key: str = None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.broadcasts.append(messages)
+
+    def recipients(self) -> int:
+        return len(self.received)
@@ -1,45 +1,210 @@
 import os
-import pytz
-from datetime import datetime
+import sys
 import time
+import argparse
+import importlib
+from datetime import datetime
 
-from scraper import fetch_all_relevant_news
-from analyzer import analyze_and_format_news
-from pdf_generator import generate_pdf_report
-
-def job():
-    taipei_tz = pytz.timezone('Asia/Taipei')
-    now_taipei = datetime.now(taipei_tz)
-    today_date = now_taipei.strftime('%Y-%m-%d')
-    print(f"Starting job at {now_taipei.strftime('%Y-%m-%d %H:%M:%S %Z')}")
-    
-    os.makedirs("reports", exist_ok=True)
-    pdf_filename = f"daily_report_{today_date}.pdf"
-    pdf_filepath = os.path.join("reports", pdf_filename)
-    
-    # 1. Scrape News (Tavily)
-    print("Step 1/4: Fetching news...")
-    raw_news = fetch_all_relevant_news()
-    if not raw_news.get("finance") and not raw_news.get("ai"):
-        print("No news fetched. Aborting.")
-        return
-
-    # 2. Analyze & Enrich (Gemini Pro + Tavily Social Sentiment)
-    print("Step 2/4: Analyzing news and fetching sentiments...")
-    report_data = analyze_and_format_news(raw_news.get("finance", []), raw_news.get("ai", []))
-    
-    # 3. Generate PDF
-    print("Step 3/4: Generating PDF...")
-    final_pdf_path = generate_pdf_report(report_data, pdf_filepath)
-    if not final_pdf_path:
-        print("PDF generation failed. Aborting.")
-        return
-        
-    print("Job completed successfully. PDF is ready to be committed by GitHub Actions.")
+# Only the standard library is imported up front. Each subcommand imports what it needs
+# (tavily, google-genai, weasyprint, the LINE SDK) when it runs, so `status` and `notify`
+# start without paying for the whole pipeline.
 
-import sys
-if __name__ == "__main__":
-    if len(sys.argv) > 1 and sys.argv[1] == "--now":
-        job()
+def _load(module: str):
+    """
+    Imports `module` on first use and reports how long the import took.
+    """
+    if module in sys.modules:
+        return sys.modules[module]
+    start = time.perf_counter()
+    loaded = importlib.import_module(module)
+    print(f"[import] {module}: {(time.perf_counter() - start) * 1000:.0f} ms")
+    return loaded
+
+def _today() -> str:
+    pytz = _load("pytz")
+    return datetime.now(pytz.timezone('Asia/Taipei')).strftime('%Y-%m-%d')
+
+def _notify() -> int:
+    notifier = _load("notifier")
+    notifier.send_native_pdf()
+    return 0
+
+def cmd_run(args) -> int:
+    if args.no_cache:
+        _load("cache").set_bypass(True)
+    pdf_path = _load("pipeline").job(sequential=args.sequential, resume=args.resume, commit=args.commit,
+                                     deadline_seconds=args.deadline)
+    if pdf_path is None:
+        return 1
+    return _notify() if args.notify else 0
+
+def cmd_daemon(args) -> int:
+    _load("pipeline").run_daemon(args.interval, commit=args.commit)
+    return 0
+
+def cmd_render(args) -> int:
+    date = args.date or _today()
+    report_data = _load("checkpoint").RunCheckpoint(date, resume=True).load("report")
+    if report_data is None:
+        print(f"No report data for {date}; run the pipeline first.")
+        return 1
+    output = args.output or os.path.join("reports", f"daily_report_{date}.pdf")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    if _load("pdf_generator").generate_pdf_report(report_data, output, report_date=date) is None:
+        return 1
+    return _notify() if args.notify else 0
+
+def cmd_notify(args) -> int:
+    return _notify()
+
+def cmd_status(args) -> int:
+    date = args.date or _today()
+    checkpoint = _load("checkpoint")
+    run_dir = os.path.join(checkpoint.RUNS_DIR, date)
+    stages = sorted(os.path.splitext(name)[0] for name in os.listdir(run_dir) if name.endswith(".json")) if os.path.isdir(run_dir) else []
+    print(f"Date: {date}")
+    print(f"Checkpoints ({run_dir}): {', '.join(stages) or 'none'}")
+
+    report_data = checkpoint.RunCheckpoint(date, resume=True).load("report")
+    if report_data is not None:
+        sections = {key: len(items) for key, items in report_data.items() if items}
+        print(f"Report: {sum(sections.values())} items in {len(sections)} section(s) ({', '.join(f'{k}={n}' for k, n in sections.items())})")
+
+    latest = _load("manifest").latest("pdf")
+    if latest:
+        item_count = "?" if latest["item_count"] is None else latest["item_count"]
+        print(f"Latest PDF: {latest['path']} ({latest['date']}, {item_count} items, {(latest['bytes'] or 0) / 1024:.0f} KB, written {latest['written_at']})")
+        for entry in latest.get("degraded") or []:
+            print(f"  degraded {entry['stage']}: {entry['subject']} - {entry['detail']}")
+    else:
+        print("Latest PDF: none recorded (python manifest.py --backfill)")
+
+    # Status only reads: a cache or index that does not exist yet is reported, not created
+    for response_cache in _load("cache").all_caches():
+        if os.path.exists(response_cache.path):
+            s = response_cache.stats()
+            print(f"[cache] {s['name']}: {s['entries']} entries ({s['bytes'] / 1024:.0f} KB)")
+        else:
+            print(f"[cache] {response_cache.name}: none")
+    seen_index = _load("seen_index")
+    if os.path.exists(seen_index.SEEN_INDEX_PATH):
+        stats = seen_index.stats()
+        print(f"Seen index: {stats['stories']} stories, latest report date {stats['latest'] or '-'}")
     else:
-        print("Run with '--now' to execute the job.")
+        print("Seen index: none")
+    return 0
+
+def cmd_search(args) -> int:
+    search_index = _load("search_index")
+    start = time.perf_counter()
+    hits = search_index.search(" ".join(args.query), limit=args.limit, since=args.since, until=args.until, section=args.section)
+    search_index.print_hits(hits)
+    print(f"{len(hits)} hit(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return 0
+
+def cmd_backfill(args) -> int:
+    results = _load("backfill").backfill(args.since, args.until or args.since, fetch=not args.no_fetch,
+                                          skip_existing=args.skip_existing, output_dir=args.output_dir, workers=args.workers)
+    return 0 if results and all(results.values()) else 1
+
+def cmd_archive(args) -> int:
+    archive = _load("archive")
+    start = time.perf_counter()
+    if args.query == "sources":
+        for source, count in archive.count_by_source(args.since, args.until, args.category)[:args.limit]:
+            print(f"{count:>6}  {source}")
+    elif args.query == "categories":
+        for category, count in archive.count_by_category(args.since, args.until):
+            print(f"{count:>6}  {category}")
+    elif args.query == "topic":
+        if not args.term:
+            print("archive topic needs a term.")
+            return 1
+        for period, count in archive.topic_frequency(" ".join(args.term), args.since, args.until, args.by, args.category).items():
+            print(f"{period}  {count:>5}")
+    elif args.query == "sentiment":
+        for period, trend in archive.sentiment_trend(args.since, args.until, args.by, args.category).items():
+            print(f"{period}  {trend['items']:>5} items  sentiment {trend['mean']:+.2f}")
+    else:
+        stats = archive.stats()
+        print(f"Archive ({archive.ARCHIVE_DIR}): {stats['items']} items in {stats['months']} month(s), {stats['bytes'] / 1024:.0f} KB")
+    print(f"[archive {args.query}] {(time.perf_counter() - start) * 1000:.1f} ms")
+    return 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py", description="Finance & AI Scout daily report.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Fetch, analyze and render today's report.")
+    run.add_argument("--sequential", action="store_true", help="Run categories one after another.")
+    run.add_argument("--no-cache", action="store_true", help="Bypass the response cache.")
+    run.add_argument("--resume", action="store_true", help="Continue today's interrupted run from its checkpoints.")
+    run.add_argument("--deadline", type=float, default=None,
+                     help="Seconds the report must be ready in (RUN_DEADLINE_SECONDS; 0 = no limit).")
+    run.add_argument("--commit", action="store_true", help="Commit this run's report files and push them.")
+    run.add_argument("--notify", action="store_true", help="Send the LINE notification when the PDF is ready (and pushed).")
+    run.set_defaults(func=cmd_run)
+
+    daemon = sub.add_parser("daemon", help="Stay resident and keep today's report updated.")
+    daemon.add_argument("--interval", type=int, default=None, help="Minutes between polls (DAEMON_INTERVAL_MINUTES).")
+    daemon.add_argument("--commit", action="store_true", help="Commit and push every updated report.")
+    daemon.set_defaults(func=cmd_daemon)
+
+    render = sub.add_parser("render", help="Re-render a PDF from a day's saved report data.")
+    render.add_argument("--date", help="Report date, YYYY-MM-DD (default: today).")
+    render.add_argument("--output", help="PDF path (default: reports/daily_report_<date>.pdf).")
+    render.add_argument("--notify", action="store_true", help="Send the LINE notification afterwards.")
+    render.set_defaults(func=cmd_render)
+
+    backfill = sub.add_parser("backfill", help="Re-render (and fetch, where missing) the reports of a date range.")
+    backfill.add_argument("--since", required=True, help="First report date, YYYY-MM-DD.")
+    backfill.add_argument("--until", help="Last report date, YYYY-MM-DD (default: --since).")
+    backfill.add_argument("--workers", type=int, default=None, help="Render processes (BACKFILL_WORKERS, default: one per core).")
+    backfill.add_argument("--no-fetch", action="store_true", help="Only re-render dates that have stored data.")
+    backfill.add_argument("--skip-existing", action="store_true", help="Leave dates that already have a PDF alone.")
+    backfill.add_argument("--output-dir", default="reports")
+    backfill.set_defaults(func=cmd_backfill)
+
+    notify = sub.add_parser("notify", help="Send the LINE notification for the latest report.")
+    notify.set_defaults(func=cmd_notify)
+
+    status = sub.add_parser("status", help="Show checkpoints, the latest PDF, cache and seen-index state.")
+    status.add_argument("--date", help="Report date, YYYY-MM-DD (default: today).")
+    status.set_defaults(func=cmd_status)
+
+    search = sub.add_parser("search", help="Full-text search over every reported item.")
+    search.add_argument("query", nargs="+", help="Words to look for (zh-TW or English).")
+    search.add_argument("--limit", type=int, default=10)
+    search.add_argument("--since", help="Earliest report date, YYYY-MM-DD.")
+    search.add_argument("--until", help="Latest report date, YYYY-MM-DD.")
+    search.add_argument("--section", help="Report section key, e.g. global_financial_news.")
+    search.set_defaults(func=cmd_search)
+
+    archive = sub.add_parser("archive", help="Query the columnar archive of reported items.")
+    archive.add_argument("query", choices=["stats", "sources", "categories", "topic", "sentiment"])
+    archive.add_argument("term", nargs="*", help="For topic: the words to count.")
+    archive.add_argument("--since", help="Earliest report date, YYYY-MM-DD.")
+    archive.add_argument("--until", help="Latest report date, YYYY-MM-DD.")
+    archive.add_argument("--category", help="Category key, e.g. finance.")
+    archive.add_argument("--by", choices=["day", "month", "year"], default="month", help="Period for topic and sentiment.")
+    archive.add_argument("--limit", type=int, default=20)
+    archive.set_defaults(func=cmd_archive)
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # The old flag-style invocations still work: --now [...] and --daemon [minutes]
+    if argv[:1] == ["--now"]:
+        argv = ["run"] + argv[1:]
+    elif argv[:1] == ["--daemon"]:
+        argv = ["daemon"] + (["--interval"] + argv[1:2] if argv[1:2] else [])
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    start = time.perf_counter()
+    args = parse_args(argv)
+    try:
+        return args.func(args)
+    finally:
+        print(f"[{args.command}] done in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    sys.exit(main())
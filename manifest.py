@@ -0,0 +1,189 @@
+import os
+import re
+import sys
+import json
+import glob
+import hashlib
+import threading
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import pytz
+
+# Append-only log of every report written: one JSON object per line. It is generated (by
+# each run, or `python manifest.py --backfill`) and kept out of git.
+MANIFEST_PATH = os.getenv("MANIFEST_PATH", os.path.join("reports", "manifest.jsonl"))
+
+_DATE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+_lock = threading.Lock()
+
+# Entry fields that tell whether a report file changed since it was last recorded
+_SAME_REPORT = ("path", "file_hash", "content_hash", "item_count", "degraded")
+
+class _Index:
+    """
+    In-memory view of the manifest. A process parses the log once, on its first lookup;
+    after that lookups are dict reads, and refresh() only parses the lines appended since.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self.entries = []
+        self.by_date = {}
+        self.latest = {}
+
+    def refresh(self):
+        if not os.path.exists(self.path):
+            return
+        if os.path.getsize(self.path) < self.offset:
+            # The file was replaced (e.g. by a checkout): start over
+            self.__init__(self.path)
+        with open(self.path, encoding="utf-8") as f:
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                self.offset += len(line.encode("utf-8"))
+                try:
+                    self._add(json.loads(line))
+                except ValueError:
+                    print(f"Skipping malformed manifest line in {self.path}")
+
+    def _add(self, entry: dict):
+        self.entries.append(entry)
+        kind = entry.get("kind")
+        # The last entry written for a (date, kind) is the current one
+        self.by_date.setdefault(entry["date"], {})[kind] = entry
+        current = self.latest.get(kind)
+        if current is None or entry["date"] >= current["date"]:
+            self.latest[kind] = entry
+
+_index = None
+
+def _get_index() -> _Index:
+    global _index
+    if _index is None or _index.path != MANIFEST_PATH:
+        _index = _Index(MANIFEST_PATH)
+    _index.refresh()
+    return _index
+
+def content_hash(data) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def date_from_path(path: str, default: str = None) -> str:
+    match = _DATE.search(os.path.basename(path))
+    return match.group(1) if match else default
+
+def _item_meta(section: str, item: dict) -> dict:
+    return {
+        "section": section,
+        "title": item.get("title") or item.get("tc_title", ""),
+        "source": item.get("source", ""),
+        "date_time": item.get("date_time") or item.get("publishedAt", ""),
+        "url": item.get("url", ""),
+        "hash": content_hash(item),
+    }
+
+def record(kind: str, date: str, path: str, report_data: dict = None, degradations: list = None) -> dict:
+    """
+    Appends one entry for a written report file, unless the current entry for its date
+    and kind already describes the same file and content (a rerun): that one is returned. `kind` is "pdf" or "markdown";
+    `report_data` maps section keys to their item lists (None when unknown: the entry then
+    has no item_count); `degradations` lists what the run deadline cut (see deadline.degrade).
+    """
+    known = report_data is not None
+    report_data = report_data or {}
+    items = [_item_meta(section, item) for section, section_items in report_data.items() for item in section_items]
+    entry = {
+        "kind": kind,
+        "date": date,
+        "path": path,
+        "bytes": os.path.getsize(path) if os.path.exists(path) else None,
+        "file_hash": file_hash(path) if os.path.exists(path) else None,
+        "content_hash": content_hash(report_data) if report_data else None,
+        "item_count": len(items) if known else None,
+        "sections": {section: len(section_items) for section, section_items in report_data.items()},
+        "items": items,
+        "degraded": degradations or [],
+        "written_at": datetime.now(pytz.timezone('Asia/Taipei')).isoformat(timespec="seconds"),
+    }
+    with _lock:
+        current = _get_index().by_date.get(date, {}).get(kind)
+        if current is not None and all(current.get(field) == entry[field] for field in _SAME_REPORT):
+            return current
+        os.makedirs(os.path.dirname(MANIFEST_PATH) or ".", exist_ok=True)
+        with open(MANIFEST_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return entry
+
+def latest(kind: str = "pdf") -> dict:
+    """
+    The newest report of `kind` by report date (not file time), or None.
+    """
+    with _lock:
+        return _get_index().latest.get(kind)
+
+def for_date(date: str, kind: str = "pdf") -> dict:
+    with _lock:
+        return _get_index().by_date.get(date, {}).get(kind)
+
+def history(kind: str = None, limit: int = None) -> list:
+    """
+    The current entry of every report date, newest first.
+    """
+    with _lock:
+        index = _get_index()
+        entries = [
+            entry for date in sorted(index.by_date, reverse=True)
+            for k, entry in sorted(index.by_date[date].items())
+            if kind is None or k == kind
+        ]
+    return entries[:limit] if limit else entries
+
+def backfill(pdf_pattern: str = "reports/*.pdf", markdown_pattern: str = "daily_reports/*.md") -> int:
+    """
+    Adds entries for report files written before the manifest existed (dated by file name).
+    Markdown reports are read back for their items. A PDF is recorded with an unknown
+    item_count: nothing ties it to the same run as that date's markdown. Files already in
+    the manifest are skipped.
+    """
+    # storage records through this module, so it is only needed here
+    from storage import parse_markdown
+
+    with _lock:
+        known = {entry["path"] for entry in _get_index().entries}
+    markdown = {}
+    for path in sorted(glob.glob(markdown_pattern)):
+        date = date_from_path(path)
+        if date:
+            with open(path, encoding="utf-8") as f:
+                markdown[date] = (path, parse_markdown(f.read()))
+    count = 0
+    for path in sorted(glob.glob(pdf_pattern)):
+        date = date_from_path(path)
+        if date and path not in known:
+            record("pdf", date, path)
+            count += 1
+    for date, (path, report_data) in markdown.items():
+        if path not in known:
+            record("markdown", date, path, report_data)
+            count += 1
+    return count
+
+if __name__ == "__main__":
+    if "--backfill" in sys.argv:
+        print(f"Recorded {backfill()} existing report(s) in {MANIFEST_PATH}.")
+    else:
+        for entry in history(limit=int(sys.argv[1]) if len(sys.argv) > 1 else 10):
+            item_count = "?" if entry["item_count"] is None else entry["item_count"]
+            print(f"{entry['date']}  {entry['kind']:<8}  {item_count:>3} items  {entry['path']}")
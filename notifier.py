@@ -9,29 +9,76 @@ from dotenv import load_dotenv
 from datetime import datetime
 import pytz
 
+import telemetry
+import manifest
+import delivery
+import subscribers
+from categories import CATEGORIES
+
 load_dotenv()
 
 LINE_ACCESS_TOKEN = os.getenv("LINE_CHANNEL_ACCESS_TOKEN")
 
+_line_client = None
+
+def set_line_client(client):
+    """
+    Replaces the LINE client, e.g. with fakes.FakeLineClient.
+    """
+    global _line_client
+    _line_client = client
+
+def get_line_client():
+    global _line_client
+    if _line_client is None:
+        _line_client = LineBotApi(LINE_ACCESS_TOKEN)
+    return _line_client
+
+def _highlights(keys: tuple, sections: dict) -> str:
+    # "全球財經 10 則、AI 8 則" for the categories this audience follows
+    counts = [(CATEGORIES[key]["label"], sections.get(CATEGORIES[key]["report_key"], 0)) for key in keys]
+    return "、".join(f"{label} {count} 則" for label, count in counts if count)
+
+def deliver_to_subscribers(client, groups: list, message_text: str, sections: dict = None) -> dict:
+    """
+    Multicasts the report message to the subscriber groups. Users who follow the same
+    categories share one message, which lists those categories' item counts.
+    """
+    audiences = []
+    for keys, user_ids in subscribers.audiences(groups, sections):
+        highlights = _highlights(keys, sections or {})
+        text = f"{message_text}\n\n本期重點：{highlights}" if highlights else message_text
+        audiences.append((TextSendMessage(text=text), user_ids))
+    if not audiences:
+        print("No subscriber follows a category in this report.")
+        return None
+    return delivery.deliver(client, audiences)
+
 def send_native_pdf():
     """
-    Sends a TextMessage containing the GitHub Raw URL to the new PDF report.
+    Sends a TextMessage containing the GitHub Raw URL to the new PDF report: multicast
+    to the subscriber groups when subscribers.json exists, else to LINE_USER_ID or a broadcast.
+    The message notes it when the run's deadline degraded the report.
     (Note: LINE Messaging API does NOT support FileSendMessage from Bot to User)
     """
-    if not LINE_ACCESS_TOKEN:
+    if not LINE_ACCESS_TOKEN and _line_client is None:
         print("Error: LINE_CHANNEL_ACCESS_TOKEN not found.")
         return
 
-    # Find the latest PDF in 'reports' directory
-    list_of_files = glob.glob('reports/*.pdf')
-    if not list_of_files:
-        print("No PDF files found in reports/")
-        return
-        
-    latest_file = max(list_of_files, key=os.path.getctime)
+    # The latest PDF by report date, from the manifest
+    entry = manifest.latest("pdf")
+    if entry is not None:
+        latest_file = entry["path"]
+    else:
+        # Reports from before the manifest: the file names carry the date (ctime does not survive a checkout)
+        list_of_files = sorted(glob.glob('reports/*.pdf'), key=lambda path: manifest.date_from_path(path, ""))
+        if not list_of_files:
+            print("No PDF files found in reports/")
+            return
+        latest_file = list_of_files[-1]
     filename = os.path.basename(latest_file)
     
-    line_bot_api = LineBotApi(LINE_ACCESS_TOKEN)
+    line_bot_api = get_line_client()
     taipei_tz = pytz.timezone('Asia/Taipei')
     today_str = datetime.now(taipei_tz).strftime('%Y-%m-%d')
     
@@ -44,13 +91,26 @@ def send_native_pdf():
 
     message_text = f"📊 Finance & AI Scout 每日深度快報 ({today_str})\n\n你的全球財經與 AI 動態報告來囉！\n\n🔒 由於您的專案是私密設定，請點擊下方連結，並確保在瀏覽器中 **【登入 GitHub】** 即可安全檢視：\n\n👉 {repo_url}"
 
+    # A report the run deadline cut short says so at its top; let readers know before they open it
+    degraded = (entry or {}).get("degraded") or []
+    if degraded:
+        message_text += f"\n\n⚠️ 本期有 {len(degraded)} 項內容因時間不足而精簡，詳見報告開頭說明。"
+
+    groups = subscribers.load_subscribers()
+    if groups:
+        # The manifest entry knows how many items each section has
+        deliver_to_subscribers(line_bot_api, groups, message_text, (entry or {}).get("sections") or None)
+        return
+
     try:
         user_id = os.getenv("LINE_USER_ID")
         if user_id:
-            line_bot_api.push_message(user_id, TextSendMessage(text=message_text))
+            with telemetry.span("line.push_message"):
+                line_bot_api.push_message(user_id, TextSendMessage(text=message_text))
             print(f"Sent LINE message to user {user_id}")
         else:
-            line_bot_api.broadcast(TextSendMessage(text=message_text))
+            with telemetry.span("line.broadcast"):
+                line_bot_api.broadcast(TextSendMessage(text=message_text))
             print("Broadcasted LINE message to all users.")
             
     except LineBotApiError as e:
@@ -1,7 +1,113 @@
 import os
-from jinja2 import Template
-from weasyprint import HTML, CSS
+import sys
+import json
+import time
+import threading
+from jinja2 import Environment
 from datetime import datetime
+from dotenv import load_dotenv
+
+import telemetry
+import manifest
+from categories import CATEGORIES
+
+load_dotenv()
+
+# Set PDF_DEBUG_HTML=1 to also dump the rendered HTML to temp_report.html
+PDF_DEBUG_HTML = os.getenv("PDF_DEBUG_HTML", "").lower() in ("1", "true", "yes")
+
+# Parsed once per process and shared by every render, together with the compiled template
+STYLESHEET = """
+    @page {
+        size: A4 portrait;
+        margin: 2cm 1.5cm;
+    }
+    body {
+        /* One CJK family for every glyph: it covers Latin too */
+        font-family: 'Noto Sans CJK TC', 'Microsoft JhengHei', sans-serif;
+        color: #1a1a1a;
+        line-height: 1.6;
+        background-color: #fcfcfc;
+        margin: 0;
+        padding: 0;
+    }
+    .header {
+        border-bottom: 4px solid #b30000;
+        padding-bottom: 20px;
+        margin-bottom: 30px;
+    }
+    .header h1 {
+        font-size: 32px;
+        font-weight: bold;
+        margin: 0 0 10px 0;
+        letter-spacing: -0.5px;
+    }
+    .header .date {
+        font-size: 14px;
+        color: #666;
+        text-transform: uppercase;
+        letter-spacing: 1px;
+    }
+    .section-title {
+        font-size: 24px;
+        color: #1a1a1a;
+        font-weight: bold;
+        text-transform: uppercase;
+        border-top: 1px solid #ccc;
+        padding-top: 20px;
+        margin-top: 40px;
+        margin-bottom: 20px;
+    }
+    .article {
+        margin-bottom: 35px;
+        page-break-inside: avoid;
+    }
+    .article-title {
+        font-size: 20px;
+        font-weight: bold;
+        color: #004488;
+        margin: 0 0 8px 0;
+        line-height: 1.3;
+        text-decoration: none;
+    }
+    .article-meta {
+        font-size: 13px;
+        color: #777;
+        margin-bottom: 12px;
+        font-weight: bold;
+    }
+    .article-summary {
+        font-size: 16px;
+        color: #333;
+        margin-bottom: 15px;
+        text-align: justify;
+    }
+    .social-sentiment {
+        background-color: #f1f5f9;
+        border-left: 4px solid #3b82f6;
+        padding: 12px 15px;
+        font-size: 14px;
+        color: #1e293b;
+        font-style: italic;
+        border-radius: 0 4px 4px 0;
+    }
+    .notice {
+        background-color: #fff7ed;
+        border-left: 4px solid #f59e0b;
+        padding: 10px 15px;
+        font-size: 13px;
+        color: #7c2d12;
+        margin-bottom: 30px;
+    }
+    .footer {
+        margin-top: 50px;
+        text-align: center;
+        font-size: 11px;
+        color: #999;
+        border-top: 1px solid #eee;
+        padding-top: 20px;
+    }
+"""
 
 # A clean, mobile-first, single-column design inspired by The Economist / WSJ apps
 HTML_TEMPLATE = """
@@ -10,88 +116,6 @@ HTML_TEMPLATE = """
 <head>
     <meta charset="UTF-8">
     <title>Finance & AI Scout - Daily Report</title>
-    <style>
-        @page {
-            size: A4 portrait;
-            margin: 2cm 1.5cm;
-        }
-        body {
-            font-family: 'Helvetica Neue', Helvetica, Arial, 'Microsoft JhengHei', sans-serif;
-            color: #1a1a1a;
-            line-height: 1.6;
-            background-color: #fcfcfc;
-            margin: 0;
-            padding: 0;
-        }
-        .header {
-            border-bottom: 4px solid #b30000;
-            padding-bottom: 20px;
-            margin-bottom: 30px;
-        }
-        .header h1 {
-            font-size: 32px;
-            font-weight: 800;
-            margin: 0 0 10px 0;
-            letter-spacing: -0.5px;
-        }
-        .header .date {
-            font-size: 14px;
-            color: #666;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }
-        .section-title {
-            font-size: 24px;
-            color: #1a1a1a;
-            font-weight: bold;
-            text-transform: uppercase;
-            border-top: 1px solid #ccc;
-            padding-top: 20px;
-            margin-top: 40px;
-            margin-bottom: 20px;
-        }
-        .article {
-            margin-bottom: 35px;
-            page-break-inside: avoid;
-        }
-        .article-title {
-            font-size: 20px;
-            font-weight: bold;
-            color: #004488;
-            margin: 0 0 8px 0;
-            line-height: 1.3;
-            text-decoration: none;
-        }
-        .article-meta {
-            font-size: 13px;
-            color: #777;
-            margin-bottom: 12px;
-            font-weight: bold;
-        }
-        .article-summary {
-            font-size: 16px;
-            color: #333;
-            margin-bottom: 15px;
-            text-align: justify;
-        }
-        .social-sentiment {
-            background-color: #f1f5f9;
-            border-left: 4px solid #3b82f6;
-            padding: 12px 15px;
-            font-size: 14px;
-            color: #1e293b;
-            font-style: italic;
-            border-radius: 0 4px 4px 0;
-        }
-        .footer {
-            margin-top: 50px;
-            text-align: center;
-            font-size: 11px;
-            color: #999;
-            border-top: 1px solid #eee;
-            padding-top: 20px;
-        }
-    </style>
 </head>
 <body>
 
@@ -100,22 +124,16 @@ HTML_TEMPLATE = """
         <div class="date">{{ date_str }} | INSIDER BRIEFING</div>
     </div>
 
-    <div class="section-title">Global Financial News</div>
-    {% for item in financial_news %}
-    <div class="article">
-        <a class="article-title" href="{{ item.url }}" target="_blank">{{ item.title }}</a>
-        <div class="article-meta">{{ item.source }} | {{ item.date_time }} | <a href="{{ item.url }}" target="_blank" style="color: #0066cc;">閱讀原文 &rarr;</a></div>
-        <div class="article-summary">{{ item.summary }}</div>
-        {% if item.social_sentiment and item.social_sentiment not in ['目前無顯著社群討論', '待補'] %}
-        <div class="social-sentiment">
-            <strong>社群風向：</strong>{{ item.social_sentiment }}
-        </div>
-        {% endif %}
+    {% if notices %}
+    <div class="notice">
+        <strong>本期報告因時間限制而精簡：</strong>
+        {% for notice in notices %}<div>・{{ notice }}</div>{% endfor %}
     </div>
-    {% endfor %}
+    {% endif %}
 
-    <div class="section-title">Global AI News</div>
-    {% for item in ai_news %}
+    {% for section in sections %}
+    <div class="section-title">{{ section.title }}</div>
+    {% for item in section["items"] %}
     <div class="article">
         <a class="article-title" href="{{ item.url }}" target="_blank">{{ item.title }}</a>
         <div class="article-meta">{{ item.source }} | {{ item.date_time }} | <a href="{{ item.url }}" target="_blank" style="color: #0066cc;">閱讀原文 &rarr;</a></div>
@@ -127,6 +145,7 @@ HTML_TEMPLATE = """
         {% endif %}
     </div>
     {% endfor %}
+    {% endfor %}
 
     <div class="footer">
         Generated by Antigravity AI Agent with Gemini 3.1 Pro & Tavily Search.
@@ -136,34 +155,136 @@ HTML_TEMPLATE = """
 </html>
 """
 
-def generate_pdf_report(report_data: dict, output_filepath: str = "daily_report.pdf"):
+# What the reader is told for each stage the run deadline cut short, by stage and (where a
+# stage can be cut short in more than one way) cause
+DEGRADATION_NOTICES = {
+    "fetch": "新聞搜尋逾時，本類別從缺",
+    "select": "AI 精選未及完成，本類別內容不完整",
+    "select/cut": "AI 精選逾時，本類別僅收錄已完成精選的新聞，則數少於平日",
+    "select/fallback": "AI 精選未及完成，本類別為依本地排序挑選的原文新聞（未經翻譯與摘要）",
+    "enrich": "部分排序較後的新聞未查詢社群討論",
+}
+
+def _notice(entry: dict) -> str:
+    key = f"{entry['stage']}/{entry['cause']}" if entry.get("cause") else entry["stage"]
+    return DEGRADATION_NOTICES.get(key, entry["detail"])
+
+_lock = threading.Lock()
+_template = None
+_font_config = None
+_stylesheet = None
+
+def _renderer():
+    """
+    Returns (template, stylesheet, font_config), compiling/parsing them on first use only.
+    WeasyPrint (and the Pango libraries under it) is loaded here too, so importing this
+    module, e.g. with the pipeline, costs nothing until a PDF is actually rendered.
+    """
+    global _template, _font_config, _stylesheet
+    from weasyprint import CSS
+    from weasyprint.text.fonts import FontConfiguration
+    with _lock:
+        if _template is None:
+            _template = Environment().from_string(HTML_TEMPLATE)
+            _font_config = FontConfiguration()
+            _stylesheet = CSS(string=STYLESHEET, font_config=_font_config)
+    return _template, _stylesheet, _font_config
+
+def _write_pdf(html_content: str, output_filepath: str, stylesheet, font_config):
+    from weasyprint import HTML
+    HTML(string=html_content).write_pdf(output_filepath, stylesheets=[stylesheet], font_config=font_config)
+
+def generate_pdf_report(report_data: dict, output_filepath: str = "daily_report.pdf", record_manifest: bool = True,
+                        degradations: list = None, report_date: str = None):
     """
     Takes the structured report dictionary, fills the Jinja2 HTML template, 
     and converts it to a mobile-friendly PDF using WeasyPrint.
+    The header shows `report_date` (YYYY-MM-DD; default: the date in the file name, else today),
+    and `degradations` (from deadline.degradations()) are listed at the top of the report.
+    The written PDF is recorded in the report manifest unless record_manifest is False.
     """
+    report_date = report_date or manifest.date_from_path(output_filepath, datetime.now().strftime("%Y-%m-%d"))
     print("Generating Mobile-friendly PDF report...")
+    template, stylesheet, font_config = _renderer()
     
-    # 1. Render HTML
-    template = Template(HTML_TEMPLATE)
+    # 1. Render HTML: one section per configured category that has items, then any other
+    # sections the data has (older reports: a single "daily" list, or retired categories)
+    sections = [
+        {"title": spec["label"], "items": report_data.get(spec["report_key"], [])}
+        for spec in CATEGORIES.values()
+        if report_data.get(spec["report_key"])
+    ]
+    configured = {spec["report_key"] for spec in CATEGORIES.values()}
+    sections += [
+        {"title": key.replace("_", " ").title(), "items": items}
+        for key, items in report_data.items()
+        if key not in configured and isinstance(items, list) and items
+    ]
+    notices = list(dict.fromkeys(
+        f"{entry['subject']}：{_notice(entry)}" for entry in degradations or []
+    ))
     html_content = template.render(
-        date_str=datetime.now().strftime("%B %d, %Y"),
-        financial_news=report_data.get("global_financial_news", []),
-        ai_news=report_data.get("global_ai_news", [])
+        date_str=datetime.strptime(report_date, "%Y-%m-%d").strftime("%B %d, %Y"),
+        sections=sections,
+        notices=notices
     )
     
-    # 2. Save temporary HTML (optional but good for debugging)
-    with open("temp_report.html", "w", encoding="utf-8") as f:
-        f.write(html_content)
+    # 2. Save temporary HTML (only when debugging)
+    if PDF_DEBUG_HTML:
+        with open("temp_report.html", "w", encoding="utf-8") as f:
+            f.write(html_content)
         
     # 3. Generate PDF
     try:
-        HTML(string=html_content).write_pdf(output_filepath)
+        with telemetry.span("stage.render", path=output_filepath) as attrs:
+            _write_pdf(html_content, output_filepath, stylesheet, font_config)
+            attrs["bytes"] = os.path.getsize(output_filepath)
         print(f"PDF successfully saved to {output_filepath}")
+        if record_manifest:
+            manifest.record("pdf", report_date, output_filepath, report_data, degradations)
         return output_filepath
     except Exception as e:
         print(f"Failed to generate PDF: {e}")
         return None
 
+def _sample_report(item_count: int) -> dict:
+    item = {
+        "title": "聯準會維持利率不變，鮑爾暗示年內仍有降息空間",
+        "date_time": "2026-03-20 14:00 ET",
+        "source": "Reuters",
+        "summary": "美國聯準會宣布維持聯邦基金利率於 4.25% 至 4.50% 區間，並表示通膨雖有降溫跡象，但仍高於 2% 目標。"
+                   "主席鮑爾在記者會上指出，若就業市場持續放緩，年內仍可能降息兩次。",
+        "social_sentiment": "社群普遍解讀為偏鴿，但也擔憂關稅推升通膨使降息時程延後。",
+        "url": "https://www.reuters.com/markets/us/fed-holds-rates-2026-03-20/",
+    }
+    # Spread the items over the configured sections
+    keys = [spec["report_key"] for spec in CATEGORIES.values()]
+    return {key: [dict(item) for _ in range(item_count // len(keys) + (i < item_count % len(keys)))]
+            for i, key in enumerate(keys)}
+
+def benchmark_render(item_count: int = 20, runs: int = 3, output_filepath: str = "bench_report.pdf") -> dict:
+    """
+    Times the first (cold: compile + parse) and subsequent (warm) renders of a sample
+    report, and records the resulting PDF size.
+    """
+    report_data = _sample_report(item_count)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        generate_pdf_report(report_data, output_filepath, record_manifest=False)
+        timings.append(time.perf_counter() - start)
+    result = {
+        "items": item_count,
+        "cold_seconds": round(timings[0], 3),
+        "warm_seconds": round(min(timings[1:]), 3) if len(timings) > 1 else None,
+        "pdf_bytes": os.path.getsize(output_filepath) if os.path.exists(output_filepath) else None,
+    }
+    if os.path.exists(output_filepath):
+        os.remove(output_filepath)
+    return result
+
 if __name__ == "__main__":
-    # Test stub
-    pass
+    # python pdf_generator.py --bench [item_count] [runs]
+    if len(sys.argv) > 1 and sys.argv[1] == "--bench":
+        args = [int(a) for a in sys.argv[2:4]]
+        print(json.dumps(benchmark_render(*args)))
@@ -0,0 +1,138 @@
+import os
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import numpy as np
+from dotenv import load_dotenv
+
+from compaction import source_domain
+
+load_dotenv()
+
+# How many locally ranked candidates per category are sent on to the Pro model
+SELECTION_TOP_K = int(os.getenv("SELECTION_TOP_K", "15"))
+
+# Relative weight of each signal in the local score, e.g. "source=0.3,recency=0.2,relevance=0.3,tavily=0.2"
+RANK_WEIGHTS = dict(
+    (name, float(value))
+    for name, value in (part.split("=") for part in os.getenv(
+        "RANK_WEIGHTS", "source=0.3,recency=0.2,relevance=0.3,tavily=0.2"
+    ).split(","))
+)
+
+# Stories lose half their recency score every RECENCY_HALF_LIFE_HOURS
+RECENCY_HALF_LIFE_HOURS = float(os.getenv("RECENCY_HALF_LIFE_HOURS", "12"))
+
+_TOKEN = re.compile(r"[a-z0-9]{2,}")
+_STOPWORDS = {
+    "the", "and", "or", "of", "to", "in", "on", "for", "with", "as", "at", "by", "is", "are",
+    "was", "its", "it", "an", "be", "from", "that", "this", "like", "latest", "major", "news",
+}
+
+def _tokens(text: str) -> list:
+    return [t for t in _TOKEN.findall((text or "").lower()) if t not in _STOPWORDS]
+
+def source_scores(raw_items: list, preferred_domains: list) -> np.ndarray:
+    """
+    1.0 for the first preferred domain, tapering slightly down the list; 0.3 for others.
+    """
+    ranks = {domain: i for i, domain in enumerate(preferred_domains)}
+    scores = []
+    for item in raw_items:
+        domain = source_domain(item.get("url", ""))
+        rank = next((r for d, r in ranks.items() if domain == d or domain.endswith("." + d)), None)
+        scores.append(0.3 if rank is None else 1.0 - 0.05 * rank)
+    return np.array(scores, dtype=float)
+
+def _published(item: dict):
+    value = item.get("published_date")
+    if not value:
+        return None
+    try:
+        published = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            published = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return published if published.tzinfo else published.replace(tzinfo=timezone.utc)
+
+def recency_scores(raw_items: list, now: datetime = None) -> np.ndarray:
+    """
+    Exponential decay on story age; undated stories get a neutral 0.5.
+    """
+    now = now or datetime.now(timezone.utc)
+    ages = np.array([
+        (now - published).total_seconds() / 3600 if published else np.nan
+        for published in map(_published, raw_items)
+    ], dtype=float)
+    scores = np.power(0.5, np.clip(ages, 0, None) / RECENCY_HALF_LIFE_HOURS)
+    return np.where(np.isnan(ages), 0.5, scores)
+
+def relevance_scores(raw_items: list, query: str) -> np.ndarray:
+    """
+    TF-IDF cosine similarity between each candidate (title weighted double + body) and the query.
+    """
+    docs = [_tokens(f"{item.get('title', '')} {item.get('title', '')} {item.get('content', '')}") for item in raw_items]
+    query_tokens = _tokens(query)
+    vocab = {token: i for i, token in enumerate(sorted(set(query_tokens).union(*docs)))}
+    if not vocab:
+        return np.zeros(len(raw_items))
+
+    counts = np.zeros((len(docs), len(vocab)))
+    for row, tokens in enumerate(docs):
+        np.add.at(counts[row], [vocab[t] for t in tokens], 1)
+    query_counts = np.zeros(len(vocab))
+    np.add.at(query_counts, [vocab[t] for t in query_tokens], 1)
+
+    df = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(docs)) / (1 + df)) + 1
+    doc_vectors = np.log1p(counts) * idf
+    query_vector = np.log1p(query_counts) * idf
+
+    norms = np.linalg.norm(doc_vectors, axis=1) * (np.linalg.norm(query_vector) or 1)
+    return np.divide(doc_vectors @ query_vector, norms, out=np.zeros(len(docs)), where=norms > 0)
+
+def tavily_scores(raw_items: list) -> np.ndarray:
+    scores = np.array([float(item.get("score") or 0) for item in raw_items])
+    spread = scores.max() - scores.min() if len(scores) else 0
+    return (scores - scores.min()) / spread if spread > 0 else np.full(len(scores), 0.5)
+
+def score_candidates(raw_items: list, query: str, preferred_domains: list) -> np.ndarray:
+    """
+    Weighted sum of the four signals, each in [0, 1].
+    """
+    features = np.column_stack([
+        source_scores(raw_items, preferred_domains),
+        recency_scores(raw_items),
+        relevance_scores(raw_items, query),
+        tavily_scores(raw_items),
+    ])
+    weights = np.array([RANK_WEIGHTS.get(name, 0.0) for name in ("source", "recency", "relevance", "tavily")])
+    return features @ weights / (weights.sum() or 1)
+
+def sort_candidates(raw_items: list, query: str, preferred_domains: list) -> list:
+    """
+    Orders candidates by local score, best first. Each item gets its `local_score`.
+    """
+    if not raw_items:
+        return raw_items
+    scores = score_candidates(raw_items, query, preferred_domains)
+    order = np.argsort(-scores, kind="stable")
+    return [dict(raw_items[i], local_score=round(float(scores[i]), 4)) for i in order]
+
+def keep_top(ranked: list, top_k: int = None) -> list:
+    """
+    The top_k (SELECTION_TOP_K) of an already sorted candidate list, for the Pro model.
+    """
+    top_k = top_k or SELECTION_TOP_K
+    kept = ranked[:top_k]
+    if len(ranked) > len(kept):
+        print(f"Local ranking kept {len(kept)} of {len(ranked)} candidates (cutoff score {kept[-1]['local_score']:.2f}).")
+    return kept
+
+def rank_candidates(raw_items: list, query: str, preferred_domains: list, top_k: int = None) -> list:
+    """
+    Orders candidates by local score and keeps the top_k (SELECTION_TOP_K) for the Pro model.
+    """
+    return keep_top(sort_candidates(raw_items, query, preferred_domains), top_k)
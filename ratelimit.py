@@ -0,0 +1,208 @@
+import os
+import time
+import random
+import threading
+from dotenv import load_dotenv
+
+import telemetry
+
+load_dotenv()
+
+# Per-provider quotas: (requests per minute, max concurrent requests). Override with e.g.
+# RATE_LIMIT_TAVILY_RPM=1000 or RATE_LIMIT_GEMINI_PRO_CONCURRENCY=16. Pro concurrency
+# should cover one selection per category, or the parallel categories run in waves.
+PROVIDER_DEFAULTS = {
+    "tavily": (100, 10),
+    "gemini-pro": (150, 8),
+    "gemini-flash": (1000, 16),
+    "line": (6000, 8),
+}
+
+MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "4"))
+BACKOFF_BASE = float(os.getenv("RETRY_BACKOFF_BASE", "1.0"))
+BACKOFF_MAX = float(os.getenv("RETRY_BACKOFF_MAX", "20"))
+
+# Retries allowed per provider: a fixed floor plus a fraction of all requests made,
+# so a provider that is down cannot turn every call into MAX_ATTEMPTS calls.
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+RETRY_BUDGET_MIN = int(os.getenv("RETRY_BUDGET_MIN", "5"))
+
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+_THROTTLE_MARKERS = ("429", "RESOURCE_EXHAUSTED", "Too Many Requests", "rate limit")
+_TRANSIENT_MARKERS = ("UNAVAILABLE", "DEADLINE_EXCEEDED", "timed out", "Timeout", "Connection", "503", "502", "500")
+
+def _status(error) -> int:
+    for candidate in (error, getattr(error, "response", None)):
+        for attr in ("status_code", "code", "status"):
+            value = getattr(candidate, attr, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+def is_throttle(error) -> bool:
+    status = _status(error)
+    if status is not None:
+        return status == 429
+    return any(marker in str(error) for marker in _THROTTLE_MARKERS)
+
+def is_retryable(error) -> bool:
+    status = _status(error)
+    if status is not None:
+        return status in _RETRYABLE_STATUS
+    text = f"{type(error).__name__} {error}"
+    return is_throttle(error) or any(marker in text for marker in _TRANSIENT_MARKERS)
+
+class TokenBucket:
+    """
+    Smooths request starts to `rate` per second, allowing bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit: starts at the full quota, halves on a throttle (at most once
+    per second, so a burst of 429s counts as one signal) and grows back by ~1 per window
+    of successful calls.
+    """
+
+    def __init__(self, max_limit: int, initial: float = None, min_limit: int = 1):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(initial or max(min_limit, max_limit))
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, throttled: bool = False):
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                if now - self._last_decrease > 1.0:
+                    self.limit = max(self.min_limit, self.limit / 2)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+class Provider:
+    """
+    Everything shared by the calls to one external API: rate, adaptive concurrency and
+    the retry budget.
+    """
+
+    def __init__(self, name: str, rpm: float, max_concurrency: int):
+        self.name = name
+        # Quotas are per minute, so allow a burst of ~10 seconds' worth of requests
+        self.bucket = TokenBucket(rpm / 60.0, max(1, max_concurrency, rpm / 6.0))
+        self.limiter = AdaptiveLimiter(max_concurrency)
+        self.requests = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def _take_retry(self) -> bool:
+        with self._lock:
+            if self.retries >= RETRY_BUDGET_MIN + RETRY_BUDGET_RATIO * self.requests:
+                return False
+            self.retries += 1
+            return True
+
+    def call(self, fn, *args, **kwargs):
+        """
+        fn(*args, **kwargs) under this provider's limits. Retryable failures (429, 5xx,
+        timeouts) are retried with full-jitter exponential backoff while attempts and the
+        retry budget last; anything else is raised straight away.
+        """
+        return self.call_until(None, fn, *args, **kwargs)
+
+    def call_once(self, fn, *args, **kwargs):
+        """
+        fn(*args, **kwargs) under this provider's limits, without retries: for callers that
+        have their own retry layer. A throttle still lowers the concurrency limit.
+        """
+        # Time spent queueing for a token or a slot is its own span, apart from the call
+        with telemetry.span(f"ratelimit.wait.{self.name}"):
+            self.bucket.acquire()
+            self.limiter.acquire()
+        with self._lock:
+            self.requests += 1
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            throttled = is_throttle(e)
+            self.limiter.release(throttled=throttled)
+            if throttled:
+                telemetry.count(f"throttled.{self.name}")
+            raise
+        self.limiter.release()
+        return result
+
+    def call_until(self, end: float, fn, *args, **kwargs):
+        """
+        call(), but a retry that would start after `end` (a time.monotonic(); None for no
+        limit) is not made: the last error is raised instead.
+        """
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                return self.call_once(fn, *args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt == MAX_ATTEMPTS:
+                    raise
+                if not self._take_retry():
+                    telemetry.count(f"retry_budget_exhausted.{self.name}")
+                    raise
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)))
+                if end is not None and time.monotonic() + delay >= end:
+                    telemetry.count(f"retry_deadline.{self.name}")
+                    raise
+                telemetry.count(f"retry.{self.name}")
+                print(f"[{self.name}] {type(e).__name__}: {e}; retry {attempt}/{MAX_ATTEMPTS - 1} in {delay:.1f}s")
+                with telemetry.span(f"ratelimit.backoff.{self.name}", attempt=attempt):
+                    time.sleep(delay)
+
+def _provider(name: str) -> Provider:
+    rpm, concurrency = PROVIDER_DEFAULTS[name]
+    env = name.upper().replace("-", "_")
+    return Provider(
+        name,
+        rpm=float(os.getenv(f"RATE_LIMIT_{env}_RPM", rpm)),
+        max_concurrency=int(os.getenv(f"RATE_LIMIT_{env}_CONCURRENCY", concurrency))
+    )
+
+PROVIDERS = {name: _provider(name) for name in PROVIDER_DEFAULTS}
+
+def provider_for_model(model: str) -> str:
+    return "gemini-pro" if "pro" in model else "gemini-flash"
+
+def call(provider: str, fn, *args, **kwargs):
+    return PROVIDERS[provider].call(fn, *args, **kwargs)
+
+def call_once(provider: str, fn, *args, **kwargs):
+    return PROVIDERS[provider].call_once(fn, *args, **kwargs)
+
+def call_until(provider: str, end: float, fn, *args, **kwargs):
+    return PROVIDERS[provider].call_until(end, fn, *args, **kwargs)
@@ -1,42 +1,44 @@
 import os
-from tavily import TavilyClient
+from datetime import date as Date, timedelta
 from dotenv import load_dotenv
+from cache import cached_search
+from clients import get_tavily_client
+import telemetry
+from categories import CATEGORIES
 
 load_dotenv()
 
-# We define the whitelisted sources for priority search
-FINANCE_SOURCES = [
-    "bloomberg.com", "reuters.com", "wsj.com", 
-    "ft.com", "cnbc.com", "barrons.com"
-]
+# Candidates per category; ranker.py narrows them down locally before the Pro model sees them.
+# Tavily caps max_results at 20.
+TAVILY_MAX_RESULTS = int(os.getenv("TAVILY_MAX_RESULTS", "20"))
 
-AI_SOURCES = [
-    "theverge.com", "techcrunch.com", "wired.com", "theinformation.com", 
-    "technologyreview.com", "openai.com", "blog.google", "anthropic.com"
-]
-
-def fetch_category_news(category: str, query: str, include_domains: list) -> list:
+def fetch_category_news(category: str, query: str, include_domains: list, report_date: str = None) -> list:
     """
     Fetch news from Tavily with a strict 24-hour time range and advanced depth.
+    With `report_date` (a backfill), the range is that date and the day before it instead.
     """
-    api_key = os.getenv("TAVILY_API_KEY")
-    if not api_key:
+    client = get_tavily_client()
+    if client is None:
         print("TAVILY_API_KEY not found in environment!")
         return []
-        
-    client = TavilyClient(api_key=api_key)
     
-    print(f"Fetching {category} news using Tavily...")
+    print(f"Fetching {category} news using Tavily{f' for {report_date}' if report_date else ''}...")
+    if report_date:
+        day = Date.fromisoformat(report_date)
+        time_range = {"start_date": (day - timedelta(days=1)).isoformat(), "end_date": day.isoformat()}
+    else:
+        time_range = {"days": 1} # Also possible based on SDK version
     try:
         # Time range 'd' strictly searches for the last 24 hours (if the API supports "day" or "d")
         # According to Tavily docs, time_range="day", "week", "month", "year", "d"
-        response = client.search(
+        response = cached_search(
+            client,
             query=query,
             search_depth="advanced",
             topic="news",
-            days=1, # Also possible based on SDK version
             include_domains=include_domains,
-            max_results=15  # Fetch slightly more, so AI can filter down to the top 10
+            max_results=TAVILY_MAX_RESULTS,  # Fetch wide; the local ranker keeps the best for the AI to filter down to 10
+            **time_range
         )
         
         results = response.get('results', [])
@@ -46,29 +48,26 @@ def fetch_category_news(category: str, query: str, include_domains: list) -> lis
         print(f"Error fetching {category}: {e}")
         return []
 
+def fetch_news_for(key: str, report_date: str = None) -> list:
+    """
+    Fetch the raw search results for one entry of CATEGORIES (for a past `report_date`, that day's).
+    """
+    spec = CATEGORIES[key]
+    with telemetry.span("stage.fetch", category=key) as attrs:
+        results = fetch_category_news(
+            category=spec["label"],
+            query=spec["query"],
+            include_domains=spec["include_domains"],
+            report_date=report_date
+        )
+        attrs["items"] = len(results)
+    return results
+
 def fetch_all_relevant_news():
     """
-    Fetch both financial and AI news, returning a dictionary of the raw search results.
+    Fetch every configured category, returning a dictionary of the raw search results.
     """
-    # Use a highly descriptive prompt for the search engine to understand our needs.
-    finance_query = "latest major global macroeconomic news, central bank policies like fed rates, major stock market index movements S&P 500, geopolitical global impact, or top tier non-AI corporate earnings and shifts."
-    finance_news = fetch_category_news(
-        category="Global Financial News",
-        query=finance_query,
-        include_domains=FINANCE_SOURCES
-    )
-    
-    ai_query = "latest breakthrough AI models releases, AI infrastructure NVIDIA AMD, major AI startup investments, tech giants AI mergers, high impact AI applications or major AI regulation news."
-    ai_news = fetch_category_news(
-        category="Global AI News",
-        query=ai_query,
-        include_domains=AI_SOURCES
-    )
-    
-    return {
-        "finance": finance_news,
-        "ai": ai_news
-    }
+    return {key: fetch_news_for(key) for key in CATEGORIES}
 
 if __name__ == "__main__":
     news = fetch_all_relevant_news()
@@ -0,0 +1,194 @@
+import os
+import re
+import sys
+import glob
+import json
+import math
+import sqlite3
+import hashlib
+import threading
+from dotenv import load_dotenv
+
+from compaction import normalize_url
+
+load_dotenv()
+
+# Full-text index of every reported item, committed with data/ like the seen-story index
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", os.path.join("data", "search_index.sqlite3"))
+
+# BM25 parameters, and how much more a title term counts than a body term
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 2
+
+# Latin words, or runs of CJK characters (split into bigrams below)
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9&.+-]*[a-z0-9]|[a-z0-9]|[㐀-鿿豈-﫿]+")
+_CJK = re.compile(r"[㐀-鿿豈-﫿]")
+
+_lock = threading.Lock()
+_conn = None
+
+def tokenize(text: str) -> list:
+    """
+    Lowercased Latin words, and overlapping character bigrams for CJK runs (a lone CJK
+    character stays a unigram). zh-TW has no word boundaries, and bigrams match most
+    words without a dictionary.
+    """
+    tokens = []
+    for token in _TOKEN.findall((text or "").lower()):
+        if _CJK.match(token):
+            tokens.extend([token] if len(token) == 1 else [token[i:i + 2] for i in range(len(token) - 1)])
+        else:
+            tokens.append(token)
+    return tokens
+
+def _connect():
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(SEARCH_INDEX_PATH) or ".", exist_ok=True)
+        _conn = sqlite3.connect(SEARCH_INDEX_PATH, timeout=30, check_same_thread=False)
+        _conn.executescript(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            "id INTEGER PRIMARY KEY, doc_key TEXT UNIQUE NOT NULL, report_date TEXT NOT NULL, section TEXT, "
+            "title TEXT, url TEXT, source TEXT, summary TEXT, sentiment TEXT, length INTEGER NOT NULL, hash TEXT);"
+            "CREATE INDEX IF NOT EXISTS docs_date ON docs (report_date);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "term TEXT NOT NULL, doc_id INTEGER NOT NULL, tf INTEGER NOT NULL, PRIMARY KEY (term, doc_id)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);"
+        )
+    return _conn
+
+def _terms(item: dict) -> dict:
+    counts = {}
+    for token in tokenize(item.get("title", "")):
+        counts[token] = counts.get(token, 0) + TITLE_WEIGHT
+    body = " ".join(item.get(field) or "" for field in ("summary", "source", "social_sentiment"))
+    for token in tokenize(body):
+        counts[token] = counts.get(token, 0) + 1
+    return counts
+
+def _doc_key(item: dict, report_date: str) -> str:
+    return f"{report_date}|{normalize_url(item.get('url', '')) or item.get('title', '')}"
+
+def index_item(conn, item: dict, report_date: str, section: str = None) -> bool:
+    """
+    Adds or updates one report item. Returns False when it is already indexed unchanged.
+    """
+    key = _doc_key(item, report_date)
+    digest = hashlib.sha256(json.dumps(item, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    row = conn.execute("SELECT id, hash FROM docs WHERE doc_key = ?", (key,)).fetchone()
+    if row and row[1] == digest:
+        return False
+    if row:
+        conn.execute("DELETE FROM postings WHERE doc_id = ?", (row[0],))
+        conn.execute("DELETE FROM docs WHERE id = ?", (row[0],))
+
+    terms = _terms(item)
+    doc_id = conn.execute(
+        "INSERT INTO docs (doc_key, report_date, section, title, url, source, summary, sentiment, length, hash) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (key, report_date, section, item.get("title", ""), item.get("url", ""), item.get("source", ""),
+         item.get("summary", ""), item.get("social_sentiment", ""), sum(terms.values()), digest)
+    ).lastrowid
+    conn.executemany("INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)", [(t, doc_id, tf) for t, tf in terms.items()])
+    return True
+
+def index_report(report_data: dict, report_date: str) -> int:
+    """
+    Indexes a day's report_data ({section: [items]}), which replaces whatever was indexed
+    for that date: items no longer in the report are deleted. Only new, changed or dropped
+    items are written, so re-indexing a day after an intraday update is cheap. Returns how
+    many were.
+    """
+    entries = [
+        (section, item)
+        for section, items in report_data.items() if isinstance(items, list)
+        for item in items if isinstance(item, dict)
+    ]
+    keys = {_doc_key(item, report_date) for _, item in entries}
+    with _lock:
+        conn = _connect()
+        with conn:
+            stale = [doc_id for doc_id, key in conn.execute("SELECT id, doc_key FROM docs WHERE report_date = ?", (report_date,))
+                     if key not in keys]
+            conn.executemany("DELETE FROM postings WHERE doc_id = ?", [(doc_id,) for doc_id in stale])
+            conn.executemany("DELETE FROM docs WHERE id = ?", [(doc_id,) for doc_id in stale])
+            changed = len(stale) + sum(index_item(conn, item, report_date, section) for section, item in entries)
+    if changed:
+        print(f"Search index: {changed} item(s) indexed for {report_date}.")
+    return changed
+
+def search(query: str, limit: int = 10, since: str = None, until: str = None, section: str = None) -> list:
+    """
+    BM25-ranked report items matching any term of `query`, best first. Each hit has its
+    report date, section, title, source, URL, summary and score.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+    filters, params = [], []
+    for clause, value in (("d.report_date >= ?", since), ("d.report_date <= ?", until), ("d.section = ?", section)):
+        if value:
+            filters.append(clause)
+            params.append(value)
+    where = "".join(f" AND {clause}" for clause in filters)
+
+    with _lock:
+        conn = _connect()
+        doc_count, avg_length = conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+        if not doc_count:
+            return []
+        scores = {}
+        for term in terms:
+            df = conn.execute("SELECT COUNT(*) FROM postings WHERE term = ?", (term,)).fetchone()[0]
+            if not df:
+                continue
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            rows = conn.execute(
+                f"SELECT p.doc_id, p.tf, d.length FROM postings p JOIN docs d ON d.id = p.doc_id WHERE p.term = ?{where}",
+                (term, *params)
+            ).fetchall()
+            for doc_id, tf, length in rows:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        best = sorted(scores.items(), key=lambda pair: -pair[1])[:limit]
+        hits = []
+        for doc_id, score in best:
+            date, sec, title, url, source, summary = conn.execute(
+                "SELECT report_date, section, title, url, source, summary FROM docs WHERE id = ?", (doc_id,)
+            ).fetchone()
+            hits.append({"date": date, "section": sec, "title": title, "url": url, "source": source,
+                         "summary": summary, "score": round(score, 3)})
+    return hits
+
+def backfill_from_markdown(pattern: str = "daily_reports/*.md") -> int:
+    """
+    Indexes the existing markdown reports (their items carry title, source, summary,
+    social comment and URL).
+    """
+    from storage import parse_markdown
+    count = 0
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding="utf-8") as f:
+            count += index_report(parse_markdown(f.read()), os.path.splitext(os.path.basename(path))[0])
+    return count
+
+def backfill_from_checkpoints(pattern: str = os.path.join(os.getenv("RUNS_DIR", "runs"), "*", "report.json")) -> int:
+    count = 0
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding="utf-8") as f:
+            count += index_report(json.load(f), os.path.basename(os.path.dirname(path)))
+    return count
+
+def print_hits(hits: list):
+    for hit in hits:
+        print(f"{hit['score']:>7.2f}  {hit['date']}  {hit['title']}")
+        print(f"         {hit['source']} | {hit['url']}")
+
+if __name__ == "__main__":
+    # python search_index.py --backfill | python search_index.py <query> [limit]
+    if "--backfill" in sys.argv:
+        print(f"Indexed {backfill_from_markdown() + backfill_from_checkpoints()} item(s).")
+    elif len(sys.argv) > 1:
+        print_hits(search(sys.argv[1], limit=int(sys.argv[2]) if len(sys.argv) > 2 else 10))
@@ -0,0 +1,170 @@
+import os
+import re
+import sys
+import glob
+import sqlite3
+import hashlib
+import threading
+from dotenv import load_dotenv
+
+from compaction import normalize_url
+
+load_dotenv()
+
+# Committed alongside the reports so every run sees the full history
+SEEN_INDEX_PATH = os.getenv("SEEN_INDEX_PATH", os.path.join("data", "seen_index.sqlite3"))
+
+# Set SEEN_FILTER=0 to let previously reported stories through again
+SEEN_FILTER = os.getenv("SEEN_FILTER", "1").lower() in ("1", "true", "yes")
+
+# Two 64-bit SimHashes within this many differing bits count as the same story
+# (headlines are short, so one reworded word already flips a few bits).
+# With 8 bands of 8 bits, any pair within 7 bits shares at least one band exactly.
+SIMHASH_DISTANCE = 6
+BANDS = 8
+BAND_BITS = 64 // BANDS
+
+_TOKEN = re.compile(r"[a-z0-9]+|[一-鿿]")
+_lock = threading.Lock()
+_conn = None
+
+def _features(text: str) -> list:
+    tokens = _TOKEN.findall((text or "").lower())
+    # Word bigrams carry more of the headline's shape than single words
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash of the tokens and token bigrams in `text`.
+    """
+    weights = [0] * 64
+    for feature in _features(text):
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+def fingerprint(title: str, content: str = "") -> int:
+    # The headline plus the lede; the rest of the body varies too much between outlets
+    lede = re.split(r"(?<=[.!?。！？])\s*", content or "", maxsplit=1)[0]
+    return simhash(f"{title} {lede}")
+
+def distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def _bands(h: int) -> list:
+    return [(h >> (BAND_BITS * i)) & ((1 << BAND_BITS) - 1) for i in range(BANDS)]
+
+def _to_signed(h: int) -> int:
+    return h - (1 << 64) if h >= 1 << 63 else h
+
+def _to_unsigned(h: int) -> int:
+    return h + (1 << 64) if h < 0 else h
+
+def _connect():
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(SEEN_INDEX_PATH) or ".", exist_ok=True)
+        _conn = sqlite3.connect(SEEN_INDEX_PATH, timeout=30, check_same_thread=False)
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS stories ("
+            "url_key TEXT PRIMARY KEY, url TEXT, title TEXT, simhash INTEGER, "
+            + "".join(f"band{i} INTEGER, " for i in range(BANDS))
+            + "report_date TEXT NOT NULL, category TEXT)"
+        )
+        for i in range(BANDS):
+            _conn.execute(f"CREATE INDEX IF NOT EXISTS stories_band{i} ON stories (band{i})")
+        _conn.commit()
+    return _conn
+
+def is_seen(url: str, fp: int, before_date: str) -> bool:
+    """
+    True if the URL, or a near-duplicate fingerprint, was reported before `before_date`.
+    """
+    with _lock:
+        conn = _connect()
+        row = conn.execute(
+            "SELECT 1 FROM stories WHERE url_key = ? AND report_date < ?",
+            (normalize_url(url), before_date)
+        ).fetchone()
+        if row:
+            return True
+        bands = _bands(fp)
+        rows = conn.execute(
+            "SELECT simhash FROM stories WHERE report_date < ? AND simhash IS NOT NULL AND ("
+            + " OR ".join(f"band{i} = ?" for i in range(BANDS)) + ")",
+            (before_date, *bands)
+        ).fetchall()
+    return any(distance(_to_unsigned(h), fp) <= SIMHASH_DISTANCE for (h,) in rows)
+
+def filter_seen(raw_items: list, today: str) -> list:
+    """
+    Drops candidates already covered by an earlier day's report, before they reach Gemini.
+    Stories recorded today are kept so a same-day rerun sees the same candidates.
+    """
+    if not SEEN_FILTER or not raw_items:
+        return raw_items
+    fresh = [
+        item for item in raw_items
+        if not is_seen(item.get("url", ""), fingerprint(item.get("title", ""), item.get("content", "")), today)
+    ]
+    if len(fresh) < len(raw_items):
+        print(f"Skipped {len(raw_items) - len(fresh)} story(ies) already covered in earlier reports.")
+    return fresh
+
+def record(url: str, title: str, fp, report_date: str, category: str = None):
+    bands = _bands(fp) if fp is not None else [None] * BANDS
+    signed = _to_signed(fp) if fp is not None else None
+    with _lock:
+        conn = _connect()
+        # Leave an unchanged story alone, so a rerun does not touch the committed file
+        row = conn.execute(
+            "SELECT url, title, simhash, report_date, category FROM stories WHERE url_key = ?", (normalize_url(url),)
+        ).fetchone()
+        if row == (url, title, signed, report_date, category):
+            return
+        columns = ", ".join(f"band{i}" for i in range(BANDS))
+        conn.execute(
+            f"INSERT OR REPLACE INTO stories (url_key, url, title, simhash, {columns}, report_date, category) "
+            f"VALUES (?, ?, ?, ?, {', '.join('?' * BANDS)}, ?, ?)",
+            (normalize_url(url), url, title, signed, *bands, report_date, category)
+        )
+        conn.commit()
+
+def record_reported(report_items: list, raw_items: list, report_date: str, category: str = None):
+    """
+    Remembers the stories that made it into today's report. Fingerprints come from the
+    original-language candidate (matched by URL), since that is what tomorrow's fetch returns.
+    """
+    raw_by_url = {normalize_url(raw.get("url", "")): raw for raw in raw_items}
+    for item in report_items:
+        url = item.get("url", "")
+        if not url:
+            continue
+        raw = raw_by_url.get(normalize_url(url))
+        fp = fingerprint(raw.get("title", ""), raw.get("content", "")) if raw else None
+        record(url, item.get("title", ""), fp, report_date, category)
+
+def stats() -> dict:
+    with _lock:
+        stories, latest = _connect().execute("SELECT COUNT(*), MAX(report_date) FROM stories").fetchone()
+    return {"stories": stories, "latest": latest}
+
+def backfill_from_markdown(pattern: str = "daily_reports/*.md") -> int:
+    """
+    Seeds the index with the URLs of the existing markdown reports (no fingerprints:
+    those reports only kept translated titles).
+    """
+    count = 0
+    for path in sorted(glob.glob(pattern)):
+        report_date = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
+        for title, url in re.findall(r"^## \d+\. (.*?)(?: \(得分: \d+\))?\n.*?\*\*連結\*\*: \[(.*?)\]", content, re.M | re.S):
+            record(url, title, None, report_date)
+            count += 1
+    return count
+
+if __name__ == "__main__":
+    if "--backfill" in sys.argv:
+        print(f"Indexed {backfill_from_markdown()} stories from daily_reports/.")
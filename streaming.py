@@ -0,0 +1,107 @@
+import json
+import time
+import threading
+from queue import Queue, Empty
+from concurrent.futures import TimeoutError
+
+class ItemStreamParser:
+    """
+    Incremental parser for a streamed {"items": [{...}, {...}]} JSON answer.
+    Feed it text chunks as they arrive; feed() returns every item object that became
+    complete in that chunk, so work on an item can start before the answer is finished.
+    """
+
+    def __init__(self, array_key: str = "items"):
+        self.array_key = array_key
+        self.buffer = ""
+        self.pos = 0
+        self.stack = []
+        self.in_string = False
+        self.escaped = False
+        self.item_start = None
+        self.last_key = None
+        self._string_start = None
+
+    def feed(self, chunk: str) -> list:
+        self.buffer += chunk
+        items = []
+        while self.pos < len(self.buffer):
+            ch = self.buffer[self.pos]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+                    if len(self.stack) == 1:
+                        # A string directly inside the root object: remember it as the last key
+                        self.last_key = self.buffer[self._string_start + 1:self.pos]
+            elif ch == '"':
+                self.in_string = True
+                self._string_start = self.pos
+            elif ch in "{[":
+                if ch == "{" and self._in_item_array():
+                    self.item_start = self.pos
+                self.stack.append(ch)
+            elif ch in "}]":
+                if self.stack:
+                    self.stack.pop()
+                if ch == "}" and self.item_start is not None and self._in_item_array():
+                    try:
+                        items.append(json.loads(self.buffer[self.item_start:self.pos + 1]))
+                    except ValueError:
+                        pass
+                    self.item_start = None
+            self.pos += 1
+        return items
+
+    def _in_item_array(self) -> bool:
+        # Root object -> the array under array_key -> item objects
+        return self.stack == ["{", "["] and self.last_key == self.array_key
+
+    @property
+    def text(self) -> str:
+        return self.buffer
+
+def read_until(chunks, end: float = None):
+    """
+    Yields from the iterable `chunks`, which is read on a background thread, until `end`
+    (a time.monotonic(); None waits for the end of the stream). Raises TimeoutError if `end`
+    passes first, however long the source has stalled; the source is then closed after its
+    next chunk. An error raised by the source is re-raised here.
+    """
+    if end is None:
+        yield from chunks
+        return
+    queue = Queue()
+    stop = threading.Event()
+
+    def read():
+        try:
+            for chunk in chunks:
+                if stop.is_set():
+                    break
+                queue.put(("chunk", chunk))
+        except Exception as e:
+            queue.put(("error", e))
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+            queue.put(("done", None))
+
+    threading.Thread(target=read, name="stream", daemon=True).start()
+    try:
+        while True:
+            try:
+                kind, value = queue.get(timeout=max(0.0, end - time.monotonic()))
+            except Empty:
+                raise TimeoutError("stream still open at its deadline")
+            if kind == "chunk":
+                yield value
+            elif kind == "error":
+                raise value
+            else:
+                return
+    finally:
+        stop.set()
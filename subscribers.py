@@ -0,0 +1,70 @@
+import os
+import json
+from dotenv import load_dotenv
+
+from categories import CATEGORIES
+
+load_dotenv()
+
+# Subscriber groups (desks, teams) and the categories each wants. Without this file the
+# notifier keeps its old behaviour: push to LINE_USER_ID, else broadcast.
+SUBSCRIBERS_CONFIG = os.getenv("SUBSCRIBERS_CONFIG", "subscribers.json")
+
+def _user_ids(group: dict) -> list:
+    # IDs listed in the file, plus a comma-separated env var (so they can live in CI secrets)
+    ids = list(group.get("user_ids") or [])
+    if group.get("user_ids_env"):
+        ids += [uid.strip() for uid in os.getenv(group["user_ids_env"], "").split(",") if uid.strip()]
+        if not ids:
+            print(f"[WARNING] Subscriber group {group['name']}: {group['user_ids_env']} is empty.")
+    return list(dict.fromkeys(ids))
+
+def load_subscribers(path: str = None) -> list:
+    """
+    Reads the subscriber registry: a list of {"name", "user_ids", "categories"} groups, in
+    the order of the config file. Returns [] when the file does not exist.
+    """
+    path = path or SUBSCRIBERS_CONFIG
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+
+    groups, names = [], set()
+    for entry in entries:
+        if not entry.get("name"):
+            raise ValueError(f"{path}: a subscriber group is missing name")
+        if entry["name"] in names:
+            raise ValueError(f"{path}: duplicate subscriber group {entry['name']}")
+        if not (entry.get("user_ids") or entry.get("user_ids_env")):
+            raise ValueError(f"{path}: subscriber group {entry['name']} needs user_ids or user_ids_env")
+        unknown = [key for key in entry.get("categories") or [] if key not in CATEGORIES]
+        if unknown:
+            raise ValueError(f"{path}: subscriber group {entry['name']} has unknown categories {', '.join(unknown)}")
+        names.add(entry["name"])
+        if entry.get("enabled", True):
+            groups.append({"name": entry["name"], "categories": entry.get("categories") or None, "user_ids": _user_ids(entry)})
+    return groups
+
+def audiences(groups: list, sections: dict = None) -> list:
+    """
+    Groups recipients by the categories they get: [(category keys, [user IDs])], where
+    a user in several groups gets the union of their categories (all of them when any
+    group has no preference) and so receives one message. With `sections` (report key ->
+    item count), users none of whose categories have items today are left out.
+    """
+    wanted = {}
+    for group in groups:
+        keys = set(group["categories"] or CATEGORIES)
+        for uid in group["user_ids"]:
+            wanted.setdefault(uid, set()).update(keys)
+
+    by_keys = {}
+    for uid, keys in wanted.items():
+        keys = tuple(key for key in CATEGORIES if key in keys)
+        if sections is not None:
+            keys = tuple(key for key in keys if sections.get(CATEGORIES[key]["report_key"]))
+            if not keys:
+                continue
+        by_keys.setdefault(keys, []).append(uid)
+    return list(by_keys.items())
@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Traces land next to the run's checkpoints: runs/<date>/trace-<HHMMSS>.jsonl
+RUNS_DIR = os.getenv("RUNS_DIR", "runs")
+
+# Per-stage and per-external-call instrumentation. Spans time a block of work, counters
+# tally events (requests, retries, cache hits, tokens). Everything is appended to a JSONL
+# trace as it happens, and summarized in a table at the end of the run.
+
+_lock = threading.Lock()
+_local = threading.local()
+_sink = None
+_run = None
+_spans = {}
+_counters = {}
+
+def start_run(run_id: str, date: str = None, path: str = None) -> str:
+    """
+    Opens the trace file for a run and resets all aggregates. Returns the trace path.
+    """
+    global _sink, _run, _spans, _counters
+    if path is None:
+        path = os.path.join(RUNS_DIR, date or run_id, f"trace-{time.strftime('%H%M%S')}.jsonl")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with _lock:
+        if _sink is not None:
+            _sink.close()
+        _sink = open(path, "a", encoding="utf-8")
+        _run = run_id
+        _spans = {}
+        _counters = {}
+    emit({"type": "run_start", "run": run_id})
+    return path
+
+def emit(event: dict):
+    event = dict(event, ts=round(time.time(), 3))
+    with _lock:
+        if _sink is not None:
+            _sink.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+            _sink.flush()
+
+@contextmanager
+def span(name: str, started: float = None, **attrs):
+    """
+    Times the enclosed block, or from `started` (a time.perf_counter()) when the work began
+    before it. Yields a dict the block may add attributes to (token counts, item counts, ...);
+    they are written with the span event.
+    """
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    parent = stack[-1] if stack else None
+    stack.append(name)
+    start = time.perf_counter() if started is None else started
+    error = None
+    try:
+        yield attrs
+    except GeneratorExit:
+        # A consumer stopped reading a stream early (e.g. at a deadline): not a failure
+        raise
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        stack.pop()
+        with _lock:
+            agg = _spans.setdefault(name, {"calls": 0, "total": 0.0, "max": 0.0, "errors": 0})
+            agg["calls"] += 1
+            agg["total"] += duration
+            agg["max"] = max(agg["max"], duration)
+            if error:
+                agg["errors"] += 1
+        emit(dict(attrs, type="span", name=name, parent=parent, thread=threading.current_thread().name,
+                  duration=round(duration, 4), error=error))
+
+def count(name: str, n: int = 1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+def record_usage(attrs: dict, response, prefix: str):
+    """
+    Copies prompt/response token counts from a genai response into span attrs and counters.
+    """
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None) or 0
+    response_tokens = getattr(usage, "candidates_token_count", None) or 0
+    attrs["prompt_tokens"] = prompt_tokens
+    attrs["response_tokens"] = response_tokens
+    count(f"{prefix}.prompt_tokens", prompt_tokens)
+    count(f"{prefix}.response_tokens", response_tokens)
+
+def summary() -> dict:
+    with _lock:
+        spans = {name: dict(agg, total=round(agg["total"], 4), max=round(agg["max"], 4)) for name, agg in _spans.items()}
+        return {"spans": spans, "counters": dict(_counters)}
+
+def print_summary():
+    data = summary()
+    if not data["spans"] and not data["counters"]:
+        return
+    print(f"{'span':<32}{'calls':>7}{'total s':>10}{'mean s':>9}{'max s':>9}{'errors':>8}")
+    for name, agg in sorted(data["spans"].items()):
+        mean = agg["total"] / agg["calls"] if agg["calls"] else 0
+        print(f"{name:<32}{agg['calls']:>7}{agg['total']:>10.2f}{mean:>9.2f}{agg['max']:>9.2f}{agg['errors']:>8}")
+    for name, value in sorted(data["counters"].items()):
+        print(f"{name:<32}{value:>7}")
+
+def end_run():
+    """
+    Writes the aggregate summary to the trace, prints the table and closes the trace file.
+    """
+    global _sink
+    emit(dict(summary(), type="run_end", run=_run))
+    print_summary()
+    with _lock:
+        if _sink is not None:
+            _sink.close()
+            _sink = None
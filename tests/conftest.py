@@ -0,0 +1,30 @@
+import os
+import sys
+
+# The modules live flat at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    """
+    Fresh response caches under tmp_path and the stand-in clients from fakes.py, with no
+    latency and no rate limits (the fakes have no quota). Tests adjust the fakes (e.g.
+    offline.genai.flash.seconds) as they need.
+    """
+    import cache
+    import clients
+    import fakes
+    import ratelimit
+
+    monkeypatch.setattr(ratelimit, "PROVIDERS", {name: ratelimit.Provider(name, rpm=60000, max_concurrency=64) for name in ratelimit.PROVIDER_DEFAULTS})
+
+    for name in ("tavily", "gemini"):
+        monkeypatch.setattr(cache, f"{name}_cache", cache.ResponseCache(name, str(tmp_path / f"{name}.sqlite3"), ttl=3600, max_bytes=1 << 24))
+    tavily = fakes.FakeTavilyClient(latency=0, jitter=0)
+    genai = fakes.FakeGenaiClient(pro_latency=0, flash_latency=0, jitter=0)
+    monkeypatch.setattr(clients, "_tavily_client", tavily)
+    monkeypatch.setattr(clients, "_gemini_client", genai)
+    return type("Offline", (), {"tavily": tavily, "genai": genai, "cache": cache})
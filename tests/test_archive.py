@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pytest
+
+import archive
+from categories import CATEGORIES
+
+FINANCE = CATEGORIES["finance"]["report_key"]
+AI = CATEGORIES["ai"]["report_key"]
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(archive, "_months", {})
+    monkeypatch.setattr(archive, "_dictionary", None)
+    return tmp_path / "archive"
+
+
+def item(title: str, source: str = "Reuters", sentiment: str = "", **fields) -> dict:
+    return dict({"title": title, "date_time": "Mon, 02 Mar 2026 14:00:00 GMT", "source": source,
+                 "summary": f"{title} summary", "social_sentiment": sentiment,
+                 "url": f"https://example.com/{abs(hash(title))}"}, **fields)
+
+
+def test_append_and_read_back_round_trip():
+    report = {
+        FINANCE: [item("聯準會維持利率", sentiment="市場看好，情緒樂觀"),
+                  item("Oil falls", source="CNBC", date_time="2026年3月2日 14:00")],
+        AI: [item("輝達新晶片", source="Bloomberg")],
+    }
+    assert archive.append_report(report, "2026-03-02") == 3
+    rows = archive.items()
+    assert [row["title"] for row in rows] == ["聯準會維持利率", "Oil falls", "輝達新晶片"]
+    assert [row["category"] for row in rows] == ["finance", "finance", "ai"]
+    assert rows[0]["report_date"] == "2026-03-02"
+    assert rows[0]["social_sentiment"] == "市場看好，情緒樂觀" and rows[0]["sentiment"] > 0
+    # The reported date string is kept as is; only parseable ones fill `published`
+    assert rows[0]["published"] == "2026-03-02T14:00:00"
+    assert rows[1]["date_time"] == "2026年3月2日 14:00" and rows[1]["published"] is None
+    assert sorted(os.listdir(archive.month_dir("2026-03"))) == sorted(
+        [f"{name}.npy" for name in archive.FIXED_COLUMNS]
+        + [f"{name}{ext}" for name in archive.TEXT_COLUMNS for ext in (".utf8", ".offsets.npy")]
+    )
+
+
+def test_appending_a_day_again_replaces_its_rows():
+    archive.append_report({FINANCE: [item("A"), item("B")]}, "2026-03-02")
+    archive.append_report({FINANCE: [item("C")]}, "2026-03-01")
+    archive.append_report({FINANCE: [item("A"), item("B"), item("D")]}, "2026-03-02")
+    rows = archive.items()
+    # Months stay in report-date order, each day keeping its item order
+    assert [(row["report_date"], row["title"]) for row in rows] == [
+        ("2026-03-01", "C"), ("2026-03-02", "A"), ("2026-03-02", "B"), ("2026-03-02", "D")]
+    assert archive.stats()["items"] == 4
+
+
+def test_months_and_the_shared_dictionary():
+    archive.append_report({FINANCE: [item("A", source="Reuters")]}, "2026-02-27")
+    archive.append_report({AI: [item("B", source="Reuters"), item("C", source="CNBC")]}, "2026-03-02")
+    assert archive.months() == ["2026-02", "2026-03"]
+    assert archive.months(since="2026-03-01") == ["2026-03"]
+    # One code per source across every month
+    codes = [np.load(os.path.join(archive.month_dir(month), "source.npy")) for month in archive.months()]
+    assert codes[0][0] == codes[1][0]
+    assert archive.count_by_source() == [("Reuters", 2), ("CNBC", 1)]
+    assert archive.count_by_category(since="2026-03-01") == [("ai", 2)]
+    assert archive.items(source="Unknown") == []
+
+
+def test_topic_frequency_does_not_match_across_rows():
+    # "ab" must not match the end of one row's text and the start of the next
+    archive.append_report({FINANCE: [item("xa", summary="a"), item("bx", summary="b")]}, "2026-03-02")
+    assert archive.topic_frequency("ab") == {}
+    assert archive.topic_frequency("XA", by="day") == {"2026-03-02": 1}
+
+
+def test_sentiment_trend_by_period():
+    archive.append_report({FINANCE: [item("A", sentiment="看好"), item("B", sentiment="擔憂")]}, "2026-02-27")
+    archive.append_report({FINANCE: [item("C", sentiment="看好 樂觀")]}, "2026-03-02")
+    assert archive.sentiment_trend() == {"2026-02": {"items": 2, "mean": 0.0}, "2026-03": {"items": 1, "mean": 1.0}}
+
+
+def test_reads_a_month_archived_before_date_time_existed():
+    archive.append_report({FINANCE: [item("A")]}, "2026-03-02")
+    path = archive.month_dir("2026-03")
+    os.remove(os.path.join(path, "date_time.utf8"))
+    os.remove(os.path.join(path, "date_time.offsets.npy"))
+    archive._months.clear()
+    assert archive.items()[0]["date_time"] == ""
+    # Appending to it rewrites the month with the column
+    archive.append_report({FINANCE: [item("B")]}, "2026-03-03")
+    assert [row["date_time"] for row in archive.items()] == ["", "Mon, 02 Mar 2026 14:00:00 GMT"]
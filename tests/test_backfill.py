@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+import archive
+import backfill
+import storage
+from categories import CATEGORIES
+
+FINANCE = CATEGORIES["finance"]["report_key"]
+
+
+@pytest.fixture(autouse=True)
+def stores(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(backfill, "RUNS_DIR", str(tmp_path / "runs"))
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(archive, "_months", {})
+    monkeypatch.setattr(archive, "_dictionary", None)
+
+
+def report(title: str, **fields) -> dict:
+    return {FINANCE: [dict({"title": title, "date_time": "2026-03-01 14:00", "source": "Reuters", "summary": f"{title} summary",
+                            "social_sentiment": "市場看好", "url": f"https://a.com/{abs(hash(title))}"}, **fields)]}
+
+
+def test_date_range_includes_both_ends():
+    assert backfill.date_range("2026-02-27", "2026-03-02") == ["2026-02-27", "2026-02-28", "2026-03-01", "2026-03-02"]
+
+
+def test_stored_report_prefers_checkpoint_then_archive_then_markdown(tmp_path):
+    dates = ["2026-03-01", "2026-03-02", "2026-03-03"]
+    (tmp_path / "daily_reports").mkdir()
+    for date in dates:
+        (tmp_path / "daily_reports" / f"{date}.md").write_text(storage.render_markdown(report("From markdown"), date), encoding="utf-8")
+    for date in dates[1:]:
+        archive.append_report(report("From the archive"), date)
+    (tmp_path / "runs" / dates[2]).mkdir(parents=True)
+    (tmp_path / "runs" / dates[2] / "report.json").write_text(json.dumps(report("From the checkpoint", extra="kept")), encoding="utf-8")
+
+    sources = {date: backfill.stored_report(date) for date in dates}
+    assert [source for _, source in sources.values()] == ["markdown", "archive", "checkpoint"]
+    assert [report_data[FINANCE][0]["title"] for report_data, _ in sources.values()] == ["From markdown", "From the archive", "From the checkpoint"]
+    # The archive gives back each item's date as reported; the checkpoint keeps every field
+    assert sources[dates[1]][0][FINANCE][0]["date_time"] == "2026-03-01 14:00"
+    assert sources[dates[2]][0][FINANCE][0]["extra"] == "kept"
+    assert backfill.stored_report("2026-03-04") == (None, None)
@@ -0,0 +1,140 @@
+import json
+import threading
+from datetime import datetime
+
+import pytest
+
+import cache
+import telemetry
+from fakes import FakeGenaiClient
+from analyzer import CategoryReport, _is_json
+from google.genai import types
+
+CONFIG = types.GenerateContentConfig(response_mime_type="application/json", response_schema=CategoryReport)
+PROMPT = '原始新聞資料：\n[' + ", ".join(
+    json.dumps({"title": f"Story {i}", "url": f"https://a.com/{i}", "content": "x" * 400}) for i in range(10)
+) + "]"
+
+
+@pytest.fixture
+def gemini_cache(tmp_path, monkeypatch):
+    store = cache.ResponseCache("gemini", str(tmp_path / "gemini.sqlite3"), ttl=3600, max_bytes=1 << 20)
+    monkeypatch.setattr(cache, "gemini_cache", store)
+    return store
+
+
+def wait_for_stream_finishers():
+    for thread in threading.enumerate():
+        if thread.name == "stream-finish":
+            thread.join(5)
+
+
+def test_stream_read_to_the_end_is_memoized(gemini_cache):
+    client = FakeGenaiClient(pro_latency=0, jitter=0)
+    first = "".join(cache.cached_generate_stream(client, "gemini-2.5-pro", PROMPT, CONFIG, validate=_is_json))
+    again = list(cache.cached_generate_stream(client, "gemini-2.5-pro", PROMPT, CONFIG, validate=_is_json))
+    assert again == [first]
+    assert client.calls == 1
+    assert (gemini_cache.hits, gemini_cache.misses) == (1, 1)
+
+
+def test_stream_closed_early_is_still_memoized_and_counted(gemini_cache, tmp_path):
+    telemetry.start_run("test", path=str(tmp_path / "trace.jsonl"))
+    client = FakeGenaiClient(pro_latency=0, jitter=0)
+    chunks = cache.cached_generate_stream(client, "gemini-2.5-pro", PROMPT, CONFIG, validate=_is_json)
+    head = next(chunks)
+    chunks.close()
+    wait_for_stream_finishers()
+
+    again = list(cache.cached_generate_stream(client, "gemini-2.5-pro", PROMPT, CONFIG, validate=_is_json))
+    assert len(again) == 1 and again[0].startswith(head)
+    assert json.loads(again[0])["items"]
+    assert client.calls == 1
+    assert telemetry.summary()["counters"]["gemini-2.5-pro.prompt_tokens"] > 0
+    telemetry.end_run()
+
+
+def test_invalid_answer_is_not_memoized(gemini_cache):
+    client = FakeGenaiClient(pro_latency=0, jitter=0)
+    for _ in range(2):
+        list(cache.cached_generate_stream(client, "gemini-2.5-pro", PROMPT, CONFIG, validate=lambda text: False))
+    assert client.calls == 2
+
+
+def test_entries_expire_after_their_ttl(tmp_path, monkeypatch):
+    store = cache.ResponseCache("t", str(tmp_path / "t.sqlite3"), ttl=60, max_bytes=1 << 20)
+    clock = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: clock[0])
+    store.set("k", {"results": [1]})
+    clock[0] += 59
+    assert store.get("k") == {"results": [1]}
+    clock[0] += 2
+    assert store.get("k") is None
+    assert store.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted_over_the_size_limit(tmp_path, monkeypatch):
+    store = cache.ResponseCache("t", str(tmp_path / "t.sqlite3"), ttl=3600, max_bytes=250)
+    clock = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: clock[0])
+    for key in ("a", "b", "c"):
+        clock[0] += 1
+        store.set(key, "x" * 100)
+    # "a" was evicted to make room for "c"; reading "b" makes "c" the next to go
+    assert store.get("a") is None
+    clock[0] += 1
+    assert store.get("b") is not None
+    clock[0] += 1
+    store.set("d", "x" * 100)
+    assert store.get("c") is None
+    assert store.get("b") is not None and store.get("d") is not None
+
+
+def test_bypass_never_reads_or_writes(tmp_path):
+    store = cache.ResponseCache("t", str(tmp_path / "t.sqlite3"), ttl=3600, max_bytes=1 << 20, bypass=True)
+    store.set("k", 1)
+    assert store.get("k") is None
+    assert store.stats()["entries"] == 0
+
+
+def test_gemini_key_covers_model_prompt_and_config():
+    other = types.GenerateContentConfig(response_mime_type="application/json", response_schema=CategoryReport, temperature=0.9)
+    key = cache.gemini_key("gemini-2.5-pro", PROMPT, CONFIG)
+    assert key == cache.gemini_key("gemini-2.5-pro", PROMPT, CONFIG)
+    assert key != cache.gemini_key("gemini-2.5-flash", PROMPT, CONFIG)
+    assert key != cache.gemini_key("gemini-2.5-pro", PROMPT + " ", CONFIG)
+    assert key != cache.gemini_key("gemini-2.5-pro", PROMPT, other)
+
+
+def test_generate_is_memoized_only_when_valid(gemini_cache):
+    client = FakeGenaiClient(pro_latency=0, flash_latency=0, jitter=0)
+    first = cache.cached_generate(client, "gemini-2.5-pro", PROMPT, CONFIG, validate=_is_json)
+    assert cache.cached_generate(client, "gemini-2.5-pro", PROMPT, CONFIG, validate=_is_json) == first
+    assert client.calls == 1
+    cache.cached_generate(client, "gemini-2.5-flash", PROMPT, validate=_is_json)
+    cache.cached_generate(client, "gemini-2.5-flash", PROMPT, validate=_is_json)
+    assert client.calls == 3
+
+
+def test_same_day_search_is_served_from_the_cache(offline, monkeypatch):
+    import scraper
+    first = scraper.fetch_news_for("finance")
+    assert scraper.fetch_news_for("finance") == first
+    assert offline.tavily.calls == 1
+    # Other parameters, or another day, go to the network again
+    scraper.fetch_news_for("ai")
+    monkeypatch.setattr(cache, "today_key", lambda: "2099-01-01")
+    scraper.fetch_news_for("finance")
+    assert offline.tavily.calls == 3
+
+
+def test_search_window_splits_the_day(monkeypatch):
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return tz.localize(datetime(2026, 3, 20, 9, 45))
+    monkeypatch.setattr(cache, "datetime", Clock)
+    monkeypatch.setattr(cache, "_search_window_minutes", None)
+    assert cache.today_key() == "2026-03-20"
+    cache.set_search_window(30)
+    assert cache.today_key() == "2026-03-20#19"
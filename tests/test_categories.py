@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from categories import CATEGORIES, REQUIRED_FIELDS, dedup_across, load_categories
+
+
+def spec(key: str, **overrides) -> dict:
+    entry = {field: f"{key} {field}" for field in REQUIRED_FIELDS}
+    return dict(entry, key=key, include_domains=["example.com"], **overrides)
+
+
+def write(tmp_path, entries: list) -> str:
+    path = tmp_path / "categories.json"
+    path.write_text(json.dumps(entries), encoding="utf-8")
+    return str(path)
+
+
+def test_registry_keeps_file_order_and_skips_disabled(tmp_path):
+    registry = load_categories(write(tmp_path, [spec("energy"), spec("crypto", enabled=False), spec("finance")]))
+    assert list(registry) == ["energy", "finance"]
+
+
+def test_invalid_entries_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="missing query"):
+        load_categories(write(tmp_path, [spec("energy", query="")]))
+    with pytest.raises(ValueError, match="duplicate category key energy"):
+        load_categories(write(tmp_path, [spec("energy"), spec("energy")]))
+
+
+def test_shipped_config_has_unique_report_keys():
+    assert len({entry["report_key"] for entry in CATEGORIES.values()}) == len(CATEGORIES)
+
+
+def story(url: str, title: str, score: float) -> dict:
+    return {"url": url, "title": title, "content": f"{title}. " * 10, "local_score": score}
+
+
+def test_a_shared_story_goes_to_the_category_it_ranked_highest_in():
+    chip_deal = "Nvidia signs multiyear supply deal with TSMC for advanced packaging"
+    raw_news = {
+        "ai": [story("https://a.com/deal", chip_deal, 0.6), story("https://a.com/model", "OpenAI ships a new reasoning model", 0.5)],
+        "semiconductors": [story("https://a.com/deal?utm_source=x", chip_deal, 0.9)],
+        "energy": [story("https://b.com/oil", "Oil climbs as OPEC+ extends output cuts", 0.4)],
+    }
+    deduped = dedup_across(raw_news)
+    assert [item["url"] for item in deduped["ai"]] == ["https://a.com/model"]
+    assert [item["url"] for item in deduped["semiconductors"]] == ["https://a.com/deal?utm_source=x"]
+    assert len(deduped["energy"]) == 1
+
+
+def test_checkpointed_categories_are_never_trimmed():
+    chip_deal = "Nvidia signs multiyear supply deal with TSMC for advanced packaging"
+    raw_news = {
+        "ai": [story("https://a.com/deal", chip_deal, 0.6)],
+        "semiconductors": [story("https://a.com/deal", chip_deal, 0.9)],
+    }
+    deduped = dedup_across(raw_news, keep=["ai"])
+    assert len(deduped["ai"]) == 1 and deduped["semiconductors"] == []
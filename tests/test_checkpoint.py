@@ -0,0 +1,23 @@
+import checkpoint
+from checkpoint import RunCheckpoint
+
+
+def test_only_a_resumed_run_reads_its_stages(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, "RUNS_DIR", str(tmp_path))
+    fresh = RunCheckpoint("2026-03-01")
+    fresh.save("raw", [{"url": "https://a.com/1"}], "finance")
+    fresh.save("report", {"global_financial_news": []})
+    assert fresh.load("raw", "finance") is None
+
+    resumed = RunCheckpoint("2026-03-01", resume=True)
+    assert resumed.load("raw", "finance") == [{"url": "https://a.com/1"}]
+    assert resumed.load("report") == {"global_financial_news": []}
+    assert resumed.load("raw", "ai") is None
+    assert sorted(p.name for p in (tmp_path / "2026-03-01").iterdir()) == ["raw_finance.json", "report.json"]
+
+
+def test_unreadable_checkpoint_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, "RUNS_DIR", str(tmp_path))
+    (tmp_path / "2026-03-01").mkdir()
+    (tmp_path / "2026-03-01" / "selected_ai.json").write_text('[{"title": "cut of', encoding="utf-8")
+    assert RunCheckpoint("2026-03-01", resume=True).load("selected", "ai") is None
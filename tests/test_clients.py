@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import clients
+from fakes import FakeTavilyClient
+
+
+@pytest.fixture(autouse=True)
+def fresh(monkeypatch):
+    for name in ("_tavily_client", "_tavily_adapter", "_gemini_client", "_gemini_httpx_client"):
+        monkeypatch.setattr(clients, name, None)
+    monkeypatch.setenv("TAVILY_API_KEY", "tvly-test")
+    monkeypatch.setenv("GEMINI_API_KEY", "gemini-test")
+
+
+def test_every_thread_gets_the_same_clients():
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        tavily = set(map(id, executor.map(lambda _: clients.get_tavily_client(), range(16))))
+        gemini = set(map(id, executor.map(lambda _: clients.get_gemini_client(), range(16))))
+    assert len(tavily) == 1 and len(gemini) == 1
+
+
+def test_tavily_requests_share_one_sized_pool():
+    clients.get_tavily_client()
+    assert clients._tavily_adapter._pool_maxsize == clients.HTTP_POOL_SIZE
+    assert clients.connection_stats()["tavily"] == {"requests": 0, "connections": 0}
+
+
+def test_missing_keys_give_no_client(monkeypatch):
+    monkeypatch.delenv("TAVILY_API_KEY")
+    monkeypatch.delenv("GEMINI_API_KEY")
+    assert clients.get_tavily_client() is None
+    assert clients.get_gemini_client() is None
+
+
+def test_a_stand_in_replaces_the_shared_client():
+    fake = FakeTavilyClient(latency=0)
+    clients.set_tavily_client(fake)
+    assert clients.get_tavily_client() is fake
@@ -0,0 +1,48 @@
+import json
+
+from compaction import compact_candidates, estimate_tokens, key_sentences, normalize_url
+
+RAW = [{
+    "title": f"Story {i}",
+    "url": f"https://www.example.com/news/{i}/?utm_source=x",
+    "published_date": "Mon, 16 Mar 2026 12:00:00 GMT",
+    "content": "First fact of the story. " * 40,
+    "raw_content": "ignored " * 500,
+    "score": 0.9,
+} for i in range(20)]
+
+
+def test_estimate_counts_cjk_per_character():
+    assert estimate_tokens("台積電") == 3
+    assert estimate_tokens("abcdefgh") == 2
+
+
+def test_key_sentences_keep_whole_leading_sentences():
+    text = "One fact. Two facts. Three facts."
+    assert key_sentences(text, 100) == text
+    assert key_sentences(text, 21) == "One fact. Two facts."
+    assert key_sentences("x" * 50, 10) == "x" * 10 + "…"
+
+
+def test_normalize_url_drops_tracking_and_trailing_slash():
+    assert normalize_url("http://www.Example.com/a/b/?utm_source=x#top") == "https://example.com/a/b"
+
+
+def test_compaction_keeps_only_the_needed_fields_and_drops_duplicates():
+    context, before, after = compact_candidates(RAW + [dict(RAW[0], url="https://example.com/news/0")], budget=100000)
+    candidates = json.loads(context)
+    assert len(candidates) == 20
+    assert set(candidates[0]) == {"title", "url", "published_date", "content", "source"}
+    assert candidates[0]["source"] == "example.com"
+    assert after < before
+
+
+def test_compaction_fits_the_budget_by_trimming_then_dropping_the_tail():
+    context, _, after = compact_candidates(RAW, budget=1500)
+    candidates = json.loads(context)
+    assert after <= 1500
+    assert candidates[0]["title"] == "Story 0"
+
+    context, _, after = compact_candidates(RAW, budget=300)
+    assert after <= 300
+    assert 1 <= len(json.loads(context)) < 20
@@ -0,0 +1,46 @@
+import pytest
+
+import deadline
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(deadline.time, "monotonic", lambda: now[0])
+    yield now
+    deadline.end_run()
+
+
+def test_stage_budgets_are_cumulative_shares_of_the_run(clock, monkeypatch):
+    monkeypatch.setattr(deadline, "STAGE_BUDGETS", {"fetch": 0.2, "select": 0.3, "enrich": 0.5})
+    deadline.start_run(100)
+    assert deadline.stage_end("fetch") == pytest.approx(120)
+    assert deadline.stage_end("select") == pytest.approx(150)
+    assert deadline.stage_end("enrich") == pytest.approx(200)
+
+    # Time fetch leaves unused rolls over to select
+    clock[0] = 110
+    assert deadline.remaining("select") == pytest.approx(40)
+    clock[0] = 160
+    assert deadline.expired("select") and not deadline.expired("enrich")
+    assert deadline.remaining("select") == 0
+    clock[0] = 230
+    assert deadline.overrun() == pytest.approx(30)
+
+
+def test_no_limit_means_no_stage_deadline(clock):
+    deadline.start_run(0)
+    assert deadline.stage_end("select") is None
+    assert deadline.remaining("select") is None
+    assert not deadline.expired("select")
+    clock[0] += 10000
+    assert deadline.overrun() == 0
+
+
+def test_degradations_belong_to_the_run(clock):
+    deadline.start_run(100)
+    deadline.degrade("select", "AI", "cut off after 4 item(s)", cause="cut")
+    assert deadline.is_degraded("select", "AI")
+    assert not deadline.is_degraded("enrich", "AI")
+    assert deadline.end_run() == [{"stage": "select", "subject": "AI", "detail": "cut off after 4 item(s)", "cause": "cut"}]
+    assert deadline.degradations() == []
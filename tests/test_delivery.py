@@ -0,0 +1,35 @@
+import delivery
+from fakes import FakeLineClient
+
+USERS = [f"U{i:04d}" for i in range(1200)]
+
+
+def test_batches_respect_the_multicast_limit():
+    batches = delivery.make_batches([("a", USERS), ("b", USERS[:10])])
+    assert [len(batch["to"]) for batch in batches] == [500, 500, 200, 10]
+    assert len({batch["retry_key"] for batch in batches}) == 4
+
+
+def test_every_recipient_gets_the_message_once():
+    client = FakeLineClient(latency=0, jitter=0)
+    result = delivery.deliver(client, [("a", USERS)], round_delay=0)
+    assert result["failed"] == []
+    assert client.recipients() == len(USERS)
+    assert all(messages == ["a"] for messages in client.received.values())
+    assert client.calls == 3
+
+
+def test_a_failing_batch_is_sent_once_per_round():
+    client = FakeLineClient(latency=0, jitter=0, error_rate=1.0)
+    result = delivery.deliver(client, [("a", USERS[:10])], rounds=3, round_delay=0)
+    assert client.calls == 3
+    assert result["rounds"] == 3
+    assert len(result["failed"]) == 1
+
+
+def test_a_resend_the_server_already_accepted_counts_as_delivered():
+    client = FakeLineClient(latency=0, jitter=0)
+    batch = delivery.make_batches([("a", USERS[:5])])[0]
+    assert delivery._send(client, batch) is None
+    assert delivery._send(client, batch) is None
+    assert client.received[USERS[0]] == ["a"]
@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+
+import pytest
+
+import analyzer
+import deadline
+import fakes
+
+ITEMS = [{"title": f"Story {i}", "url": f"https://a.com/{i}"} for i in range(5)]
+
+
+@pytest.fixture
+def enrich_budget(monkeypatch):
+    def start(seconds: float):
+        monkeypatch.setattr(deadline, "STAGE_BUDGETS", {"enrich": 1.0})
+        deadline.start_run(seconds)
+    yield start
+    deadline.end_run()
+
+
+def test_batched_summaries_fill_every_item(offline):
+    items = analyzer.enrich_items(offline.genai, [dict(item) for item in ITEMS])
+    assert all(item["social_sentiment"].startswith("社群看法分歧") for item in items)
+    assert offline.genai.calls == 1
+
+
+def test_slow_batch_summary_is_cut_at_the_enrich_deadline(offline, enrich_budget):
+    offline.genai.flash.seconds = 3
+    enrich_budget(0.5)
+    start = time.monotonic()
+    items = analyzer.enrich_items(offline.genai, [dict(item) for item in ITEMS])
+    assert time.monotonic() - start < 1.0
+    assert [item["social_sentiment"] for item in items] == [analyzer.SENTIMENT_SKIPPED] * len(ITEMS)
+    # The abandoned call still finishes (into the test's cache) in the background
+    for thread in threading.enumerate():
+        if thread.name.startswith("summarize"):
+            thread.join(5)
+
+
+def test_no_summary_starts_after_the_enrich_deadline(offline, enrich_budget):
+    enrich_budget(0.01)
+    time.sleep(0.02)
+    summaries = analyzer._summarize_batch(offline.genai, ["a", "b"], ["some comments", "目前無顯著社群討論"])
+    assert summaries == [analyzer.SENTIMENT_SKIPPED, "目前無顯著社群討論"]
+    assert offline.genai.calls == 0
+
+
+def test_fan_out_keeps_the_order_and_falls_back_per_item():
+    def lookup(i):
+        # Later items finish first; one raises and one outlives the per-item timeout
+        time.sleep(0.05 * (3 - i))
+        if i == 1:
+            raise RuntimeError("search failed")
+        if i == 3:
+            time.sleep(2)
+        return f"sentiment {i}"
+    start = time.monotonic()
+    results = analyzer._fan_out(lookup, [0, 1, 2, 3], "無法取得社群討論", max_workers=4, item_timeout=0.3)
+    assert results == ["sentiment 0", "無法取得社群討論", "sentiment 2", "無法取得社群討論"]
+    assert time.monotonic() - start < 1.5
+
+
+def test_enrichment_keeps_the_item_order(offline):
+    items = analyzer.enrich_items(offline.genai, [dict(item) for item in ITEMS], max_workers=5)
+    assert [item["url"] for item in items] == [item["url"] for item in ITEMS]
+    assert [item["social_sentiment"] for item in items] == [f"社群看法分歧 ({i})" for i in range(len(ITEMS))]
+
+
+class PartialBatchClient(fakes.FakeGenaiClient):
+    """
+    Answers a batched sentiment prompt without ID 2 and with one malformed entry.
+    """
+
+    def _answer(self, model, contents, config):
+        text = super()._answer(model, contents, config)
+        if getattr(getattr(config, "response_schema", None), "__name__", None) != "SentimentBatch":
+            return text
+        answers = [answer for answer in json.loads(text)["items"] if answer["id"] != 2]
+        return json.dumps({"items": answers + [{"id": 99, "social_sentiment": "unknown id"}, {"id": 0, "social_sentiment": " "}]})
+
+
+def test_batch_leaves_out_placeholders_and_unanswered_ids(offline):
+    client = PartialBatchClient(pro_latency=0, flash_latency=0, jitter=0)
+    raw = ["comments", "目前無顯著社群討論", "comments", "comments"]
+    summaries = analyzer.summarize_sentiments_batch(client, ["a", "b", "c", "d"], raw)
+    assert summaries == ["社群看法分歧 (0)", "目前無顯著社群討論", None, "社群看法分歧 (3)"]
+
+
+def test_items_the_batch_left_out_are_summarized_one_by_one(offline):
+    client = PartialBatchClient(pro_latency=0, flash_latency=0, jitter=0)
+    summaries = analyzer._summarize_batch(client, ["a", "b", "c"], ["comments"] * 3)
+    assert summaries == ["社群看法分歧 (0)", "社群看法分歧 (1)", "社群看法分歧，多空並陳。"]
+    assert client.calls == 2
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from analyzer import SentimentBatch, _selection_request
+from fakes import FakeAPIError, FakeGenaiClient, FakeTavilyClient, prompt_key
+from google.genai import types
+
+
+def fast_genai(**kwargs) -> FakeGenaiClient:
+    return FakeGenaiClient(pro_latency=0, flash_latency=0, jitter=0, **kwargs)
+
+
+def test_search_returns_news_and_social_snippets():
+    client = FakeTavilyClient(latency=0, jitter=0, result_count=12)
+    news = client.search("Fed interest rates", include_domains=["reuters.com"], max_results=5)["results"]
+    assert len(news) == 12 and all("reuters.com" in item["url"] for item in news)
+    social = client.search("reaction", include_domains=["reddit.com"], max_results=3)["results"]
+    assert len(social) == 3
+    assert client.calls == 2
+
+
+def test_selection_answer_follows_the_candidates_in_the_prompt():
+    candidates = [{"title": f"Story {i}", "url": f"https://a.com/{i}", "content": "Body."} for i in range(15)]
+    prompt, config = _selection_request("全球財經新聞", candidates, {})
+    client = fast_genai(select_count=10)
+    items = json.loads(client.models.generate_content(model="gemini-2.5-pro", contents=prompt, config=config).text)["items"]
+    assert [item["url"] for item in items] == [f"https://a.com/{i}" for i in range(10)]
+
+    streamed = "".join(chunk.text for chunk in client.models.generate_content_stream(model="gemini-2.5-pro", contents=prompt, config=config))
+    assert json.loads(streamed)["items"] == items
+
+
+def test_batch_sentiment_answers_every_id():
+    config = types.GenerateContentConfig(response_mime_type="application/json", response_schema=SentimentBatch)
+    prompt = "[ID 0] a\n[ID 1] b\n[ID 2] c"
+    answer = fast_genai().models.generate_content(model="gemini-2.5-flash", contents=prompt, config=config).text
+    assert [item["id"] for item in json.loads(answer)["items"]] == [0, 1, 2]
+
+
+def test_recordings_are_replayed():
+    recordings = {"gemini": {prompt_key("gemini-2.5-flash", "hello"): "recorded"}}
+    client = fast_genai(recordings=recordings)
+    assert client.models.generate_content(model="gemini-2.5-flash", contents="hello").text == "recorded"
+
+
+def test_injected_errors_look_throttled():
+    client = FakeTavilyClient(latency=0, jitter=0, error_rate=1.0)
+    with pytest.raises(FakeAPIError) as error:
+        client.search("anything")
+    assert error.value.status_code == 429
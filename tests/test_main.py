@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+import main
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_legacy_flags_map_to_subcommands():
+    args = main.parse_args(["--now", "--sequential", "--no-cache"])
+    assert args.command == "run" and args.func is main.cmd_run
+    assert args.sequential and args.no_cache and not args.resume
+
+    args = main.parse_args(["--daemon", "15"])
+    assert args.command == "daemon" and args.interval == 15
+    assert main.parse_args(["--daemon"]).interval is None
+
+
+def test_the_cli_imports_only_the_standard_library_up_front():
+    heavy = ["pytz", "tavily", "google.genai", "weasyprint", "linebot", "pipeline", "numpy"]
+    code = f"import sys, main; print([m for m in {heavy!r} if m in sys.modules])"
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO, capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+
+def test_status_creates_no_files(tmp_path, monkeypatch, capsys):
+    import cache
+    import seen_index
+    monkeypatch.chdir(tmp_path)
+    for name in ("tavily", "gemini"):
+        monkeypatch.setattr(cache, f"{name}_cache", cache.ResponseCache(name, os.path.join(".cache", f"{name}.sqlite3"), ttl=60, max_bytes=1 << 20))
+    monkeypatch.setattr(seen_index, "SEEN_INDEX_PATH", os.path.join("data", "seen_index.sqlite3"))
+
+    assert main.main(["status", "--date", "2026-03-20"]) == 0
+    assert os.listdir(tmp_path) == []
+    out = capsys.readouterr().out
+    assert "[cache] tavily: none" in out and "Seen index: none" in out
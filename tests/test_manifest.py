@@ -0,0 +1,29 @@
+import manifest
+import storage
+
+REPORT = {"global_financial_news": [
+    {"title": f"Story {i}", "source": "Reuters", "date_time": "2026-03-01", "summary": "s", "social_sentiment": "m",
+     "url": f"https://a.com/{i}"}
+    for i in range(3)
+]}
+
+
+def test_backfill_counts_markdown_items_and_leaves_pdf_counts_unknown(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest, "MANIFEST_PATH", str(tmp_path / "manifest.jsonl"))
+    (tmp_path / "daily_reports").mkdir()
+    (tmp_path / "reports").mkdir()
+    (tmp_path / "daily_reports" / "2026-03-01.md").write_text(storage.render_markdown(REPORT, "2026-03-01"), encoding="utf-8")
+    (tmp_path / "reports" / "daily_report_2026-03-01.pdf").write_bytes(b"%PDF")
+    (tmp_path / "reports" / "daily_report_2026-03-02.pdf").write_bytes(b"%PDF")
+
+    pdfs, markdown = str(tmp_path / "reports" / "*.pdf"), str(tmp_path / "daily_reports" / "*.md")
+    assert manifest.backfill(pdfs, markdown) == 3
+    assert manifest.backfill(pdfs, markdown) == 0
+
+    assert manifest.for_date("2026-03-01", "markdown")["item_count"] == 3
+    # A PDF may come from another run than the markdown of its date: unknown, not borrowed
+    for date in ("2026-03-01", "2026-03-02"):
+        assert manifest.for_date(date, "pdf")["item_count"] is None
+        assert manifest.for_date(date, "pdf")["items"] == []
+    assert manifest.latest("pdf")["date"] == "2026-03-02"
+    assert manifest.latest("pdf")["written_at"].endswith("+08:00")
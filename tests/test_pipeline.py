@@ -0,0 +1,143 @@
+import time
+
+import pytest
+
+import checkpoint
+import deadline
+import pipeline
+from categories import CATEGORIES
+from analyzer import CATEGORY_NAMES, REPORT_KEYS
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, "RUNS_DIR", str(tmp_path / "runs"))
+    deadline.start_run(0)
+    yield checkpoint.RunCheckpoint("2026-03-20")
+    deadline.end_run()
+
+
+@pytest.fixture
+def stores(tmp_path, monkeypatch):
+    """
+    The seen index, search index, archive and traces under tmp_path.
+    """
+    import archive
+    import search_index
+    import seen_index
+    import telemetry
+    monkeypatch.setattr(seen_index, "SEEN_INDEX_PATH", str(tmp_path / "seen_index.sqlite3"))
+    monkeypatch.setattr(seen_index, "_conn", None)
+    monkeypatch.setattr(search_index, "SEARCH_INDEX_PATH", str(tmp_path / "search_index.sqlite3"))
+    monkeypatch.setattr(search_index, "_conn", None)
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(telemetry, "RUNS_DIR", str(tmp_path / "runs"))
+    yield
+    for module in (seen_index, search_index):
+        if module._conn is not None:
+            module._conn.close()
+
+
+def story(key: str, n: int = 0) -> dict:
+    return {"title": f"{key} story {n}", "url": f"https://{key}.example.com/{n}", "content": f"{key} " * 20, "local_score": 1.0}
+
+
+def test_a_failing_fetch_leaves_the_other_categories_in_order(run, monkeypatch):
+    def candidates_for(key, today_date):
+        # Finish in reverse order, so the result order cannot come from completion order
+        time.sleep(0.01 * (len(CATEGORIES) - list(CATEGORIES).index(key)))
+        if key == "ai":
+            raise RuntimeError("search quota exceeded")
+        return [story(key)]
+    monkeypatch.setattr(pipeline, "_candidates_for", candidates_for)
+
+    raw_news = pipeline.gather_candidates(run)
+    assert list(raw_news) == list(CATEGORIES)
+    assert raw_news["ai"] == []
+    assert all(raw_news[key] == [story(key)] for key in CATEGORIES if key != "ai")
+    assert deadline.is_degraded("fetch", CATEGORY_NAMES["ai"])
+    # The failed category has no checkpoint, so --resume fetches it again
+    resumed = checkpoint.RunCheckpoint(run.date, resume=True)
+    assert resumed.load("raw", "ai") is None
+    assert resumed.load("raw", "finance") == [story("finance")]
+
+
+def test_a_failing_category_pipeline_ships_empty_and_keeps_the_report_open(run, monkeypatch):
+    monkeypatch.setattr(pipeline, "get_gemini_client", lambda: object())
+    monkeypatch.setattr(pipeline, "_candidates_for", lambda key, today_date: [story(key)])
+
+    def category_pipeline(client, key, raw_items, checkpoint):
+        if key == "crypto":
+            raise ValueError("malformed selection")
+        return [dict(item, summary="ok") for item in raw_items]
+    monkeypatch.setattr(pipeline, "run_category_pipeline", category_pipeline)
+
+    raw_news, report_data = pipeline.run_pipelines(run)
+    assert list(report_data) == [REPORT_KEYS[key] for key in CATEGORIES]
+    assert report_data[REPORT_KEYS["crypto"]] == []
+    assert [item["url"] for item in report_data[REPORT_KEYS["finance"]]] == [story("finance")["url"]]
+    assert deadline.is_degraded("select", CATEGORY_NAMES["crypto"])
+    assert not pipeline.save_complete_report(run, report_data)
+
+
+def test_a_same_day_rerun_is_served_from_the_caches(run, stores, offline):
+    _, first = pipeline.run_pipelines(run)
+    calls = (offline.tavily.calls, offline.genai.calls)
+    assert all(first.values()) and all(calls)
+
+    # A fresh run (no --resume) of the same day gets every answer back from the caches
+    _, again = pipeline.run_pipelines(checkpoint.RunCheckpoint(run.date))
+    assert again == first
+    assert (offline.tavily.calls, offline.genai.calls) == calls
+
+
+def news(key: str, n: int) -> dict:
+    # Distinct words per story, so no two are near-duplicates
+    words = " ".join(f"{key.replace('_', '')}{n}w{i}" for i in range(30))
+    return {"title": f"{key} story {n}", "url": f"https://{key}.example.com/{n}", "content": words, "local_score": 1 - n / 100}
+
+
+def todays_report(run: checkpoint.RunCheckpoint) -> dict:
+    """
+    Checkpoints a day whose fetch returned stories 0 and 1 of each category and reported
+    story 0. Returns the report.
+    """
+    for key in CATEGORIES:
+        run.save("fetched", [news(key, 0), news(key, 1)], key)
+        run.save("raw", [news(key, 0), news(key, 1)], key)
+    return {REPORT_KEYS[key]: [news(key, 0)] for key in CATEGORIES}
+
+
+def test_a_poll_appends_only_stories_new_since_the_last_fetch(run, stores, offline, monkeypatch):
+    report = todays_report(run)
+    monkeypatch.setattr(pipeline, "DAEMON_MAX_NEW_ITEMS", 2)
+    monkeypatch.setattr(pipeline, "_candidates_for", lambda key, today_date: [news(key, n) for n in range(6)])
+
+    resumed = checkpoint.RunCheckpoint(run.date, resume=True)
+    assert pipeline.poll_new_stories(offline.genai, resumed, report) == 2 * len(CATEGORIES)
+    assert [item["url"] for item in report[REPORT_KEYS["finance"]]] == [news("finance", n)["url"] for n in (0, 2, 3)]
+    assert resumed.load("report") == report
+    # Stories 4 and 5 were fetched (and passed over) too, so the next poll has nothing new
+    assert pipeline.poll_new_stories(offline.genai, resumed, report) == 0
+
+
+def test_the_daemon_notifies_only_when_the_report_changed(run, stores, offline, monkeypatch):
+    import notifier
+    report = todays_report(run)
+    run.save("rendered", {"pdf": "reports/daily_report_2026-03-20.pdf", "report": report, "degradations": []})
+    candidates = {key: [news(key, 0), news(key, 1)] for key in CATEGORIES}
+    rendered, sent = [], []
+    monkeypatch.setattr(pipeline, "_today", lambda: run.date)
+    monkeypatch.setattr(pipeline, "_candidates_for", lambda key, today_date: candidates[key])
+    monkeypatch.setattr(pipeline, "generate_pdf_report", lambda report_data, path, **kwargs: rendered.append(path) or path)
+    monkeypatch.setattr(notifier, "send_native_pdf", lambda: sent.append(True))
+
+    state = {"digest": pipeline.report_digest(report)}
+    pipeline.daemon_poll(state)
+    assert (rendered, sent) == ([], [])
+
+    candidates["ai"].append(news("ai", 2))
+    pipeline.daemon_poll(state)
+    assert (len(rendered), len(sent)) == (1, 1)
+    pipeline.daemon_poll(state)
+    assert (len(rendered), len(sent)) == (1, 1)
@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+import ranker
+
+NOW = datetime(2026, 3, 16, 12, tzinfo=timezone.utc)
+
+
+def test_preferred_domains_score_higher():
+    items = [{"url": "https://www.reuters.com/a"}, {"url": "https://markets.bloomberg.com/b"}, {"url": "https://blog.example/c"}]
+    scores = ranker.source_scores(items, ["reuters.com", "bloomberg.com"])
+    assert scores.tolist() == [1.0, 0.95, 0.3]
+
+
+def test_recency_halves_every_half_life():
+    items = [
+        {"published_date": "Mon, 16 Mar 2026 12:00:00 GMT"},
+        {"published_date": "2026-03-16T00:00:00Z"},
+        {},
+    ]
+    scores = ranker.recency_scores(items, now=NOW)
+    assert np.allclose(scores, [1.0, 0.5 ** (12 / ranker.RECENCY_HALF_LIFE_HOURS), 0.5])
+
+
+def test_relevance_prefers_the_query_terms():
+    items = [
+        {"title": "Celebrity gossip roundup", "content": "Nothing about markets."},
+        {"title": "Fed holds interest rates", "content": "The Federal Reserve kept interest rates unchanged."},
+    ]
+    scores = ranker.relevance_scores(items, "Fed interest rates decision")
+    assert scores[1] > scores[0]
+    assert ranker.relevance_scores([{}], "").tolist() == [0.0]
+
+
+def test_sort_and_keep_top():
+    items = [
+        {"title": "Gossip", "url": "https://blog.example/1", "content": "", "score": 0.1},
+        {"title": "Fed holds rates", "url": "https://www.reuters.com/2", "content": "Fed rates", "score": 0.9,
+         "published_date": "Mon, 16 Mar 2026 11:00:00 GMT"},
+        {"title": "Rates outlook", "url": "https://www.bloomberg.com/3", "content": "rates", "score": 0.5},
+    ]
+    ranked = ranker.sort_candidates(items, "Fed rates", ["reuters.com", "bloomberg.com"])
+    assert [item["url"][-1] for item in ranked] == ["2", "3", "1"]
+    assert ranked[0]["local_score"] >= ranked[1]["local_score"] >= ranked[2]["local_score"]
+    assert [item["url"] for item in ranker.keep_top(ranked, 2)] == [ranked[0]["url"], ranked[1]["url"]]
+    assert ranker.sort_candidates([], "q", []) == []
@@ -0,0 +1,70 @@
+import pytest
+
+import ratelimit
+from fakes import FakeAPIError
+from ratelimit import AdaptiveLimiter, Provider
+
+
+def test_limiter_starts_at_the_full_quota():
+    limiter = AdaptiveLimiter(6)
+    for _ in range(6):
+        limiter.acquire()
+    assert limiter.in_flight == 6
+
+
+def test_throttle_halves_the_limit_once_per_burst():
+    limiter = AdaptiveLimiter(8)
+    for _ in range(3):
+        limiter.acquire()
+    limiter.release(throttled=True)
+    assert limiter.limit == 4
+    # The rest of the burst is the same signal
+    limiter.release(throttled=True)
+    limiter.release(throttled=True)
+    assert limiter.limit == 4
+
+
+def test_limit_grows_back_to_the_quota_on_success():
+    limiter = AdaptiveLimiter(4, initial=2)
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.limit == 4
+
+
+def test_throttles_are_retried_and_other_errors_are_not(monkeypatch):
+    monkeypatch.setattr(ratelimit, "BACKOFF_BASE", 0)
+    provider = Provider("test", rpm=60000, max_concurrency=2)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise FakeAPIError()
+        return "ok"
+
+    assert provider.call(flaky) == "ok"
+    assert len(attempts) == 3
+
+    def broken():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    attempts.clear()
+    with pytest.raises(ValueError):
+        provider.call(broken)
+    assert len(attempts) == 1
+
+
+def test_no_retry_starts_after_the_deadline(monkeypatch):
+    monkeypatch.setattr(ratelimit, "BACKOFF_BASE", 5)
+    provider = Provider("test", rpm=60000, max_concurrency=2)
+    attempts = []
+
+    def throttled():
+        attempts.append(1)
+        raise FakeAPIError()
+
+    with pytest.raises(FakeAPIError):
+        provider.call_until(0, throttled)
+    assert len(attempts) == 1
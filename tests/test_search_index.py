@@ -0,0 +1,81 @@
+import pytest
+
+import search_index
+
+
+@pytest.fixture(autouse=True)
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_index, "SEARCH_INDEX_PATH", str(tmp_path / "search_index.sqlite3"))
+    monkeypatch.setattr(search_index, "_conn", None)
+    yield
+    if search_index._conn is not None:
+        search_index._conn.close()
+
+
+REPORT = {
+    "global_ai_news": [
+        {"title": "輝達發表新一代 AI 晶片", "source": "Reuters", "summary": "Nvidia unveiled the B300 at GTC.",
+         "social_sentiment": "社群看好", "url": "https://www.reuters.com/nvidia-b300"},
+        {"title": "OpenAI 推出新模型", "source": "The Verge", "summary": "GPT update ships to all users.",
+         "social_sentiment": "", "url": "https://www.theverge.com/openai"},
+    ],
+    "global_financial_news": [
+        {"title": "聯準會維持利率不變", "source": "CNBC", "summary": "The Fed held rates at 4.25%-4.5%.",
+         "social_sentiment": "市場看法分歧", "url": "https://www.cnbc.com/fed"},
+    ],
+}
+
+
+def test_tokenize_cjk_bigrams_and_latin_words():
+    assert search_index.tokenize("台積電 TSMC") == ["台積", "積電", "tsmc"]
+    # A lone CJK character stays a unigram; Latin words keep inner punctuation
+    assert search_index.tokenize("漲 S&P 500 gpt-4.5") == ["漲", "s&p", "500", "gpt-4.5"]
+    assert search_index.tokenize("") == []
+
+
+def test_index_and_search_round_trip():
+    assert search_index.index_report(REPORT, "2026-03-01") == 3
+    hits = search_index.search("晶片")
+    assert [hit["url"] for hit in hits] == ["https://www.reuters.com/nvidia-b300"]
+    assert hits[0]["section"] == "global_ai_news" and hits[0]["date"] == "2026-03-01"
+    # Body terms match too, case-insensitively
+    assert [hit["url"] for hit in search_index.search("FED")] == ["https://www.cnbc.com/fed"]
+    assert search_index.search("不存在的詞") == []
+
+
+def test_title_terms_outrank_body_terms():
+    search_index.index_report({"s": [
+        {"title": "Copper prices", "summary": "Nvidia mentioned once.", "url": "https://a.com/1"},
+        {"title": "Nvidia earnings", "summary": "Copper mentioned once.", "url": "https://a.com/2"},
+    ]}, "2026-03-01")
+    assert [hit["url"] for hit in search_index.search("nvidia")] == ["https://a.com/2", "https://a.com/1"]
+
+
+def test_reindexing_is_incremental():
+    search_index.index_report(REPORT, "2026-03-01")
+    assert search_index.index_report(REPORT, "2026-03-01") == 0
+    changed = {**REPORT, "global_financial_news": [dict(REPORT["global_financial_news"][0], summary="Rates cut to 4%.")]}
+    assert search_index.index_report(changed, "2026-03-01") == 1
+    # The old text's postings are gone with it
+    assert search_index.search("held") == []
+    assert [hit["url"] for hit in search_index.search("cut")] == ["https://www.cnbc.com/fed"]
+
+
+def test_filters_by_date_and_section():
+    search_index.index_report(REPORT, "2026-03-01")
+    search_index.index_report({"global_ai_news": [dict(REPORT["global_ai_news"][0], url="https://a.com/later")]}, "2026-03-05")
+    assert {hit["date"] for hit in search_index.search("nvidia")} == {"2026-03-01", "2026-03-05"}
+    assert [hit["date"] for hit in search_index.search("nvidia", since="2026-03-02")] == ["2026-03-05"]
+    assert [hit["date"] for hit in search_index.search("nvidia", until="2026-03-02")] == ["2026-03-01"]
+    assert search_index.search("nvidia", section="global_financial_news") == []
+
+
+def test_reindexing_a_day_drops_items_no_longer_in_its_report():
+    search_index.index_report(REPORT, "2026-03-01")
+    search_index.index_report({"global_ai_news": [dict(REPORT["global_ai_news"][0], url="https://a.com/later")]}, "2026-03-05")
+    trimmed = {"global_ai_news": REPORT["global_ai_news"][:1], "global_financial_news": []}
+    assert search_index.index_report(trimmed, "2026-03-01") == 2
+    assert search_index.search("fed") == [] and search_index.search("openai") == []
+    # Other days are left alone
+    assert {hit["date"] for hit in search_index.search("nvidia")} == {"2026-03-01", "2026-03-05"}
+    assert search_index._connect().execute("SELECT COUNT(*) FROM postings WHERE doc_id NOT IN (SELECT id FROM docs)").fetchone()[0] == 0
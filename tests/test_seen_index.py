@@ -0,0 +1,82 @@
+import pytest
+
+import seen_index
+
+
+@pytest.fixture(autouse=True)
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(seen_index, "SEEN_INDEX_PATH", str(tmp_path / "seen_index.sqlite3"))
+    monkeypatch.setattr(seen_index, "_conn", None)
+    monkeypatch.setattr(seen_index, "SEEN_FILTER", True)
+    yield
+    if seen_index._conn is not None:
+        seen_index._conn.close()
+
+
+def flip(fp: int, bits: list) -> int:
+    for bit in bits:
+        fp ^= 1 << bit
+    return fp
+
+
+def test_simhash_is_stable_and_64_bit():
+    fp = seen_index.fingerprint("Nvidia beats earnings estimates", "Revenue rose 90%. More below.")
+    assert fp == seen_index.fingerprint("Nvidia beats earnings estimates", "Revenue rose 90%. Different body.")
+    assert 0 <= fp < 1 << 64
+
+
+def test_bands_cover_every_bit():
+    fp = seen_index.fingerprint("TSMC raises capex guidance")
+    bands = seen_index._bands(fp)
+    assert len(bands) == seen_index.BANDS
+    assert sum(band << (seen_index.BAND_BITS * i) for i, band in enumerate(bands)) == fp
+
+
+def test_signed_round_trip_for_sqlite():
+    for fp in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+        signed = seen_index._to_signed(fp)
+        assert -(1 << 63) <= signed < 1 << 63
+        assert seen_index._to_unsigned(signed) == fp
+
+
+def test_url_seen_only_from_earlier_days():
+    url = "https://www.reuters.com/markets/story-1/?utm_source=x"
+    seen_index.record(url, "Story 1", seen_index.fingerprint("Story 1"), "2026-03-01")
+    # Same story under tracking params or a trailing slash
+    assert seen_index.is_seen("https://reuters.com/markets/story-1", 0, "2026-03-02")
+    # Recorded today: a same-day rerun still sees it as new
+    assert not seen_index.is_seen(url, 0, "2026-03-01")
+
+
+def test_near_duplicate_within_distance_is_seen():
+    fp = seen_index.fingerprint("Fed holds rates steady, signals two cuts this year")
+    seen_index.record("https://a.com/fed", "Fed", fp, "2026-03-01")
+    # SIMHASH_DISTANCE bits flipped, spread over different bands: still one band in common
+    near = flip(fp, [0, 9, 18, 27, 36, 45][:seen_index.SIMHASH_DISTANCE])
+    assert seen_index.distance(fp, near) == seen_index.SIMHASH_DISTANCE
+    assert seen_index.is_seen("https://b.com/other-url", near, "2026-03-02")
+
+
+def test_beyond_distance_is_not_seen():
+    fp = seen_index.fingerprint("OPEC+ agrees to extend output cuts")
+    seen_index.record("https://a.com/opec", "OPEC", fp, "2026-03-01")
+    # Shares bands with the stored hash, but differs in one bit too many
+    far = flip(fp, range(seen_index.SIMHASH_DISTANCE + 1))
+    assert not seen_index.is_seen("https://b.com/opec", far, "2026-03-02")
+    # One bit flipped in every band: no band matches, so it is never even compared
+    every_band = flip(fp, [seen_index.BAND_BITS * i for i in range(seen_index.BANDS)])
+    assert not seen_index.is_seen("https://c.com/opec", every_band, "2026-03-02")
+
+
+def test_filter_and_record_round_trip():
+    raw = [
+        {"title": "Apple unveils new AI chip", "url": "https://a.com/apple", "content": "Cupertino. More."},
+        {"title": "Copper hits record high", "url": "https://b.com/copper", "content": "Prices jumped."},
+    ]
+    report = [{"title": "（譯）蘋果發表新 AI 晶片", "url": "https://a.com/apple/"}]
+    seen_index.record_reported(report, raw, "2026-03-01", "ai")
+
+    # The same story from another outlet the next day (same headline, new URL) is dropped
+    tomorrow = [dict(raw[0], url="https://c.com/apple-chip"), raw[1]]
+    assert [item["url"] for item in seen_index.filter_seen(tomorrow, "2026-03-02")] == ["https://b.com/copper"]
+    assert seen_index.stats() == {"stories": 1, "latest": "2026-03-01"}
@@ -0,0 +1,14 @@
+from analyzer import _selection_request
+
+CANDIDATES = [{"title": "Fed holds rates", "url": "https://a.com/1", "content": "The Fed held rates."}]
+
+
+def test_daily_selection_asks_for_the_last_24_hours():
+    prompt, _ = _selection_request("全球財經新聞", CANDIDATES, {})
+    assert "過去 24 小時內發生" in prompt
+
+
+def test_backfill_selection_asks_for_the_report_date():
+    prompt, _ = _selection_request("全球財經新聞", CANDIDATES, {}, report_date="2026-03-01")
+    assert "2026-03-01 當日發生" in prompt
+    assert "24 小時" not in prompt
@@ -0,0 +1,67 @@
+import subprocess
+
+import pytest
+
+import manifest
+import storage
+
+REPORT = {"global_ai_news": [
+    {"title": "Chip export rules", "source": "Reuters", "date_time": "2026-03-01", "summary": "s",
+     "social_sentiment": "m", "url": "https://a.com/1"},
+]}
+
+
+def git(*args, cwd) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.setattr(manifest, "MANIFEST_PATH", str(tmp_path / "reports" / "manifest.jsonl"))
+    git("init", "-q", "-b", "main", cwd=tmp_path)
+    git("config", "user.email", "scout@example.com", cwd=tmp_path)
+    git("config", "user.name", "Scout", cwd=tmp_path)
+    return tmp_path
+
+
+def test_markdown_round_trip():
+    assert storage.parse_markdown(storage.render_markdown(REPORT, "2026-03-01")) == REPORT
+
+
+def test_commit_holds_only_the_given_paths(repo):
+    (repo / "report.txt").write_text("a")
+    (repo / "unrelated.txt").write_text("b")
+    commit = storage.commit_paths(["report.txt", "missing.txt"], "Report")
+    assert commit == git("rev-parse", "HEAD", cwd=repo)
+    assert git("ls-tree", "--name-only", "HEAD", cwd=repo) == "report.txt"
+    assert storage.commit_paths(["report.txt"], "Report") is None
+
+
+def test_rerun_of_an_unchanged_report_makes_no_commit(repo):
+    assert storage.save_report(REPORT, "2026-03-01")
+    head = git("rev-parse", "HEAD", cwd=repo)
+    assert storage.save_report(REPORT, "2026-03-01")
+    assert git("rev-parse", "HEAD", cwd=repo) == head
+    assert len((repo / "reports" / "manifest.jsonl").read_text(encoding="utf-8").splitlines()) == 1
+    # The manifest is generated locally; only the report itself is committed
+    assert git("ls-tree", "-r", "--name-only", "HEAD", cwd=repo) == "daily_reports/2026-03-01.md"
+
+    changed = {"global_ai_news": REPORT["global_ai_news"] + [dict(REPORT["global_ai_news"][0], url="https://a.com/2")]}
+    assert storage.save_report(changed, "2026-03-01")
+    assert git("rev-parse", "HEAD~1", cwd=repo) == head
+
+
+def test_commit_leaves_the_staged_changes_alone(repo):
+    (repo / "report.txt").write_text("a")
+    storage.commit_paths(["report.txt"], "Report")
+    (repo / "staged.txt").write_text("work in progress")
+    git("add", "staged.txt", cwd=repo)
+    (repo / "report.txt").write_text("b")
+
+    storage.commit_paths(["report.txt"], "Report")
+    assert git("ls-tree", "--name-only", "HEAD", cwd=repo) == "report.txt"
+    assert git("show", "HEAD:report.txt", cwd=repo) == "b"
+    assert git("diff", "--cached", "--name-only", cwd=repo) == "staged.txt"
+    assert git("status", "--porcelain", "--", "report.txt", cwd=repo) == ""
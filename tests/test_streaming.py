@@ -0,0 +1,119 @@
+import json
+import time
+import threading
+
+import pytest
+
+import analyzer
+import deadline
+from streaming import ItemStreamParser, read_until
+
+ANSWER = json.dumps({"items": [
+    {"title": "Fed {holds} rates", "summary": "He said \"wait\" [for data]", "url": "https://a.com/1"},
+    {"title": "台積電上調資本支出", "summary": "}{][", "url": "https://b.com/2"},
+    {"title": "Escaped \\ backslash", "summary": "", "url": "https://c.com/3"},
+]}, ensure_ascii=False)
+
+
+def feed_all(parser: ItemStreamParser, chunks: list) -> list:
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    return items
+
+
+def test_whole_answer_round_trip():
+    assert ItemStreamParser().feed(ANSWER) == json.loads(ANSWER)["items"]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_any_chunking_gives_the_same_items(size):
+    chunks = [ANSWER[i:i + size] for i in range(0, len(ANSWER), size)]
+    assert feed_all(ItemStreamParser(), chunks) == json.loads(ANSWER)["items"]
+
+
+def test_items_are_returned_as_soon_as_they_close():
+    parser = ItemStreamParser()
+    first_end = ANSWER.index("https://a.com/1") + len("https://a.com/1\"}")
+    assert parser.feed(ANSWER[:first_end - 1]) == []
+    assert [item["url"] for item in parser.feed(ANSWER[first_end - 1:first_end])] == ["https://a.com/1"]
+
+
+def test_objects_outside_the_items_array_are_ignored():
+    answer = '{"meta": {"count": 1}, "other": [{"x": 1}], "items": [{"title": "t", "tags": {"a": [1, 2]}}]}'
+    assert feed_all(ItemStreamParser(), list(answer)) == [{"title": "t", "tags": {"a": [1, 2]}}]
+    assert ItemStreamParser(array_key="other").feed(answer) == [{"x": 1}]
+
+
+def test_truncated_answer_keeps_complete_items():
+    cut = ANSWER[:ANSWER.index("https://b.com/2")]
+    parser = ItemStreamParser()
+    assert [item["url"] for item in parser.feed(cut)] == ["https://a.com/1"]
+    assert parser.text == cut
+
+
+def test_read_until_passes_chunks_through():
+    assert list(read_until(iter(["a", "b", "c"]), time.monotonic() + 5)) == ["a", "b", "c"]
+    assert list(read_until(iter(["a"]))) == ["a"]
+
+
+def test_read_until_gives_up_on_a_stalled_stream():
+    release = threading.Event()
+
+    def stalled():
+        yield "first"
+        release.wait(5)
+        yield "late"
+
+    got = []
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        for chunk in read_until(stalled(), start + 0.2):
+            got.append(chunk)
+    assert got == ["first"]
+    assert time.monotonic() - start < 2
+    release.set()
+
+
+def test_read_until_reraises_source_errors():
+    def failing():
+        yield "ok"
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        list(read_until(failing(), time.monotonic() + 5))
+
+
+CANDIDATES = [{"title": f"Story {i}", "url": f"https://a.com/{i}", "content": "Body. " * 40} for i in range(10)]
+
+
+def wait_for_stream_finishers():
+    for thread in threading.enumerate():
+        if thread.name == "stream-finish":
+            thread.join(5)
+
+
+def test_streaming_selection_stops_reading_at_the_item_count(offline):
+    # Reading the whole answer would take the full 2 s
+    offline.genai.pro.seconds = 2
+    start = time.monotonic()
+    items = analyzer.select_and_enrich_streaming(offline.genai, "全球重要財經新聞", CANDIDATES, count=3)
+    assert time.monotonic() - start < 1.5
+    wait_for_stream_finishers()
+    assert [item["url"] for item in items] == [c["url"] for c in CANDIDATES[:3]]
+    assert all(item["social_sentiment"].startswith("社群看法分歧") for item in items)
+
+
+def test_streaming_selection_keeps_what_arrived_by_the_select_deadline(offline, monkeypatch):
+    monkeypatch.setattr(deadline, "STAGE_BUDGETS", {"select": 0.5, "enrich": 0.5})
+    offline.genai.pro.seconds = 3
+    deadline.start_run(2)
+    try:
+        start = time.monotonic()
+        items = analyzer.select_and_enrich_streaming(offline.genai, "全球重要財經新聞", CANDIDATES)
+        assert time.monotonic() - start < 2
+        assert 0 < len(items) < len(CANDIDATES)
+        assert deadline.degradations()[0]["cause"] == "cut"
+    finally:
+        deadline.end_run()
+        wait_for_stream_finishers()
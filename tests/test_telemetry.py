@@ -0,0 +1,64 @@
+import json
+import threading
+
+import pytest
+
+import telemetry
+from fakes import FakeResponse
+
+
+@pytest.fixture
+def trace(tmp_path):
+    path = telemetry.start_run("test", path=str(tmp_path / "trace.jsonl"))
+    yield path
+    telemetry.end_run()
+
+
+def events(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_spans_nest_per_thread_and_aggregate(trace):
+    with telemetry.span("stage.select", category="finance") as attrs:
+        attrs["items"] = 10
+        with telemetry.span("gemini.generate"):
+            pass
+
+    def search():
+        with telemetry.span("tavily.search"):
+            pass
+    # A span opened on another thread has no parent from this thread's stack
+    with telemetry.span("stage.enrich"):
+        worker = threading.Thread(target=search, name="worker")
+        worker.start()
+        worker.join()
+
+    spans = {event["name"]: event for event in events(trace) if event["type"] == "span"}
+    assert spans["gemini.generate"]["parent"] == "stage.select"
+    assert spans["stage.select"]["parent"] is None
+    assert spans["stage.select"]["category"] == "finance" and spans["stage.select"]["items"] == 10
+    assert spans["tavily.search"]["parent"] is None and spans["tavily.search"]["thread"] == "worker"
+    assert telemetry.summary()["spans"]["stage.select"]["calls"] == 1
+
+
+def test_a_failing_span_is_counted_and_reraised(trace):
+    with pytest.raises(ValueError):
+        with telemetry.span("gemini.generate"):
+            raise ValueError("bad answer")
+    assert telemetry.summary()["spans"]["gemini.generate"]["errors"] == 1
+    [event] = [event for event in events(trace) if event["type"] == "span"]
+    assert event["error"] == "ValueError: bad answer"
+
+
+def test_counters_and_token_usage_reach_the_run_summary(trace):
+    telemetry.count("cache.tavily.hit")
+    telemetry.count("cache.tavily.hit", 2)
+    attrs = {}
+    telemetry.record_usage(attrs, FakeResponse("p" * 400, "r" * 40), "gemini-2.5-flash")
+    assert attrs == {"prompt_tokens": 100, "response_tokens": 10}
+    telemetry.end_run()
+
+    run_end = events(trace)[-1]
+    assert run_end["type"] == "run_end" and run_end["run"] == "test"
+    assert run_end["counters"] == {"cache.tavily.hit": 3, "gemini-2.5-flash.prompt_tokens": 100, "gemini-2.5-flash.response_tokens": 10}